@@ -0,0 +1,62 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Benchmarks for the overhead of pytest-qgis itself.
+
+Run with: pytest benchmarks --qgis_disable_gui --qgis_benchmark_json=benchmark.json
+"""
+
+from typing import Callable, List
+
+import pytest
+from qgis.core import QgsProject, QgsVectorLayer
+
+pytest_plugins = "pytester"
+
+LAYER_COUNTS = (10, 100, 500)
+
+
+@pytest.fixture(params=LAYER_COUNTS, ids=lambda count: f"{count}_layers")
+def layer_count(request) -> int:
+    return request.param
+
+
+@pytest.fixture()
+def create_memory_layers() -> Callable[..., List[QgsVectorLayer]]:
+    def create(count: int, crs: str = "EPSG:4326") -> List[QgsVectorLayer]:
+        return [
+            QgsVectorLayer(f"Point?crs={crs}", f"layer {i}", "memory")
+            for i in range(count)
+        ]
+
+    return create
+
+
+@pytest.fixture()
+def project_with_mixed_crs_layers(
+    qgis_new_project, qgis_synthetic_layer, layer_count
+) -> None:
+    """Project with the layers in three different crs."""
+    crs_ids = ("EPSG:4326", "EPSG:3067", "EPSG:3857")
+    layers = [
+        qgis_synthetic_layer(
+            10, crs=crs_ids[i % len(crs_ids)], seed=i, provider="memory"
+        )
+        for i in range(layer_count)
+    ]
+    QgsProject.instance().addMapLayers(layers)
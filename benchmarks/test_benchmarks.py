@@ -0,0 +1,144 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import pytest
+from pytest_qgis.utils import (
+    ensure_qgis_layer_fixtures_are_cleaned,
+    get_common_extent_from_all_layers,
+    get_layers_with_different_crs,
+    replace_layers_with_reprojected_clones,
+    set_map_crs_based_on_layers,
+)
+from qgis.core import QgsCoordinateReferenceSystem, QgsGeometry, QgsPointXY, QgsProject
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Pytester
+
+FEATURE_COUNTS = (100, 10_000, 100_000)
+
+
+def test_session_startup(qgis_benchmark, pytester: "Pytester"):
+    pytester.makepyfile("def test_nothing(): pass")
+
+    def run_session() -> None:
+        result = pytester.runpytest_subprocess(
+            "--qgis_disable_gui", "-p", "no:cacheprovider"
+        )
+        result.assert_outcomes(passed=1)
+
+    qgis_benchmark(run_session, rounds=3, warmup_rounds=0, wait_for_canvas=False)
+
+
+def test_qgis_new_project(
+    qgis_benchmark, qgis_iface, create_memory_layers, layer_count
+):
+    def add_layers() -> None:
+        QgsProject.instance().addMapLayers(create_memory_layers(layer_count))
+
+    qgis_benchmark(qgis_iface.newProject, setup=add_layers)
+
+
+def test_ensure_qgis_layer_fixtures_are_cleaned(
+    qgis_benchmark, create_memory_layers, layer_count
+):
+    fixture_names = [f"layer_{i}" for i in range(layer_count)]
+    request = SimpleNamespace(fixturenames=fixture_names, values={})
+    request.getfixturevalue = request.values.__getitem__
+
+    def create_layer_fixtures() -> None:
+        request.values.update(zip(fixture_names, create_memory_layers(layer_count)))
+
+    qgis_benchmark(
+        ensure_qgis_layer_fixtures_are_cleaned, request, setup=create_layer_fixtures
+    )
+
+
+def test_iface_add_layers(
+    qgis_benchmark, qgis_iface, create_memory_layers, layer_count
+):
+    layers = create_memory_layers(layer_count)
+    qgis_benchmark(qgis_iface.addLayers, layers, setup=qgis_iface.removeAllLayers)
+    qgis_iface.removeAllLayers()
+
+
+@pytest.mark.usefixtures("project_with_mixed_crs_layers")
+def test_set_map_crs_based_on_layers(qgis_benchmark):
+    def reset_crs() -> None:
+        QgsProject.instance().setCrs(QgsCoordinateReferenceSystem())
+
+    qgis_benchmark(set_map_crs_based_on_layers, setup=reset_crs)
+
+
+@pytest.mark.usefixtures("project_with_mixed_crs_layers")
+def test_get_common_extent_from_all_layers(qgis_benchmark):
+    set_map_crs_based_on_layers()
+    qgis_benchmark(get_common_extent_from_all_layers)
+
+
+@pytest.mark.usefixtures("project_with_mixed_crs_layers")
+def test_get_layers_with_different_crs(qgis_benchmark):
+    set_map_crs_based_on_layers()
+    qgis_benchmark(get_layers_with_different_crs)
+
+
+@pytest.mark.parametrize("feature_count", FEATURE_COUNTS)
+def test_replace_layers_with_reprojected_clones(  # noqa: PLR0913
+    qgis_benchmark,
+    qgis_new_project,
+    qgis_processing,
+    qgis_synthetic_layer,
+    feature_count: int,
+    tmp_path: Path,
+):
+    project = QgsProject.instance()
+    project.setCrs(QgsCoordinateReferenceSystem("EPSG:3857"))
+
+    def add_layer() -> None:
+        project.removeAllMapLayers()
+        project.addMapLayer(
+            qgis_synthetic_layer(feature_count, "Polygon", provider="memory")
+        )
+
+    qgis_benchmark(
+        lambda: replace_layers_with_reprojected_clones(
+            get_layers_with_different_crs(), tmp_path
+        ),
+        rounds=3,
+        setup=add_layer,
+    )
+
+
+@pytest.mark.parametrize("feature_count", FEATURE_COUNTS)
+def test_qgis_bot_create_feature(
+    qgis_benchmark, qgis_bot, qgis_synthetic_layer, feature_count: int
+):
+    layer = qgis_synthetic_layer(
+        feature_count, fields={"value": "real"}, provider="memory"
+    )
+    layer.startEditing()
+
+    qgis_benchmark(
+        qgis_bot.create_feature_with_attribute_dialog,
+        layer,
+        QgsGeometry.fromPointXY(QgsPointXY(0, 0)),
+        {"value": 1.0},
+    )
+    layer.rollBack()
@@ -0,0 +1,171 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import contextlib
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsMapLayerStyle,
+    QgsVectorLayer,
+)
+
+from pytest_qgis import utils
+
+BASEMAP_NAME = "Natural Earth Countries"
+
+
+def get_world_map_geopackage() -> Path:
+    """Natural Earth geopackage shipped with QGIS."""
+    world_map_gpkg = Path(
+        QgsApplication.pkgDataPath(), "resources", "data", "world_map.gpkg"
+    )
+    assert world_map_gpkg.exists(), world_map_gpkg
+    return world_map_gpkg
+
+
+def get_countries_layer(geopackage: Path) -> QgsVectorLayer:
+    countries_layer = QgsVectorLayer(
+        f"{geopackage}|layername=countries",
+        BASEMAP_NAME,
+        "ogr",
+    )
+    assert countries_layer.isValid(), geopackage
+    return countries_layer
+
+
+class BasemapCache:
+    """
+    Cache of the Natural Earth countries basemap reprojected to each CRS.
+
+    Reprojecting the countries needs the processing framework and takes
+    seconds, so each CRS is reprojected once to a geopackage in the cache
+    directory, which persists between the sessions. The style and the CRS of
+    the countries are read once and the style is applied to the layers opened
+    from the cache. If the countries already are in the CRS, they are copied to
+    the cache directory instead, so that the installed geopackage is never
+    opened by the tests.
+    """
+
+    def __init__(
+        self, directory: Path, initialize_processing: Callable[[], None]
+    ) -> None:
+        self._directory = directory
+        self._initialize_processing = initialize_processing
+        self._uris: Dict[str, str] = {}
+        self._style: Optional[QgsMapLayerStyle] = None
+        self._source_crs: Optional[QgsCoordinateReferenceSystem] = None
+        self.builds = 0
+        self.reuses = 0
+
+    def get(self, crs: QgsCoordinateReferenceSystem) -> QgsVectorLayer:
+        """
+        Open a new basemap layer in the given CRS, reprojecting or copying the
+        countries on the first request of the CRS.
+        """
+        source = get_world_map_geopackage()
+        wkt = crs.toWkt()
+        uri = self._uris.get(wkt)
+        if uri is None:
+            path = self._directory / f"countries_{_get_key(source, wkt)}.gpkg"
+            is_copy = self._get_source_crs(source) == crs
+            if path.exists():
+                self.reuses += 1
+            elif is_copy:
+                self._copy(source, path)
+            else:
+                self._build(source, crs, path)
+            # The copy has all the layers of the world map
+            uri = f"{path}|layername=countries" if is_copy else str(path)
+            self._uris[wkt] = uri
+        else:
+            self.reuses += 1
+
+        layer = QgsVectorLayer(uri, BASEMAP_NAME, "ogr")
+        assert layer.isValid(), uri
+        if not layer.crs().isValid():
+            layer.setCrs(crs)
+        self._get_style(source).writeToLayer(layer)
+        return layer
+
+    def _build(
+        self, source: Path, crs: QgsCoordinateReferenceSystem, path: Path
+    ) -> None:
+        self._initialize_processing()
+        import processing
+
+        self.builds += 1
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first in case of concurrent sessions
+        temporary_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp.gpkg")
+        countries_layer = get_countries_layer(source)
+        try:
+            processing.run(
+                "native:reprojectlayer",
+                {
+                    "INPUT": countries_layer,
+                    "TARGET_CRS": crs,
+                    "OUTPUT": str(temporary_path),
+                },
+            )
+            os.replace(temporary_path, path)
+        finally:
+            utils._set_layer_owner_to_project(countries_layer)
+            with contextlib.suppress(OSError):
+                temporary_path.unlink()
+
+    def _copy(self, source: Path, path: Path) -> None:
+        self.builds += 1
+        self._directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp.gpkg")
+        try:
+            shutil.copyfile(source, temporary_path)
+            os.replace(temporary_path, path)
+        finally:
+            with contextlib.suppress(OSError):
+                temporary_path.unlink()
+
+    def _get_source_crs(self, source: Path) -> QgsCoordinateReferenceSystem:
+        if self._source_crs is None:
+            self._read_countries(source)
+        return self._source_crs
+
+    def _get_style(self, source: Path) -> QgsMapLayerStyle:
+        if self._style is None:
+            self._read_countries(source)
+        return self._style
+
+    def _read_countries(self, source: Path) -> None:
+        countries_layer = get_countries_layer(source)
+        style = QgsMapLayerStyle()
+        style.readFromLayer(countries_layer)
+        self._style = style
+        self._source_crs = countries_layer.crs()
+        utils._set_layer_owner_to_project(countries_layer)
+
+
+def _get_key(source: Path, wkt: str) -> str:
+    """Key of the reprojected basemap, changing with the QGIS installation."""
+    stat = source.stat()
+    data = f"{source.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{wkt}"
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
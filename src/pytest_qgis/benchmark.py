@@ -0,0 +1,197 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import json
+import math
+import platform
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from qgis.core import Qgis, QgsApplication
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QTimer
+
+from pytest_qgis import utils
+
+DEFAULT_ROUNDS = 5
+DEFAULT_WARMUP_ROUNDS = 1
+RESULTS_FORMAT_VERSION = 1
+
+BenchmarkResult = namedtuple(
+    "BenchmarkResult",
+    [
+        "name",
+        "rounds",
+        "warmup_rounds",
+        "median",
+        "p95",
+        "mean",
+        "min",
+        "max",
+        "timings",
+    ],
+)
+
+
+class QgisBenchmark:
+    """
+    Times a function including the Qt work it leaves behind.
+
+    Rendering, layer loading and signal handlers are often run later on the
+    event loop, so after each call the pending events are processed and
+    optionally the canvas rendering and QGIS tasks are waited to finish
+    before the round is timed as complete.
+    """
+
+    def __init__(
+        self, name: str, canvas: Optional[QgsMapCanvas], results: List[BenchmarkResult]
+    ) -> None:
+        self._name = name
+        self._canvas = canvas
+        self._results = results
+
+    def __call__(  # noqa: PLR0913
+        self,
+        function: Callable[..., Any],
+        *args: Any,
+        rounds: int = DEFAULT_ROUNDS,
+        warmup_rounds: int = DEFAULT_WARMUP_ROUNDS,
+        wait_for_canvas: bool = True,
+        wait_for_tasks: bool = False,
+        timeout_milliseconds: int = utils.DEFAULT_WAIT_TIMEOUT_MILLISECONDS,
+        name: Optional[str] = None,
+        setup: Optional[Callable[[], Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Run the function for warm-up rounds and then time it for rounds.
+
+        :param function: Function to benchmark.
+        :param args: Positional arguments of the function.
+        :param rounds: Number of timed rounds.
+        :param warmup_rounds: Number of untimed rounds run first.
+        :param wait_for_canvas: Whether to wait for the canvas rendering to finish.
+        :param wait_for_tasks: Whether to wait for QgsApplication.taskManager()
+            to have no active tasks.
+        :param timeout_milliseconds: Timeout for waiting in each round.
+        :param name: Name of the benchmark if there are many in the same test.
+        :param setup: Function called before each round. It is not timed.
+        :param kwargs: Keyword arguments of the function.
+        :return: The return value of the function from the last round.
+        """
+        if rounds < 1:
+            raise ValueError("There has to be at least one round")
+
+        def run_round() -> Any:
+            value = function(*args, **kwargs)
+            self._wait(wait_for_canvas, wait_for_tasks, timeout_milliseconds)
+            return value
+
+        def run_setup() -> None:
+            if setup is not None:
+                setup()
+                utils.process_events()
+
+        value = None
+        for _ in range(warmup_rounds):
+            run_setup()
+            value = run_round()
+
+        timings = []
+        for _ in range(rounds):
+            run_setup()
+            start = time.perf_counter()
+            value = run_round()
+            timings.append(time.perf_counter() - start)
+
+        self._results.append(
+            create_result(
+                self._name if name is None else f"{self._name}::{name}",
+                timings,
+                warmup_rounds,
+            )
+        )
+        return value
+
+    def _wait(
+        self, wait_for_canvas: bool, wait_for_tasks: bool, timeout_milliseconds: int
+    ) -> None:
+        utils.process_events()
+        if wait_for_canvas and self._canvas is not None:
+            canvas = self._canvas
+            utils.wait_until(
+                lambda: not canvas.isDrawing() and not _has_pending_refresh(canvas),
+                timeout_milliseconds,
+            )
+        if wait_for_tasks:
+            task_manager = QgsApplication.taskManager()
+            utils.wait_until(
+                lambda: task_manager.countActiveTasks() == 0, timeout_milliseconds
+            )
+        utils.process_events()
+
+
+def _has_pending_refresh(canvas: QgsMapCanvas) -> bool:
+    """
+    QgsMapCanvas.refresh() schedules the rendering with a single shot timer,
+    so the rendering has not started yet while the timer is active.
+    """
+    return any(
+        timer.isSingleShot() and timer.isActive()
+        for timer in canvas.findChildren(QTimer)
+    )
+
+
+def create_result(
+    name: str, timings: List[float], warmup_rounds: int
+) -> BenchmarkResult:
+    sorted_timings = sorted(timings)
+    # Nearest-rank percentile
+    p95 = sorted_timings[math.ceil(0.95 * len(sorted_timings)) - 1]
+    return BenchmarkResult(
+        name,
+        len(timings),
+        warmup_rounds,
+        statistics.median(sorted_timings),
+        p95,
+        statistics.mean(sorted_timings),
+        sorted_timings[0],
+        sorted_timings[-1],
+        timings,
+    )
+
+
+def save_results(path: Path, results: List[BenchmarkResult]) -> None:
+    """
+    Save benchmark results as JSON with the QGIS version,
+    so that the runs can be compared across QGIS releases.
+    """
+    data = {
+        "version": RESULTS_FORMAT_VERSION,
+        "datetime": datetime.now().isoformat(timespec="seconds"),
+        "qgis_version": Qgis.QGIS_VERSION,
+        "qgis_version_int": Qgis.QGIS_VERSION_INT,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": [result._asdict() for result in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
@@ -0,0 +1,99 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import time
+from typing import Dict, Iterable, List
+
+from qgis.core import QgsCoordinateReferenceSystem
+
+
+class CrsCache:
+    """
+    Cache of QgsCoordinateReferenceSystem objects by their authid.
+
+    The first lookup of a CRS queries srs.db and the PROJ database, which
+    is repeated in every test that uses the same EPSG code. The cache can
+    be warmed up at the start of the session with the CRSs the suite uses.
+    """
+
+    def __init__(self) -> None:
+        self._crs_by_authid: Dict[str, QgsCoordinateReferenceSystem] = {}
+        self._requested: Dict[str, None] = {}
+        self.hits = 0
+        self.misses = 0
+        self.miss_time = 0.0
+        self.warmup_count = 0
+        self.warmup_time = 0.0
+
+    def get(self, authid: str) -> QgsCoordinateReferenceSystem:
+        """Get a copy of the cached CRS, creating it on the first lookup."""
+        self._requested[authid] = None
+        crs = self._crs_by_authid.get(authid)
+        if crs is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            start = time.perf_counter()
+            crs = self._resolve(authid)
+            self.miss_time += time.perf_counter() - start
+        # QgsCoordinateReferenceSystem is implicitly shared, copying is cheap
+        return QgsCoordinateReferenceSystem(crs)
+
+    def record_use(self, authid: str) -> None:
+        """Remember a CRS used by the suite, e.g. by a layer, without a lookup."""
+        self._requested[authid] = None
+
+    def warm_up(self, authids: Iterable[str]) -> None:
+        """Resolve the given CRSs without counting them as lookups."""
+        start = time.perf_counter()
+        for authid in authids:
+            if authid and authid not in self._crs_by_authid:
+                self._resolve(authid)
+                self.warmup_count += 1
+        self.warmup_time += time.perf_counter() - start
+
+    def requested_authids(self) -> List[str]:
+        """Authids looked up or used during the session in the order of first use."""
+        return list(self._requested)
+
+    def estimated_saved_time(self) -> float:
+        """Estimate the lookup time saved by the hits, in seconds."""
+        resolved = self.misses + self.warmup_count
+        if not resolved:
+            return 0.0
+        average_resolve_time = (self.miss_time + self.warmup_time) / resolved
+        return self.hits * average_resolve_time
+
+    def clear(self) -> None:
+        self._crs_by_authid.clear()
+        self._requested.clear()
+        self.hits = self.misses = self.warmup_count = 0
+        self.miss_time = self.warmup_time = 0.0
+
+    def _resolve(self, authid: str) -> QgsCoordinateReferenceSystem:
+        crs = QgsCoordinateReferenceSystem(authid)
+        if crs.isValid():
+            self._crs_by_authid[authid] = crs
+        return crs
+
+
+CRS_CACHE = CrsCache()
+
+
+def get_crs(authid: str) -> QgsCoordinateReferenceSystem:
+    """Get QgsCoordinateReferenceSystem by its authid using the session cache."""
+    return CRS_CACHE.get(authid)
@@ -0,0 +1,244 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Conversion of vector layer features to NumPy structured arrays.
+
+This requires NumPy, which is shipped with most QGIS installations.
+"""
+
+import queue
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qgis.core import (
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsVectorLayer,
+    QgsVectorLayerFeatureSource,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from pytest_qgis import utils
+
+# The generated columns are prefixed so that they do not clash with the
+# fields, such as the fid field of GeoPackages
+FID_COLUMN = "_fid"
+GEOMETRY_COLUMNS = {
+    None: (),
+    "wkb": ("_wkb",),
+    "centroid": ("_x", "_y"),
+    "bounds": ("_xmin", "_ymin", "_xmax", "_ymax"),
+}
+FIELD_DTYPES = {
+    QVariant.Int: np.int64,
+    QVariant.UInt: np.int64,
+    QVariant.LongLong: np.int64,
+    QVariant.Double: np.float64,
+    QVariant.Bool: np.bool_,
+}
+# Batches fetched ahead of the conversion when using a thread
+PREFETCH_BATCHES = 2
+
+_DONE = object()
+
+
+def layer_to_numpy(  # noqa: PLR0913
+    layer: QgsVectorLayer,
+    fields: Optional[Sequence[str]] = None,
+    geometry: Optional[str] = None,
+    request: Optional[QgsFeatureRequest] = None,
+    threaded: bool = False,
+    batch_size: int = utils.MEMORY_LAYER_BATCH_SIZE,
+) -> "np.ma.MaskedArray":
+    """See pytest_qgis.utils.layer_to_numpy."""
+    if geometry not in GEOMETRY_COLUMNS:
+        raise ValueError(
+            f"Unsupported geometry: {geometry}, "
+            f"expected one of {list(GEOMETRY_COLUMNS)}"
+        )
+    layer_fields = layer.fields()
+    field_names = list(layer_fields.names() if fields is None else fields)
+    missing = [name for name in field_names if layer_fields.indexOf(name) < 0]
+    if missing:
+        raise ValueError(f"Fields not found in layer {layer.name()}: {missing}")
+    clashing = [
+        column
+        for column in (FID_COLUMN, *GEOMETRY_COLUMNS[geometry])
+        if column in field_names
+    ]
+    if clashing:
+        raise ValueError(
+            f"Fields of layer {layer.name()} clash with the generated columns: "
+            f"{clashing}, leave them out with fields"
+        )
+
+    dtype = np.dtype(
+        [
+            (FID_COLUMN, np.int64),
+            *(
+                (
+                    name,
+                    FIELD_DTYPES.get(layer_fields.field(name).type(), object),
+                )
+                for name in field_names
+            ),
+            *(
+                (column, object if geometry == "wkb" else np.float64)
+                for column in GEOMETRY_COLUMNS[geometry]
+            ),
+        ]
+    )
+
+    request = QgsFeatureRequest(request) if request is not None else QgsFeatureRequest()
+    request.setSubsetOfAttributes(field_names, layer_fields)
+    if geometry is None:
+        request.setFlags(request.flags() | QgsFeatureRequest.NoGeometry)
+
+    batches = (
+        _iter_batches_in_thread(QgsVectorLayerFeatureSource(layer), request, batch_size)
+        if threaded
+        else utils.iter_feature_batches(layer, request, batch_size)
+    )
+    # The attributes of the features are indexed by the fields of the layer
+    field_indices = [(name, layer_fields.indexOf(name)) for name in field_names]
+    arrays = [_to_array(batch, field_indices, geometry, dtype) for batch in batches]
+    if not arrays:
+        return np.ma.masked_array(np.empty(0, dtype=dtype))
+    return np.ma.concatenate(arrays)
+
+
+class _BatchFetcher(threading.Thread):
+    """
+    Fetches the batches of a feature source ahead of their conversion.
+    Feature sources, unlike layers, can be iterated outside the main thread.
+    """
+
+    def __init__(
+        self,
+        source: QgsVectorLayerFeatureSource,
+        request: QgsFeatureRequest,
+        batch_size: int,
+    ) -> None:
+        super().__init__(name="pytest-qgis-features", daemon=True)
+        self._source = source
+        self._request = request
+        self._batch_size = batch_size
+        self.batches: queue.Queue[object] = queue.Queue(maxsize=PREFETCH_BATCHES)
+        self.stopped = threading.Event()
+        self.error: Optional[Exception] = None
+
+    def run(self) -> None:
+        try:
+            for batch in utils.iter_feature_batches(
+                self._source, self._request, self._batch_size
+            ):
+                if not self._put(batch):
+                    return
+        except Exception as e:
+            self.error = e
+        self._put(_DONE)
+
+    def _put(self, item: object) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.batches.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+
+def _iter_batches_in_thread(
+    source: QgsVectorLayerFeatureSource, request: QgsFeatureRequest, batch_size: int
+) -> Iterator[List[QgsFeature]]:
+    """Fetch the batches in a thread while the previous batches are converted."""
+    fetcher = _BatchFetcher(source, request, batch_size)
+    fetcher.start()
+    try:
+        while True:
+            batch = fetcher.batches.get()
+            if batch is _DONE:
+                break
+            yield batch
+    finally:
+        fetcher.stopped.set()
+        fetcher.join()
+    if fetcher.error is not None:
+        raise fetcher.error
+
+
+def _to_array(
+    batch: List[QgsFeature],
+    field_indices: List[Tuple[str, int]],
+    geometry: Optional[str],
+    dtype: "np.dtype",
+) -> "np.ma.MaskedArray":
+    data = np.zeros(len(batch), dtype=dtype)
+    mask = np.zeros(len(batch), dtype=np.dtype([(name, bool) for name in dtype.names]))
+    data[FID_COLUMN] = [feature.id() for feature in batch]
+
+    attributes = [feature.attributes() for feature in batch]
+    for name, field_index in field_indices:
+        values = [row[field_index] for row in attributes]
+        nulls = [
+            value is None or (isinstance(value, QVariant) and value.isNull())
+            for value in values
+        ]
+        mask[name] = nulls
+        data[name] = [
+            _null_value(dtype[name]) if is_null else value
+            for value, is_null in zip(values, nulls)
+        ]
+
+    if geometry is not None:
+        columns = GEOMETRY_COLUMNS[geometry]
+        rows = [_geometry_values(feature, geometry) for feature in batch]
+        for index, column in enumerate(columns):
+            values = [row[index] if row is not None else None for row in rows]
+            mask[column] = [row is None for row in rows]
+            if geometry != "wkb":
+                values = [np.nan if value is None else value for value in values]
+            data[column] = values
+    return np.ma.masked_array(data, mask=mask)
+
+
+def _null_value(dtype: "np.dtype") -> object:
+    if dtype.kind == "f":
+        return np.nan
+    if dtype.kind == "O":
+        return None
+    return 0
+
+
+def _geometry_values(feature: QgsFeature, geometry: str) -> Optional[Tuple]:
+    if not feature.hasGeometry():
+        return None
+    feature_geometry = feature.geometry()
+    if geometry == "wkb":
+        return (bytes(feature_geometry.asWkb()),)
+    if geometry == "centroid":
+        point = feature_geometry.centroid().asPoint()
+        return point.x(), point.y()
+    bounding_box = feature_geometry.boundingBox()
+    return (
+        bounding_box.xMinimum(),
+        bounding_box.yMinimum(),
+        bounding_box.xMaximum(),
+        bounding_box.yMaximum(),
+    )
@@ -0,0 +1,130 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from qgis.core import Qgis, QgsProject, QgsTransaction, QgsVectorLayer
+from qgis.PyQt import sip
+
+# Offset of the file change counter in the SQLite database header
+SQLITE_CHANGE_COUNTER_OFFSET = 24
+
+
+class GpkgSandbox:
+    """
+    Working copy of a GeoPackage where the changes of a test are rolled back.
+
+    The layers opened with layer() share a single transaction which is
+    rolled back at the teardown of the test. If the project uses
+    transaction groups, the layers are left to the transaction group of
+    the project instead. If the working copy was changed anyway, for
+    example by committing through a transaction group or by writing to it
+    without the sandbox layers, a new copy is made for the next test.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._layers: List[QgsVectorLayer] = []
+        self._transaction: Optional[QgsTransaction] = None
+        self._state = _get_file_state(path)
+
+        if not _project_uses_transaction_groups():
+            self._transaction = QgsTransaction.create(
+                QgsTransaction.connectionString(str(path)), "ogr"
+            )
+            succeeded, error = self._transaction.begin()
+            if not succeeded:
+                raise RuntimeError(f"Could not begin transaction: {error}")
+
+    def layer(self, layer_name: str, name: Optional[str] = None) -> QgsVectorLayer:
+        """Open a layer of the working copy in the transaction of the test."""
+        layer = QgsVectorLayer(
+            f"{self.path!s}|layername={layer_name}",
+            layer_name if name is None else name,
+            "ogr",
+        )
+        if not layer.isValid():
+            raise ValueError(f"Layer {layer_name} not found in {self.path}")
+        if self._transaction is not None and not self._transaction.addLayer(layer):
+            raise RuntimeError(f"Could not add layer {layer_name} to the transaction")
+        self._layers.append(layer)
+        return layer
+
+    def rollback(self) -> bool:
+        """
+        Roll back the changes made during the test.
+
+        :return: Whether the working copy is unchanged and can be reused.
+        """
+        for layer in self._layers:
+            if not sip.isdeleted(layer) and layer.isEditable():
+                layer.rollBack()
+
+        rolled_back = True
+        if self._transaction is not None:
+            rolled_back, _ = self._transaction.rollback()
+            self._transaction = None
+        return rolled_back and _get_file_state(self.path) == self._state
+
+    @property
+    def layers(self) -> List[QgsVectorLayer]:
+        return self._layers
+
+
+class WorkingCopies:
+    """Working copies of the GeoPackages shared by the tests of the session."""
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._paths: Dict[Path, Path] = {}
+
+    def get(self, source: Path) -> Path:
+        source = source.resolve()
+        path = self._paths.get(source)
+        if path is None:
+            # A unique name so that a discarded copy still in use is not replaced
+            path = self._directory / f"{source.stem}_{uuid.uuid4().hex}.gpkg"
+            shutil.copy(source, path)
+            self._paths[source] = path
+        return path
+
+    def discard(self, source: Path) -> None:
+        self._paths.pop(source.resolve(), None)
+
+
+def _get_file_state(path: Path) -> Tuple[int, int]:
+    """
+    The change counter of the SQLite database, which is incremented by every
+    committed transaction, and the size of the write-ahead log, which holds
+    the committed transactions in WAL mode.
+    """
+    with path.open("rb") as database:
+        database.seek(SQLITE_CHANGE_COUNTER_OFFSET)
+        change_counter = int.from_bytes(database.read(4), "big")
+    wal = Path(f"{path!s}-wal")
+    return change_counter, wal.stat().st_size if wal.exists() else 0
+
+
+def _project_uses_transaction_groups() -> bool:
+    project = QgsProject.instance()
+    # Transaction modes were added in QGIS 3.26
+    if hasattr(project, "transactionMode"):
+        return project.transactionMode() != Qgis.TransactionMode.Disabled
+    return project.autoTransaction()
@@ -0,0 +1,415 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Crash isolated test execution.
+
+The tests are run in a pool of long-lived worker processes. Each worker is
+a pytest session of its own that initializes QGIS once and then runs the
+tests it receives from the controlling session. If a worker crashes, the
+test it was running is reported as failed with the output of the worker,
+including the backtrace written by faulthandler, and a new worker takes
+over the rest of the tests.
+"""
+
+import contextlib
+import os
+import queue
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+
+import pytest
+from _pytest.reports import TestReport
+
+if TYPE_CHECKING:
+    from _pytest.config import Config
+    from _pytest.main import Session
+
+ADDRESS_ENV = "PYTEST_QGIS_ISOLATE_ADDRESS"
+AUTHKEY_ENV = "PYTEST_QGIS_ISOLATE_AUTHKEY"
+WORKER_KEY = "qgis_isolate_worker"
+WORKER_DESCRIPTION = "Internal option for running as an isolated test worker."
+WORKER_STARTUP_TIMEOUT_SECONDS = 300
+WORKER_STARTUP_POLL_SECONDS = 0.1
+WORKER_EXIT_TIMEOUT_SECONDS = 60
+CRASH_OUTPUT_MAX_LINES = 200
+# Options that would make the workers write the same files as the controller,
+# and the options of the cache provider, which is disabled in the workers
+WORKER_EXCLUDED_OPTIONS = (
+    "--junitxml",
+    "--junit-xml",
+    "--qgis_benchmark_json",
+    "--qgis_leak_report",
+    "--lf",
+    "--last-failed",
+    "--ff",
+    "--failed-first",
+    "--nf",
+    "--new-first",
+    "--sw",
+    "--stepwise",
+    "--sw-skip",
+    "--stepwise-skip",
+    "--lfnf",
+    "--last-failed-no-failures",
+    "--cache-show",
+    "--cache-clear",
+)
+# Excluded options whose value may be given as the next argument
+WORKER_EXCLUDED_OPTIONS_WITH_VALUE = (
+    "--junitxml",
+    "--junit-xml",
+    "--qgis_benchmark_json",
+    "--qgis_leak_report",
+    "--lfnf",
+    "--last-failed-no-failures",
+)
+
+
+class WorkerCrashedError(Exception):
+    pass
+
+
+class IsolatedRunner:
+    """Runs the items of the session in a pool of worker processes."""
+
+    def __init__(self, session: "Session", worker_count: int) -> None:
+        self._session = session
+        self._config = session.config
+        self._worker_count = max(1, min(worker_count, len(session.items)))
+        self._items_by_nodeid = OrderedDict(
+            (item.nodeid, item) for item in session.items
+        )
+        self._events: queue.Queue[Tuple[str, Any]] = queue.Queue()
+        self._stop = threading.Event()
+        self.crashes = 0
+
+    def run(self) -> None:
+        threads = [
+            threading.Thread(
+                target=self._run_worker_queue, args=(nodeids,), daemon=True
+            )
+            for nodeids in self._split_items()
+        ]
+        for thread in threads:
+            thread.start()
+
+        running = len(threads)
+        try:
+            while running:
+                event, value = self._events.get()
+                if event == "done":
+                    running -= 1
+                elif event == "error":
+                    raise value
+                else:
+                    self._log(event, value)
+                if self._session.shouldfail or self._session.shouldstop:
+                    self._stop.set()
+        finally:
+            # Workers finish the test they are running
+            self._stop.set()
+
+        if self._session.shouldfail:
+            raise self._session.Failed(self._session.shouldfail)
+        if self._session.shouldstop:
+            raise self._session.Interrupted(self._session.shouldstop)
+
+    def _split_items(self) -> List[List[str]]:
+        """
+        Split the items to the workers by module, so that the module and
+        class scoped fixtures are set up only in one worker.
+        """
+        modules: Dict[str, List[str]] = OrderedDict()
+        for nodeid in self._items_by_nodeid:
+            modules.setdefault(nodeid.split("::")[0], []).append(nodeid)
+
+        queues: List[List[str]] = [[] for _ in range(self._worker_count)]
+        for nodeids in sorted(modules.values(), key=len, reverse=True):
+            min(queues, key=len).extend(nodeids)
+        return [nodeids for nodeids in queues if nodeids]
+
+    def _log(self, event: str, value: object) -> None:
+        hook = self._config.hook
+        if event == "start":
+            item = self._items_by_nodeid[str(value)]
+            hook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        elif event == "report":
+            hook.pytest_runtest_logreport(report=value)
+        elif event == "finish":
+            item = self._items_by_nodeid[str(value)]
+            hook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+
+    def _run_worker_queue(self, nodeids: List[str]) -> None:
+        remaining: Deque[str] = deque(nodeids)
+        try:
+            while remaining and not self._stop.is_set():
+                with _WorkerProcess(self) as worker:
+                    self._run_in_worker(worker, remaining)
+        except Exception as e:
+            self._events.put(("error", e))
+        finally:
+            self._events.put(("done", None))
+
+    def _run_in_worker(self, worker: "_WorkerProcess", remaining: Deque[str]) -> None:
+        while remaining and not self._stop.is_set():
+            nodeid = remaining[0]
+            next_nodeid = remaining[1] if len(remaining) > 1 else None
+            self._events.put(("start", nodeid))
+            phases: List[str] = []
+            try:
+                worker.send({"type": "run", "nodeid": nodeid, "next": next_nodeid})
+                while True:
+                    message = worker.receive()
+                    if message["type"] == "finished":
+                        break
+                    report = self._config.hook.pytest_report_from_serializable(
+                        config=self._config, data=message["report"]
+                    )
+                    phases.append(report.when)
+                    self._events.put(("report", report))
+            except WorkerCrashedError:
+                remaining.popleft()
+                self.crashes += 1
+                self._events.put(
+                    ("report", self._crash_report(nodeid, phases, worker.output()))
+                )
+                self._events.put(("finish", nodeid))
+                # The context manager starts a new worker for the rest
+                return
+            remaining.popleft()
+            self._events.put(("finish", nodeid))
+
+    def _crash_report(self, nodeid: str, phases: List[str], output: str) -> TestReport:
+        item = self._items_by_nodeid[nodeid]
+        when = "setup" if not phases else "call" if "call" not in phases else "teardown"
+        return TestReport(
+            nodeid=nodeid,
+            location=item.location,
+            keywords=dict.fromkeys(item.keywords, 1),
+            outcome="failed",
+            longrepr=f"QGIS test worker crashed while running this test.\n\n{output}",
+            when=when,
+            sections=[],
+            duration=0,
+            user_properties=[],
+        )
+
+    def worker_command(self) -> List[str]:
+        args = []
+        skip_value = False
+        for arg in self._config.invocation_params.args:
+            if skip_value:
+                skip_value = False
+                continue
+            if arg.split("=", 1)[0] in WORKER_EXCLUDED_OPTIONS:
+                skip_value = arg in WORKER_EXCLUDED_OPTIONS_WITH_VALUE
+                continue
+            args.append(arg)
+        return [
+            sys.executable,
+            "-m",
+            "pytest",
+            *args,
+            f"--{WORKER_KEY}",
+            "-p",
+            "no:cacheprovider",
+        ]
+
+    def worker_directory(self) -> str:
+        return str(self._config.invocation_params.dir)
+
+
+class _WorkerProcess:
+    """Worker process and its connection."""
+
+    def __init__(self, runner: IsolatedRunner) -> None:
+        authkey = secrets.token_bytes(16)
+        listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        host, port = listener.address
+        output_fd, output_path = tempfile.mkstemp(
+            prefix="pytest-qgis-worker-", suffix=".log"
+        )
+        self._output_path = Path(output_path)
+        try:
+            self._process = subprocess.Popen(
+                runner.worker_command(),
+                cwd=runner.worker_directory(),
+                env={
+                    **os.environ,
+                    ADDRESS_ENV: f"{host}:{port}",
+                    AUTHKEY_ENV: authkey.hex(),
+                    "PYTHONFAULTHANDLER": "1",
+                },
+                stdin=subprocess.DEVNULL,
+                stdout=output_fd,
+                stderr=subprocess.STDOUT,
+            )
+        finally:
+            # The worker has its own copy of the file descriptor
+            os.close(output_fd)
+        try:
+            self._connection = _accept(listener, self._process)
+        except RuntimeError as e:
+            output = self.output()
+            self._output_path.unlink()
+            raise RuntimeError(f"{e}\n\n{output}") from None
+        finally:
+            listener.close()
+
+    def __enter__(self) -> "_WorkerProcess":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        try:
+            if self._process.poll() is None:
+                self._connection.send({"type": "stop"})
+        except (OSError, EOFError):
+            self._process.kill()
+        finally:
+            self._wait()
+            self._connection.close()
+            self._output_path.unlink()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        try:
+            self._connection.send(message)
+        except (OSError, EOFError) as e:
+            raise WorkerCrashedError from e
+
+    def receive(self) -> Dict[str, Any]:
+        try:
+            return self._connection.recv()
+        except (OSError, EOFError) as e:
+            raise WorkerCrashedError from e
+
+    def output(self) -> str:
+        """Exit status and the last lines of the output of the crashed worker."""
+        return_code = self._wait()
+        if return_code < 0:
+            status = f"Worker was killed by {signal.Signals(-return_code).name}"
+        else:
+            status = f"Worker exited with code {return_code}"
+        lines = self._output_path.read_text(
+            encoding="utf-8", errors="replace"
+        ).splitlines()
+        return "\n".join([status, "", *lines[-CRASH_OUTPUT_MAX_LINES:]])
+
+    def _wait(self) -> int:
+        """Wait for the worker to exit, killing it if it does not."""
+        try:
+            return self._process.wait(WORKER_EXIT_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            return self._process.wait()
+
+
+def _accept(listener: Listener, process: subprocess.Popen) -> Connection:
+    """
+    Accept the connection of the started worker. Fails as soon as the worker
+    exits without connecting.
+    """
+    connections: queue.Queue[Connection] = queue.Queue()
+    thread = threading.Thread(
+        target=_accept_to_queue, args=(listener, connections), daemon=True
+    )
+    thread.start()
+    deadline = time.monotonic() + WORKER_STARTUP_TIMEOUT_SECONDS
+    while connections.empty():
+        if process.poll() is not None:
+            raise RuntimeError("QGIS test worker exited before connecting")
+        if time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("QGIS test worker did not start in time")
+        thread.join(WORKER_STARTUP_POLL_SECONDS)
+    return connections.get()
+
+
+def _accept_to_queue(
+    listener: Listener, connections: "queue.Queue[Connection]"
+) -> None:
+    # The listener is closed if the worker does not connect
+    with contextlib.suppress(OSError):
+        connections.put(listener.accept())
+
+
+class ControllerPlugin:
+    """Runs the tests of the session in isolated worker processes."""
+
+    def __init__(self, worker_count: int) -> None:
+        self._worker_count = worker_count
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session: "Session") -> bool:
+        if (
+            session.testsfailed
+            and not session.config.option.continue_on_collection_errors
+        ):
+            raise session.Interrupted(f"{session.testsfailed} errors during collection")
+        if session.config.option.collectonly:
+            return True
+        IsolatedRunner(session, self._worker_count).run()
+        return True
+
+
+class WorkerPlugin:
+    """Runs the tests requested by the controller until it asks to stop."""
+
+    def __init__(self, config: "Config") -> None:
+        self._config = config
+        self._connection: Optional[Connection] = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session: "Session") -> bool:
+        host, port = os.environ[ADDRESS_ENV].rsplit(":", 1)
+        self._connection = Client(
+            (host, int(port)), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV])
+        )
+        items_by_nodeid = {item.nodeid: item for item in session.items}
+        try:
+            while True:
+                message = self._connection.recv()
+                if message["type"] == "stop":
+                    break
+                item = items_by_nodeid[message["nodeid"]]
+                next_item = items_by_nodeid.get(message["next"])
+                item.config.hook.pytest_runtest_protocol(item=item, nextitem=next_item)
+                self._connection.send({"type": "finished"})
+        finally:
+            self._connection.close()
+            self._connection = None
+        return True
+
+    def pytest_runtest_logreport(self, report: TestReport) -> None:
+        if self._connection is not None:
+            self._connection.send(
+                {
+                    "type": "report",
+                    "report": self._config.hook.pytest_report_to_serializable(
+                        config=self._config, report=report
+                    ),
+                }
+            )
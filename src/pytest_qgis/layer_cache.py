@@ -0,0 +1,155 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from qgis.core import QgsMapLayer, QgsProject, QgsRasterLayer, QgsVectorLayer
+from qgis.PyQt import sip
+
+RASTER_PROVIDERS = ("gdal", "wms", "wcs", "virtualraster")
+
+# The option values are keyed by their repr, as they may be unhashable
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+# Initial state of the cached layer that is restored for each test
+_LayerState = namedtuple("_LayerState", ["name", "subset_string", "renderer"])
+
+
+class LayerCache:
+    """
+    Cache of opened layers by their uri, provider and layer options.
+
+    Opening a layer reads the schema and the extent of the data source,
+    which is repeated in every test that opens the same table. The cached
+    layers are reset to their initial state each time they are requested.
+
+    The cache owns the layers until the end of the session, so they are
+    skipped when the layers are handed to the project for cleaning.
+    """
+
+    def __init__(self) -> None:
+        self._layers: Dict[CacheKey, QgsMapLayer] = {}
+        self._states: Dict[CacheKey, _LayerState] = {}
+        self._layer_ids: Dict[str, CacheKey] = {}
+        self.opens = 0
+        self.reuses = 0
+
+    def get(
+        self,
+        uri: str,
+        name: str = "",
+        provider: str = "ogr",
+        options: Optional[Dict[str, Any]] = None,
+    ) -> QgsMapLayer:
+        """
+        Get the cached layer reset to its initial state, opening it
+        on the first request.
+
+        :param uri: Data source of the layer.
+        :param name: Name of the layer.
+        :param provider: Data provider key. Raster layers are created for
+            the raster providers, vector layers for the others.
+        :param options: Attributes of QgsVectorLayer.LayerOptions or
+            QgsRasterLayer.LayerOptions, such as loadDefaultStyle.
+        """
+        options = options or {}
+        key: CacheKey = (
+            uri,
+            provider,
+            tuple(sorted((option, repr(value)) for option, value in options.items())),
+        )
+        layer = self._layers.get(key)
+        if layer is None or sip.isdeleted(layer):
+            # Deleted if the test left the layer to the project
+            return self._open(key, name, options)
+        self.reuses += 1
+        self._reset(layer, self._states[key])
+        if layer.name() != name:
+            layer.setName(name)
+        return layer
+
+    def is_cached(self, layer: QgsMapLayer) -> bool:
+        return layer.id() in self._layer_ids
+
+    def release(self, layer: QgsMapLayer) -> None:
+        """Take the cached layer back from the project after a test."""
+        if sip.isdeleted(layer) or not self.is_cached(layer):
+            return
+        project = QgsProject.instance()
+        if project.mapLayer(layer.id()) is not None:
+            project.takeMapLayer(layer)
+
+    def take_layers(self) -> List[QgsMapLayer]:
+        """Empty the cache and return the layers that are still alive."""
+        layers = [layer for layer in self._layers.values() if not sip.isdeleted(layer)]
+        self._layers.clear()
+        self._states.clear()
+        self._layer_ids.clear()
+        return layers
+
+    def _open(self, key: CacheKey, name: str, options: Dict[str, Any]) -> QgsMapLayer:
+        uri, provider, _ = key
+        if provider in RASTER_PROVIDERS:
+            layer_options = QgsRasterLayer.LayerOptions()
+            for option, value in options.items():
+                setattr(layer_options, option, value)
+            layer: QgsMapLayer = QgsRasterLayer(uri, name, provider, layer_options)
+        else:
+            layer_options = QgsVectorLayer.LayerOptions()
+            for option, value in options.items():
+                setattr(layer_options, option, value)
+            layer = QgsVectorLayer(uri, name, provider, layer_options)
+        self.opens += 1
+        if not layer.isValid():
+            # Invalid layers are not cached so that the error is repeated
+            return layer
+
+        if key in self._layers:
+            self._layer_ids = {
+                layer_id: layer_key
+                for layer_id, layer_key in self._layer_ids.items()
+                if layer_key != key
+            }
+        self._layers[key] = layer
+        self._states[key] = _get_state(layer)
+        self._layer_ids[layer.id()] = key
+        return layer
+
+    @staticmethod
+    def _reset(layer: QgsMapLayer, state: _LayerState) -> None:
+        if layer.name() != state.name:
+            layer.setName(state.name)
+        if isinstance(layer, QgsVectorLayer):
+            if layer.isEditable():
+                layer.rollBack()
+            if layer.subsetString() != state.subset_string:
+                layer.setSubsetString(state.subset_string)
+            layer.removeSelection()
+        if state.renderer is not None:
+            layer.setRenderer(state.renderer.clone())
+
+
+def _get_state(layer: QgsMapLayer) -> _LayerState:
+    renderer = layer.renderer()
+    return _LayerState(
+        layer.name(),
+        layer.subsetString() if isinstance(layer, QgsVectorLayer) else "",
+        renderer.clone() if renderer is not None else None,
+    )
+
+
+LAYER_CACHE = LayerCache()
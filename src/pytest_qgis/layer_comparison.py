@@ -0,0 +1,393 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Order-insensitive comparison of vector layers.
+
+This requires NumPy, which is shipped with most QGIS installations.
+"""
+
+import hashlib
+import math
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qgis.core import QgsFeature, QgsFeatureRequest, QgsGeometry, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from pytest_qgis import utils
+
+HASH_BUCKETS = 1024
+HASH_SEED = 0x243F6A8885A308D3
+HASH_MULTIPLIER = 0x100000001B3
+NULL_HASH = 0x6A09E667F3BCC909
+DIFF_CANDIDATE_LIMIT = 10_000
+WKT_PREVIEW_LENGTH = 80
+
+_Record = namedtuple(
+    "_Record", ["feature_hash", "fid", "attribute_key", "attributes", "geometry"]
+)
+# Attribute hash and grid cell of the geometry
+_CellKey = Tuple[int, Optional[Tuple[int, int]]]
+
+
+class _LayerDigest:
+    """Sums and counts of the feature hashes in buckets."""
+
+    def __init__(self) -> None:
+        self.sums = np.zeros(HASH_BUCKETS, dtype=np.uint64)
+        self.counts = np.zeros(HASH_BUCKETS, dtype=np.int64)
+
+    def add(self, hashes: "np.ndarray") -> None:
+        buckets = (hashes % np.uint64(HASH_BUCKETS)).astype(np.intp)
+        # Sums wrap around on overflow, which keeps them order-insensitive
+        np.add.at(self.sums, buckets, hashes)
+        self.counts += np.bincount(buckets, minlength=HASH_BUCKETS)
+
+
+def assert_layers_equal(  # noqa: PLR0913
+    actual: QgsVectorLayer,
+    expected: QgsVectorLayer,
+    geometry_tolerance: float = 0.0,
+    ignore_fields: Sequence[str] = (),
+    max_diff: int = 10,
+    batch_size: int = utils.MEMORY_LAYER_BATCH_SIZE,
+) -> None:
+    """See pytest_qgis.utils.assert_layers_equal."""
+    if actual.crs() != expected.crs():
+        raise AssertionError(
+            f"CRS differs: {actual.crs().authid()} != {expected.crs().authid()}"
+        )
+    field_names = _get_compared_field_names(actual, expected, ignore_fields)
+
+    actual_digest = _digest(actual, field_names, geometry_tolerance, batch_size)
+    expected_digest = _digest(expected, field_names, geometry_tolerance, batch_size)
+    mismatched = (actual_digest.sums != expected_digest.sums) | (
+        actual_digest.counts != expected_digest.counts
+    )
+    if not mismatched.any():
+        return
+
+    # Second pass over the features in the differing buckets only
+    actual_records, actual_truncated = _collect_records(
+        actual, field_names, geometry_tolerance, mismatched, batch_size
+    )
+    expected_records, expected_truncated = _collect_records(
+        expected, field_names, geometry_tolerance, mismatched, batch_size
+    )
+    truncated = actual_truncated or expected_truncated
+    only_actual, only_expected = _match_records(actual_records, expected_records)
+    if geometry_tolerance > 0 and not truncated:
+        # Coordinates close to the grid lines may snap to different cells
+        only_actual, only_expected = _match_within_tolerance(
+            only_actual, only_expected, geometry_tolerance
+        )
+    if not only_actual and not only_expected:
+        return
+
+    raise AssertionError(
+        _format_diff(
+            only_actual,
+            only_expected,
+            int(actual_digest.counts.sum()),
+            int(expected_digest.counts.sum()),
+            truncated,
+            max_diff,
+        )
+    )
+
+
+def _get_compared_field_names(
+    actual: QgsVectorLayer, expected: QgsVectorLayer, ignore_fields: Sequence[str]
+) -> List[str]:
+    actual_names = set(actual.fields().names()).difference(ignore_fields)
+    expected_names = set(expected.fields().names()).difference(ignore_fields)
+    if actual_names != expected_names:
+        raise AssertionError(
+            "Fields differ: "
+            f"only in actual: {sorted(actual_names - expected_names)}, "
+            f"only in expected: {sorted(expected_names - actual_names)}"
+        )
+    # Sorted to compare the attributes regardless of the field order
+    return sorted(expected_names)
+
+
+def _iter_batches(
+    layer: QgsVectorLayer, field_names: List[str], batch_size: int
+) -> Iterator[List[QgsFeature]]:
+    request = QgsFeatureRequest().setSubsetOfAttributes(field_names, layer.fields())
+    return utils.iter_feature_batches(layer, request, batch_size)
+
+
+def _digest(
+    layer: QgsVectorLayer,
+    field_names: List[str],
+    geometry_tolerance: float,
+    batch_size: int,
+) -> _LayerDigest:
+    digest = _LayerDigest()
+    for batch in _iter_batches(layer, field_names, batch_size):
+        digest.add(_hash_batch(batch, field_names, geometry_tolerance)[0])
+    return digest
+
+
+def _collect_records(
+    layer: QgsVectorLayer,
+    field_names: List[str],
+    geometry_tolerance: float,
+    mismatched: "np.ndarray",
+    batch_size: int,
+) -> Tuple[List[_Record], bool]:
+    """Features in the mismatched buckets, and whether the limit was reached."""
+    records: List[_Record] = []
+    for batch in _iter_batches(layer, field_names, batch_size):
+        hashes, attribute_hashes = _hash_batch(batch, field_names, geometry_tolerance)
+        buckets = (hashes % np.uint64(HASH_BUCKETS)).astype(np.intp)
+        for index in np.flatnonzero(mismatched[buckets]).tolist():
+            if len(records) >= DIFF_CANDIDATE_LIMIT:
+                return records, True
+            feature = batch[index]
+            records.append(
+                _Record(
+                    int(hashes[index]),
+                    feature.id(),
+                    int(attribute_hashes[index]),
+                    {name: _normalize_attribute(feature[name]) for name in field_names},
+                    QgsGeometry(feature.geometry()),
+                )
+            )
+    return records, False
+
+
+def _hash_batch(
+    batch: List[QgsFeature], field_names: List[str], geometry_tolerance: float
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """64-bit hashes of the features and of their attributes."""
+    with np.errstate(over="ignore"):
+        attribute_hashes = np.full(len(batch), HASH_SEED, dtype=np.uint64)
+        for name in field_names:
+            column_hashes = _hash_column(
+                [_normalize_attribute(feature[name]) for feature in batch]
+            )
+            attribute_hashes = _mix(
+                attribute_hashes * np.uint64(HASH_MULTIPLIER) + column_hashes
+            )
+        geometry_hashes = _hash_wkbs(
+            [_get_wkb(feature, geometry_tolerance) for feature in batch]
+        )
+        return _mix(attribute_hashes ^ geometry_hashes), attribute_hashes
+
+
+def _hash_column(values: List[Any]) -> "np.ndarray":
+    """
+    Hashes of the attribute values. Numbers are hashed by their float value,
+    so that equal values of different types, such as 1 and 1.0, match.
+    """
+    count = len(values)
+    is_null = np.fromiter((value is None for value in values), bool, count)
+    is_number = np.fromiter(
+        (isinstance(value, (bool, int, float)) for value in values), bool, count
+    )
+    hashes = np.full(count, NULL_HASH, dtype=np.uint64)
+
+    # Adding zero turns -0.0 to 0.0
+    numbers = (
+        np.array(
+            [
+                float(value) if number else 0.0
+                for value, number in zip(values, is_number)
+            ],
+            dtype=np.float64,
+        )
+        + 0.0
+    )
+    numbers[np.isnan(numbers)] = np.nan
+    hashes[is_number] = _mix(numbers.view(np.uint64)[is_number])
+
+    others = np.flatnonzero(~is_number & ~is_null)
+    if others.size:
+        texts = np.array([_to_text(values[index]) for index in others], dtype=object)
+        # Each distinct value is hashed once
+        unique_texts, inverse = np.unique(texts, return_inverse=True)
+        unique_hashes = np.fromiter(
+            (_hash_bytes(text.encode("utf-8")) for text in unique_texts),
+            dtype=np.uint64,
+            count=len(unique_texts),
+        )
+        hashes[others] = unique_hashes[inverse]
+    return hashes
+
+
+def _hash_wkbs(wkbs: List[bytes]) -> "np.ndarray":
+    """Hashes of the WKB of the features."""
+    return np.fromiter(map(_hash_bytes, wkbs), dtype=np.uint64, count=len(wkbs))
+
+
+def _mix(values: "np.ndarray") -> "np.ndarray":
+    """Finalizer of SplitMix64 for spreading the bits of the hashes."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _hash_bytes(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _get_wkb(feature: QgsFeature, geometry_tolerance: float) -> bytes:
+    if not feature.hasGeometry():
+        return b""
+    geometry = feature.geometry()
+    if geometry_tolerance > 0:
+        geometry = geometry.snappedToGrid(geometry_tolerance, geometry_tolerance)
+    return bytes(geometry.asWkb())
+
+
+def _to_text(value: Any) -> str:
+    # Prefixed so that a string does not match the repr of another value
+    if isinstance(value, str):
+        return f"s:{value}"
+    return f"r:{value!r}"
+
+
+def _normalize_attribute(value: Any) -> Any:
+    # NULL is an invalid QVariant in older QGIS versions
+    if isinstance(value, QVariant) and value.isNull():
+        return None
+    return value
+
+
+def _match_records(
+    actual_records: List[_Record], expected_records: List[_Record]
+) -> Tuple[List[_Record], List[_Record]]:
+    expected_by_hash: Dict[int, List[_Record]] = {}
+    for record in expected_records:
+        expected_by_hash.setdefault(record.feature_hash, []).append(record)
+    only_actual = []
+    for record in actual_records:
+        candidates = expected_by_hash.get(record.feature_hash)
+        if candidates:
+            candidates.pop()
+        else:
+            only_actual.append(record)
+    only_expected = [
+        record for records in expected_by_hash.values() for record in records
+    ]
+    return only_actual, only_expected
+
+
+def _match_within_tolerance(
+    only_actual: List[_Record], only_expected: List[_Record], tolerance: float
+) -> Tuple[List[_Record], List[_Record]]:
+    """
+    Match the records whose geometries are within the tolerance. The expected
+    records are bucketed by their attributes and the grid cell of their
+    bounding box center, so each record is compared only to the records in
+    the neighboring cells.
+    """
+    expected_by_cell: Dict[_CellKey, List[_Record]] = {}
+    for record in only_expected:
+        key = (record.attribute_key, _get_cell(record.geometry, tolerance))
+        expected_by_cell.setdefault(key, []).append(record)
+    unmatched_actual = []
+    for record in only_actual:
+        if not _remove_match(record, expected_by_cell, tolerance):
+            unmatched_actual.append(record)
+    unmatched_expected = [
+        record for records in expected_by_cell.values() for record in records
+    ]
+    return unmatched_actual, unmatched_expected
+
+
+def _remove_match(
+    record: _Record, expected_by_cell: Dict[_CellKey, List[_Record]], tolerance: float
+) -> bool:
+    cell = _get_cell(record.geometry, tolerance)
+    # The centers of the bounding boxes within the tolerance are at most one
+    # cell apart
+    cells = (
+        [None]
+        if cell is None
+        else [
+            (cell[0] + column, cell[1] + row)
+            for column in (-1, 0, 1)
+            for row in (-1, 0, 1)
+        ]
+    )
+    for neighbor in cells:
+        candidates = expected_by_cell.get((record.attribute_key, neighbor), [])
+        for candidate in candidates:
+            if _geometries_within_tolerance(
+                record.geometry, candidate.geometry, tolerance
+            ):
+                candidates.remove(candidate)
+                return True
+    return False
+
+
+def _get_cell(geometry: QgsGeometry, tolerance: float) -> Optional[Tuple[int, int]]:
+    if geometry.isNull() or geometry.isEmpty():
+        return None
+    center = geometry.boundingBox().center()
+    return math.floor(center.x() / tolerance), math.floor(center.y() / tolerance)
+
+
+def _geometries_within_tolerance(
+    first: QgsGeometry, second: QgsGeometry, tolerance: float
+) -> bool:
+    if first.isNull() or second.isNull():
+        return first.isNull() and second.isNull()
+    return (
+        first.wkbType() == second.wkbType()
+        and first.hausdorffDistance(second) <= tolerance
+    )
+
+
+def _format_diff(  # noqa: PLR0913
+    only_actual: List[_Record],
+    only_expected: List[_Record],
+    actual_count: int,
+    expected_count: int,
+    truncated: bool,
+    max_diff: int,
+) -> str:
+    at_least = "at least " if truncated else ""
+    lines = [
+        f"Layers are not equal ({actual_count} and {expected_count} features): "
+        f"{at_least}{len(only_actual)} features only in actual, "
+        f"{at_least}{len(only_expected)} features only in expected"
+    ]
+    for title, records in (
+        ("Only in actual:", only_actual),
+        ("Only in expected:", only_expected),
+    ):
+        if not records:
+            continue
+        lines.append(title)
+        lines.extend(_format_record(record) for record in records[:max_diff])
+        if len(records) > max_diff:
+            lines.append(f"  ... and {len(records) - max_diff} more")
+    return "\n".join(lines)
+
+
+def _format_record(record: _Record) -> str:
+    wkt = record.geometry.asWkt() if not record.geometry.isNull() else "no geometry"
+    if len(wkt) > WKT_PREVIEW_LENGTH:
+        wkt = f"{wkt[:WKT_PREVIEW_LENGTH]}..."
+    return f"  fid {record.fid}: {record.attributes} {wkt}"
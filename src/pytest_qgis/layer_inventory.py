@@ -0,0 +1,354 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import time
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeatureRequest,
+    QgsMapLayer,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorDataProvider,
+    QgsVectorLayer,
+)
+from qgis.PyQt import sip
+
+EXTENT_SAMPLE_SIZE = 1000
+# OGR formats whose layer extent is stored and not computed by a full scan
+STORED_EXTENT_STORAGE_TYPES = (
+    "GPKG",
+    "ESRI Shapefile",
+    "FlatGeobuf",
+    "OpenFileGDB",
+    "FileGDB",
+)
+
+
+class ExtentStatistics:
+    """Number of the layer extents computed and the time spent on them."""
+
+    def __init__(self) -> None:
+        self.exact = 0
+        self.estimated = 0
+        self.time = 0.0
+
+
+EXTENT_STATISTICS = ExtentStatistics()
+
+
+def estimate_layer_extent(
+    layer: QgsMapLayer,
+) -> Optional[Tuple[QgsRectangle, QgsCoordinateReferenceSystem]]:
+    """
+    Estimate the extent of the layer without a full scan of the data source.
+
+    Returns None for layers whose exact extent is cheap, such as rasters,
+    memory layers and formats with stored extents. Otherwise the first
+    spatial extent of the layer metadata is used if there is one, and as the
+    last resort the bounding box of a sample of the features. The sample is
+    taken at even intervals of the feature ids, assuming they are sequential,
+    and the first features are used if the ids are not.
+
+    :return: Estimated extent and its CRS, or None if the exact extent is cheap.
+    """
+    if not isinstance(layer, QgsVectorLayer):
+        return None
+    provider = layer.dataProvider()
+    if layer.providerType() == "memory" or (
+        layer.providerType() == "ogr"
+        and provider.storageType() in STORED_EXTENT_STORAGE_TYPES
+    ):
+        return None
+
+    for spatial_extent in layer.metadata().extent().spatialExtents():
+        bounds = spatial_extent.bounds.toRectangle()
+        if not bounds.isEmpty():
+            crs = spatial_extent.extentCrs
+            return bounds, crs if crs.isValid() else layer.crs()
+
+    extent = _get_features_extent(provider, _get_sample_request(provider))
+    if extent is None:
+        extent = _get_features_extent(
+            provider, QgsFeatureRequest().setLimit(EXTENT_SAMPLE_SIZE)
+        )
+    if extent is None:
+        return None
+    return extent, layer.crs()
+
+
+def _get_sample_request(
+    provider: QgsVectorDataProvider,
+) -> Optional[QgsFeatureRequest]:
+    """Request of the features at even intervals of sequential feature ids."""
+    feature_count = provider.featureCount()
+    if feature_count <= EXTENT_SAMPLE_SIZE:
+        # Also the unknown count of -1
+        return None
+    first_feature = next(
+        provider.getFeatures(
+            QgsFeatureRequest()
+            .setLimit(1)
+            .setNoAttributes()
+            .setFlags(QgsFeatureRequest.NoGeometry)
+        ),
+        None,
+    )
+    if first_feature is None:
+        return None
+    first_id = first_feature.id()
+    step = feature_count / EXTENT_SAMPLE_SIZE
+    return QgsFeatureRequest().setFilterFids(
+        [first_id + int(index * step) for index in range(EXTENT_SAMPLE_SIZE)]
+    )
+
+
+def _get_features_extent(
+    provider: QgsVectorDataProvider, request: Optional[QgsFeatureRequest]
+) -> Optional[QgsRectangle]:
+    if request is None:
+        return None
+    extent = None
+    for feature in provider.getFeatures(request.setNoAttributes()):
+        if not feature.hasGeometry():
+            continue
+        bounding_box = feature.geometry().boundingBox()
+        if extent is None:
+            extent = QgsRectangle(bounding_box)
+        else:
+            extent.combineExtentWith(bounding_box)
+    return extent
+
+
+class LayerInventory:
+    """
+    Inventory of the project layers grouped by their CRS.
+
+    The inventory follows the layer signals of the project and the CRS
+    signals of the layers, so the CRS queries do not iterate the layers.
+    The exact and estimated extents transformed to the project CRS are cached
+    per layer until the data, the CRS or the rendering of the layer or the
+    CRS of the project changes, so the common extent only combines the cached
+    extents. The layers are grouped by the authid of their CRS, and by the
+    WKT only if the CRS has no authid.
+    """
+
+    def __init__(self, project: QgsProject) -> None:
+        self._project = project
+        self._layers: Dict[str, QgsMapLayer] = {}
+        self._crs_slots: Dict[str, Callable[[], None]] = {}
+        self._extent_slots: Dict[str, Callable[[], None]] = {}
+        # CRS key -> CRS and ids of its layers
+        self._crs_groups: Dict[str, Tuple[QgsCoordinateReferenceSystem, Set[str]]] = {}
+        self._layer_crs_keys: Dict[str, str] = {}
+        # Authid -> ids of the spatial layers
+        self._authid_layers: Dict[str, Set[str]] = {}
+        self._layer_authids: Dict[str, str] = {}
+        self._extents: Dict[str, QgsRectangle] = {}
+        self._estimated_extents: Dict[str, Optional[QgsRectangle]] = {}
+        self._transforms: Dict[str, QgsCoordinateTransform] = {}
+
+        project.layersAdded.connect(self._layers_added)
+        project.layersWillBeRemoved.connect(self._layers_will_be_removed)
+        project.crsChanged.connect(self._project_crs_changed)
+        project.transformContextChanged.connect(self._project_crs_changed)
+        self._layers_added(list(project.mapLayers().values()))
+
+    def close(self) -> None:
+        self._project.layersAdded.disconnect(self._layers_added)
+        self._project.layersWillBeRemoved.disconnect(self._layers_will_be_removed)
+        self._project.crsChanged.disconnect(self._project_crs_changed)
+        self._project.transformContextChanged.disconnect(self._project_crs_changed)
+        self._layers_will_be_removed(list(self._layers))
+
+    def most_common_authid(self) -> Optional[str]:
+        """
+        Authid of the most spatial layers. Ties are resolved by the order of
+        the layer ids, like in the iteration order of QgsProject.mapLayers.
+        """
+        if not self._authid_layers:
+            return None
+        return min(
+            self._authid_layers.items(),
+            key=lambda item: (-len(item[1]), min(item[1])),
+        )[0]
+
+    def layers_with_different_crs(self) -> List[QgsMapLayer]:
+        """Layers whose CRS differs from the project CRS."""
+        map_crs = self._project.crs()
+        layer_ids = set()
+        for crs, group_layer_ids in self._crs_groups.values():
+            if crs != map_crs:
+                layer_ids.update(group_layer_ids)
+        return [self._layers[layer_id] for layer_id in sorted(layer_ids)]
+
+    def common_extent(self, estimated: bool = False) -> Optional[QgsRectangle]:
+        """
+        Combined extent of the valid layers in the project CRS.
+
+        :param estimated: Whether to estimate the extents of the layers whose
+            exact extent may need a full scan of the data source.
+        """
+        extent = None
+        for layer_id in sorted(self._layers):
+            layer = self._layers[layer_id]
+            if not layer.isValid():
+                continue
+            start = time.perf_counter()
+            layer_extent = None
+            if estimated:
+                layer_extent = self._get_estimated_extent(layer)
+            if layer_extent is None:
+                layer_extent = self._get_extent(layer)
+                EXTENT_STATISTICS.exact += 1
+            else:
+                EXTENT_STATISTICS.estimated += 1
+            EXTENT_STATISTICS.time += time.perf_counter() - start
+            if extent is None:
+                extent = QgsRectangle(layer_extent)
+            else:
+                extent.combineExtentWith(layer_extent)
+        return extent
+
+    def _get_extent(self, layer: QgsMapLayer) -> QgsRectangle:
+        extent = self._extents.get(layer.id())
+        if extent is None:
+            extent = self._transform(layer.extent(), layer.crs())
+            self._extents[layer.id()] = extent
+        return extent
+
+    def _get_estimated_extent(self, layer: QgsMapLayer) -> Optional[QgsRectangle]:
+        if layer.id() in self._estimated_extents:
+            return self._estimated_extents[layer.id()]
+
+        estimate = estimate_layer_extent(layer)
+        extent = self._transform(*estimate) if estimate is not None else None
+        self._estimated_extents[layer.id()] = extent
+        return extent
+
+    def _transform(
+        self, extent: QgsRectangle, crs: QgsCoordinateReferenceSystem
+    ) -> QgsRectangle:
+        map_crs = self._project.crs()
+        if crs == map_crs:
+            return QgsRectangle(extent)
+        crs_key = _get_crs_key(crs)
+        transform = self._transforms.get(crs_key)
+        if transform is None:
+            transform = QgsCoordinateTransform(
+                QgsCoordinateReferenceSystem(crs),
+                QgsCoordinateReferenceSystem(map_crs),
+                self._project,
+            )
+            self._transforms[crs_key] = transform
+        return transform.transformBoundingBox(extent)
+
+    def _layers_added(self, layers: Iterable[QgsMapLayer]) -> None:
+        for layer in layers:
+            layer_id = layer.id()
+            if layer_id in self._layers:
+                continue
+            self._layers[layer_id] = layer
+            slot = partial(self._layer_crs_changed, layer_id)
+            self._crs_slots[layer_id] = slot
+            layer.crsChanged.connect(slot)
+            extent_slot = partial(self._layer_extent_changed, layer_id)
+            self._extent_slots[layer_id] = extent_slot
+            layer.dataChanged.connect(extent_slot)
+            layer.repaintRequested.connect(extent_slot)
+            self._add_crs(layer)
+
+    def _layers_will_be_removed(self, layer_ids: Iterable[str]) -> None:
+        for layer_id in layer_ids:
+            layer = self._layers.pop(layer_id, None)
+            if layer is None:
+                continue
+            slot = self._crs_slots.pop(layer_id)
+            extent_slot = self._extent_slots.pop(layer_id)
+            if not sip.isdeleted(layer):
+                layer.crsChanged.disconnect(slot)
+                layer.dataChanged.disconnect(extent_slot)
+                layer.repaintRequested.disconnect(extent_slot)
+            self._remove_crs(layer_id)
+
+    def _layer_crs_changed(self, layer_id: str) -> None:
+        layer = self._layers.get(layer_id)
+        if layer is None:
+            return
+        self._remove_crs(layer_id)
+        self._add_crs(layer)
+
+    def _layer_extent_changed(self, layer_id: str) -> None:
+        self._extents.pop(layer_id, None)
+        self._estimated_extents.pop(layer_id, None)
+
+    def _project_crs_changed(self) -> None:
+        self._extents.clear()
+        self._estimated_extents.clear()
+        self._transforms.clear()
+
+    def _add_crs(self, layer: QgsMapLayer) -> None:
+        layer_id = layer.id()
+        crs = layer.crs()
+        crs_key = _get_crs_key(crs)
+        self._crs_groups.setdefault(crs_key, (crs, set()))[1].add(layer_id)
+        self._layer_crs_keys[layer_id] = crs_key
+        if layer.isSpatial():
+            authid = crs.authid()
+            self._authid_layers.setdefault(authid, set()).add(layer_id)
+            self._layer_authids[layer_id] = authid
+
+    def _remove_crs(self, layer_id: str) -> None:
+        self._extents.pop(layer_id, None)
+        self._estimated_extents.pop(layer_id, None)
+        crs_key = self._layer_crs_keys.pop(layer_id)
+        layer_ids = self._crs_groups[crs_key][1]
+        layer_ids.discard(layer_id)
+        if not layer_ids:
+            del self._crs_groups[crs_key]
+        authid = self._layer_authids.pop(layer_id, None)
+        if authid is not None:
+            authid_layer_ids = self._authid_layers[authid]
+            authid_layer_ids.discard(layer_id)
+            if not authid_layer_ids:
+                del self._authid_layers[authid]
+
+
+def _get_crs_key(crs: QgsCoordinateReferenceSystem) -> str:
+    """Authid of the CRS, or the WKT of a custom CRS without an authid."""
+    return crs.authid() or crs.toWkt()
+
+
+_LAYER_INVENTORY: Optional[LayerInventory] = None
+
+
+def get_layer_inventory() -> LayerInventory:
+    """Inventory of QgsProject.instance(), created on the first call."""
+    global _LAYER_INVENTORY  # noqa: PLW0603
+    if _LAYER_INVENTORY is None:
+        _LAYER_INVENTORY = LayerInventory(QgsProject.instance())
+    return _LAYER_INVENTORY
+
+
+def close_layer_inventory() -> None:
+    global _LAYER_INVENTORY  # noqa: PLW0603
+    if _LAYER_INVENTORY is not None:
+        _LAYER_INVENTORY.close()
+        _LAYER_INVENTORY = None
@@ -0,0 +1,170 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import gc
+import json
+import os
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from qgis.core import Qgis, QgsMapLayer, QgsProject
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QObject
+
+from pytest_qgis.layer_cache import LAYER_CACHE
+
+Resources = namedtuple(
+    "Resources",
+    [
+        "map_layers",
+        "parent_children",
+        "canvas_children",
+        "project_layers",
+        "rss_kb",
+        "gc_objects",
+    ],
+)
+LeakThresholds = namedtuple(
+    "LeakThresholds", ["map_layers", "qobjects", "rss_kb", "gc_objects"]
+)
+
+
+class LeakDetector:
+    """
+    Measures the resources left behind by each test.
+
+    The measurement starts when the test is called and ends after its
+    teardown, so the setups of the fixtures shared by several tests are not
+    charged to the first test using them.
+
+    The live QgsMapLayer count only includes layers that have a Python
+    wrapper, excluding the layers of the layer cache. The layers owned by
+    the project are counted separately.
+    """
+
+    def __init__(
+        self,
+        parent: Optional[QObject],
+        canvas: Optional[QObject],
+        thresholds: LeakThresholds,
+    ) -> None:
+        self._parent = parent
+        self._canvas = canvas
+        self.thresholds = thresholds
+        self.deltas: Dict[str, Resources] = {}
+        self._before: Optional[Resources] = None
+
+    def start(self) -> None:
+        self._before = self.measure()
+
+    def is_measuring(self) -> bool:
+        return self._before is not None
+
+    def stop(self, nodeid: str) -> Resources:
+        assert self._before is not None
+        after = self.measure()
+        delta = Resources(
+            *(
+                (a - b) if a is not None and b is not None else None
+                for a, b in zip(after, self._before)
+            )
+        )
+        self.deltas[nodeid] = delta
+        self._before = None
+        return delta
+
+    def measure(self) -> Resources:
+        gc.collect()
+        objects = gc.get_objects()
+        return Resources(
+            sum(
+                1
+                for obj in objects
+                # type() is used to skip mocked layers
+                if issubclass(type(obj), QgsMapLayer)
+                and not sip.isdeleted(obj)
+                and not LAYER_CACHE.is_cached(obj)
+            ),
+            _count_children(self._parent),
+            _count_children(self._canvas),
+            len(QgsProject.instance().mapLayers()),
+            get_rss_kb(),
+            len(objects),
+        )
+
+    def is_leaking(self, delta: Resources) -> bool:
+        thresholds = self.thresholds
+        # The canvas is a child of the parent so its children are included
+        return (
+            delta.map_layers > thresholds.map_layers
+            or delta.project_layers > thresholds.map_layers
+            or delta.parent_children > thresholds.qobjects
+            or (delta.rss_kb is not None and delta.rss_kb > thresholds.rss_kb)
+            or delta.gc_objects > thresholds.gc_objects
+        )
+
+    def leaking_tests(self) -> Dict[str, Resources]:
+        return {
+            nodeid: delta
+            for nodeid, delta in self.deltas.items()
+            if self.is_leaking(delta)
+        }
+
+    def save_report(self, path: Path) -> None:
+        """Save the deltas of all tests as compact JSON for trend tracking."""
+        data = {
+            "qgis_version": Qgis.QGIS_VERSION,
+            "thresholds": self.thresholds._asdict(),
+            "columns": ["nodeid", *Resources._fields],
+            "tests": [[nodeid, *delta] for nodeid, delta in self.deltas.items()],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+
+
+def get_rss_kb() -> Optional[int]:
+    """Resident set size of the process in kilobytes if it can be measured."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss // 1024
+
+
+def _count_children(obj: Optional[QObject]) -> int:
+    if obj is None or sip.isdeleted(obj):
+        return 0
+    return len(obj.findChildren(QObject))
+
+
+def format_delta(delta: Resources) -> str:
+    parts: List[str] = [
+        f"map layers {delta.map_layers:+d}",
+        f"project layers {delta.project_layers:+d}",
+        f"QObjects {delta.parent_children:+d} (canvas {delta.canvas_children:+d})",
+        f"gc objects {delta.gc_objects:+d}",
+    ]
+    if delta.rss_kb is not None:
+        parts.append(f"RSS {delta.rss_kb:+d} kB")
+    return ", ".join(parts)
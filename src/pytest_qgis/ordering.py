@@ -0,0 +1,280 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from collections import namedtuple
+from itertools import groupby
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import pytest
+
+if TYPE_CHECKING:
+    from _pytest.fixtures import FixtureDef
+    from _pytest.nodes import Node
+
+EXPENSIVE_FIXTURES = ("qgis_processing",)
+
+# The positions are the 1-based positions of the first test using an
+# expensive fixture, or None if no test uses them
+OrderingResult = namedtuple(
+    "OrderingResult",
+    [
+        "setups_before",
+        "setups_after",
+        "expensive_position_before",
+        "expensive_position_after",
+        "item_count",
+    ],
+)
+
+# A setup of a fixture or a marker. The instance identifies the scope and the
+# parameter of a fixture or the arguments of a marker. Kept setups stay in
+# place for the following items that do not use them.
+Setup = namedtuple("Setup", ["name", "instance", "kept"])
+
+SetupKey = FrozenSet[Setup]
+
+
+def get_setup_key(item: pytest.Item, marker_names: Sequence[str]) -> SetupKey:
+    """
+    Setups of the expensive QGIS fixtures, the higher-scoped layer fixtures
+    and the QGIS markers with their arguments used by the item.
+
+    The fixtures are cached by pytest for their scope, so they are kept
+    until the scope or the parameter changes. The markers are applied for
+    the item only.
+    """
+    key = set()
+    fixtureinfo = getattr(item, "_fixtureinfo", None)
+    if fixtureinfo is not None:
+        fixture_names = set(getattr(item, "fixturenames", ()))
+        for name in {
+            *(name for name in EXPENSIVE_FIXTURES if name in fixture_names),
+            *getattr(item, "_qgis_layer_fixtures", ()),
+        }:
+            fixturedefs = fixtureinfo.name2fixturedefs.get(name)
+            if fixturedefs and fixturedefs[-1].scope != "function":
+                key.add(Setup(name, _get_fixture_instance(item, fixturedefs[-1]), True))
+
+    for marker_name in marker_names:
+        marker = item.get_closest_marker(marker_name)
+        if marker is not None:
+            arguments = ", ".join(
+                [
+                    *map(repr, marker.args),
+                    *(
+                        f"{name}={value!r}"
+                        for name, value in sorted(marker.kwargs.items())
+                    ),
+                ]
+            )
+            key.add(Setup(marker_name, arguments, False))
+    return frozenset(key)
+
+
+def count_setups(keys: Sequence[SetupKey]) -> int:
+    """
+    Number of times the setups of the keys are done when the items run in
+    the given order. A setup is done again when an item needs another
+    instance of it, or when a setup that is not kept was torn down by an
+    item that did not need it.
+    """
+    setups = 0
+    active: Dict[str, Tuple[str, bool]] = {}
+    for key in keys:
+        names = {setup.name for setup in key}
+        active = {
+            name: (instance, kept)
+            for name, (instance, kept) in active.items()
+            if kept or name in names
+        }
+        for setup in key:
+            if active.get(setup.name, (None,))[0] != setup.instance:
+                setups += 1
+                active[setup.name] = (setup.instance, setup.kept)
+    return setups
+
+
+def reorder_items(
+    items: List[pytest.Item], get_key: Callable[[pytest.Item], SetupKey]
+) -> OrderingResult:
+    """
+    Reorder the items in place so that the items using the same setups that
+    are not kept, i.e. the same marker arguments, run one after another, and
+    the modules using the expensive session-scoped fixtures run last.
+
+    The items are reordered only within their module and the items of a
+    class are kept together, so the module and class scoped fixtures are
+    not set up more often than before. The items without such setups run
+    first. Modules with higher-scoped parametrized fixtures are left as they
+    are, since pytest has already ordered them by the parameters.
+
+    The modules using the expensive fixtures are moved after the other
+    modules of the same package, so that the tests before them do not wait
+    for the initialization. The modules are not moved if some item has
+    session or package scoped parameters.
+    """
+    keys: Dict[str, SetupKey] = {item.nodeid: get_key(item) for item in items}
+    setups_before = count_setups([keys[item.nodeid] for item in items])
+    expensive_position_before = _get_expensive_position(items)
+
+    modules: List[List[pytest.Item]] = []
+    for module_items in _split_by_module(items):
+        if any(_has_higher_scoped_parameters(item) for item in module_items):
+            modules.append(module_items)
+            continue
+        reordered: List[pytest.Item] = []
+        units = _split_by_class(module_items)
+        # The kept setups are done once per module or class whatever the order
+        unit_keys = [
+            sorted(
+                {
+                    (setup.name, setup.instance)
+                    for item in unit
+                    for setup in keys[item.nodeid]
+                    if not setup.kept
+                }
+            )
+            for unit in units
+        ]
+        order = sorted(
+            range(len(units)),
+            key=lambda index: (len(unit_keys[index]) > 0, unit_keys[index]),
+        )
+        for index in order:
+            reordered.extend(units[index])
+        modules.append(reordered)
+
+    if not any(
+        _has_higher_scoped_parameters(item, ("session", "package")) for item in items
+    ):
+        modules = _move_expensive_modules_last(modules)
+    items[:] = [item for module_items in modules for item in module_items]
+    return OrderingResult(
+        setups_before,
+        count_setups([keys[item.nodeid] for item in items]),
+        expensive_position_before,
+        _get_expensive_position(items),
+        len(items),
+    )
+
+
+def _uses_expensive_fixtures(item: pytest.Item) -> bool:
+    fixture_names = getattr(item, "fixturenames", ())
+    return any(name in fixture_names for name in EXPENSIVE_FIXTURES)
+
+
+def _get_expensive_position(items: List[pytest.Item]) -> Optional[int]:
+    return next(
+        (
+            position
+            for position, item in enumerate(items, 1)
+            if _uses_expensive_fixtures(item)
+        ),
+        None,
+    )
+
+
+def _move_expensive_modules_last(
+    modules: List[List[pytest.Item]],
+) -> List[List[pytest.Item]]:
+    """
+    Move the modules using the expensive fixtures after the other modules of
+    their package, so that the package scoped fixtures are not set up again.
+    """
+    moved: List[List[pytest.Item]] = []
+    for _, package_modules in groupby(
+        modules, key=lambda module_items: _get_package(module_items[0])
+    ):
+        moved.extend(
+            sorted(
+                package_modules,
+                key=lambda module_items: any(
+                    map(_uses_expensive_fixtures, module_items)
+                ),
+            )
+        )
+    return moved
+
+
+def _get_package(item: pytest.Item) -> Optional["Node"]:
+    """Parent of the module of the item, a package or a directory."""
+    module = item.getparent(pytest.Module)
+    return module.parent if module is not None else None
+
+
+def _get_fixture_instance(item: pytest.Item, fixturedef: "FixtureDef") -> str:
+    """Node id of the scope of the fixture for the item, with its parameter."""
+    scope = fixturedef.scope
+    node = None
+    if scope == "class":
+        node = item.getparent(pytest.Class) or item.getparent(pytest.Module)
+    elif scope == "module":
+        node = item.getparent(pytest.Module)
+    # Session and package scoped fixtures are cached per definition
+    instance = node.nodeid if node is not None else fixturedef.baseid
+    callspec = getattr(item, "callspec", None)
+    if callspec is not None and fixturedef.argname in callspec.params:
+        instance += f"[{callspec.indices[fixturedef.argname]}]"
+    return instance
+
+
+def _split_by_module(items: List[pytest.Item]) -> List[List[pytest.Item]]:
+    """Consecutive items of the same module."""
+    groups: List[List[pytest.Item]] = []
+    for item in items:
+        module = item.getparent(pytest.Module)
+        if groups and groups[-1][0].getparent(pytest.Module) is module:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+    return groups
+
+
+def _split_by_class(items: List[pytest.Item]) -> List[List[pytest.Item]]:
+    """Consecutive items of the same class, and other items one by one."""
+    groups: List[List[pytest.Item]] = []
+    for item in items:
+        cls = item.getparent(pytest.Class)
+        if cls is not None and groups and groups[-1][0].getparent(pytest.Class) is cls:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+    return groups
+
+
+def _has_higher_scoped_parameters(
+    item: pytest.Item, scopes: Sequence[str] = ("class", "module", "package", "session")
+) -> bool:
+    callspec = getattr(item, "callspec", None)
+    fixtureinfo = getattr(item, "_fixtureinfo", None)
+    if callspec is None or fixtureinfo is None:
+        return False
+    name2fixturedefs = fixtureinfo.name2fixturedefs
+    for name in callspec.params:
+        fixturedefs = name2fixturedefs.get(name)
+        if fixturedefs and fixturedefs[-1].scope in scopes:
+            return True
+    return False
@@ -0,0 +1,371 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsMapLayer,
+    QgsProcessingAlgorithm,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterRasterDestination,
+    QgsProcessingParameterVectorDestination,
+    QgsProcessingUtils,
+    QgsProject,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+
+from pytest_qgis import utils
+
+TEMPORARY_OUTPUTS = ("TEMPORARY_OUTPUT", "memory:")
+RESULTS_FILE = "results.json"
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+KEY_FORMAT_VERSION = 3
+# SQLite journal files of GeoPackages holding changes not yet in the file
+SIDECAR_SUFFIXES = ("-wal", "-shm")
+
+
+class ProcessingCache:
+    """
+    Cache of processing.run results stored on disk.
+
+    The results are keyed by the QGIS version, the algorithm id and the
+    version of its provider, the normalized parameters and the content
+    fingerprints of the input layers and files. The layer outputs
+    are written to the cache directory, so only algorithms whose destinations
+    are temporary outputs are cached. The least recently used results are
+    evicted when the size of the cache exceeds the limit.
+    """
+
+    def __init__(self, directory: Path, max_size_bytes: int) -> None:
+        self._directory = directory
+        self._max_size_bytes = max_size_bytes
+        # (path, mtime, size) -> fingerprint
+        self._fingerprints: Dict[Tuple[str, int, int], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def run(
+        self,
+        algorithm_id: str,
+        parameters: Dict[str, Any],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Run the algorithm with processing.run or get its results from the cache.
+
+        Like with processing.run, the temporary layer outputs are returned as
+        layers. Outputs requested as "memory:" are memory layers and other
+        temporary outputs are layers of copies of the files in the cache, so
+        that the cached files are never opened or edited by the callers.
+
+        :param algorithm_id: Id of the processing algorithm.
+        :param parameters: Parameters of the algorithm.
+        :param kwargs: Other arguments of processing.run, such as context.
+        :return: Results of the algorithm.
+        """
+        import processing
+
+        algorithm = QgsApplication.processingRegistry().algorithmById(algorithm_id)
+        if algorithm is None:
+            raise ValueError(f"Algorithm {algorithm_id} not found")
+        destinations = _get_cacheable_destinations(algorithm, parameters)
+        if destinations is None:
+            self.bypasses += 1
+            return processing.run(algorithm_id, parameters, **kwargs)
+
+        key = self._get_key(algorithm, parameters, destinations)
+        entry = self._directory / key
+        results_file = entry / RESULTS_FILE
+        if results_file.exists():
+            self.hits += 1
+            # Modification time of the results file is used for LRU eviction
+            os.utime(results_file)
+            return _load_results(entry, parameters, destinations)
+
+        self.misses += 1
+        temporary_entry = self._directory / f"{key}.{uuid.uuid4().hex}.tmp"
+        temporary_entry.mkdir(parents=True)
+        try:
+            redirected_parameters = {
+                **parameters,
+                **{
+                    name: str(temporary_entry / file_name)
+                    for name, file_name in destinations.items()
+                },
+            }
+            results = processing.run(algorithm_id, redirected_parameters, **kwargs)
+            serialized = _serialize_results(results, destinations)
+            if serialized is None:
+                # The outputs of results that cannot be stored are moved to
+                # the temporary folder of processing like temporary outputs
+                output_directory = Path(
+                    QgsProcessingUtils.tempFolder(), temporary_entry.name
+                )
+                shutil.move(str(temporary_entry), str(output_directory))
+                return {
+                    **results,
+                    **_load_outputs(output_directory, parameters, destinations),
+                }
+            (temporary_entry / RESULTS_FILE).write_text(
+                json.dumps(serialized), encoding="utf-8"
+            )
+            # Fails if stored by another process in the meantime
+            with contextlib.suppress(OSError):
+                temporary_entry.rename(entry)
+        finally:
+            shutil.rmtree(temporary_entry, ignore_errors=True)
+
+        self._evict()
+        return _load_results(entry, parameters, destinations)
+
+    def size_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def _get_key(
+        self,
+        algorithm: QgsProcessingAlgorithm,
+        parameters: Dict[str, Any],
+        destinations: Dict[str, str],
+    ) -> str:
+        data = {
+            "version": KEY_FORMAT_VERSION,
+            "qgis_version": Qgis.QGIS_VERSION_INT,
+            "algorithm": algorithm.id(),
+            "provider": _get_provider_version(algorithm),
+            "parameters": {
+                name: self._normalize(value)
+                for name, value in sorted(parameters.items())
+                if name not in destinations
+            },
+        }
+        return hashlib.sha1(
+            json.dumps(data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _normalize(self, value: Any) -> Any:  # noqa: PLR0911
+        """Normalize a parameter value to JSON with the fingerprints of sources."""
+        if isinstance(value, QgsMapLayer):
+            if value.providerType() == "memory":
+                return {"memory_layer": _get_features_fingerprint(value)}
+            return {
+                "layer": self._normalize(value.source()),
+                "provider": value.providerType(),
+                "subset": value.subsetString()
+                if isinstance(value, QgsVectorLayer)
+                else "",
+            }
+        if isinstance(value, QgsCoordinateReferenceSystem):
+            return {"crs": value.toWkt()}
+        if isinstance(value, QgsRectangle):
+            return {"rectangle": value.toString(16)}
+        if isinstance(value, (list, tuple)):
+            return [self._normalize(item) for item in value]
+        if isinstance(value, dict):
+            return {str(key): self._normalize(item) for key, item in value.items()}
+        if isinstance(value, str):
+            return self._normalize_string(value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        return repr(value)
+
+    def _normalize_string(self, value: str) -> Any:
+        layer = QgsProject.instance().mapLayer(value)
+        if layer is not None:
+            # Layer ids are resolved to the layers like processing does
+            return self._normalize(layer)
+        path, *options = value.split("|")
+        if Path(path).is_file():
+            # The path is left out so that copies of the same file match
+            return {
+                "fingerprint": self._get_fingerprint(Path(path)),
+                "options": options,
+            }
+        return value
+
+    def _get_fingerprint(self, path: Path) -> str:
+        """Fingerprint of the file and its SQLite journal files, if any."""
+        return ",".join(
+            self._get_file_fingerprint(file)
+            for file in [
+                path,
+                *(path.with_name(path.name + suffix) for suffix in SIDECAR_SUFFIXES),
+            ]
+            if file.is_file()
+        )
+
+    def _get_file_fingerprint(self, path: Path) -> str:
+        stat = path.stat()
+        file_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        fingerprint = self._fingerprints.get(file_key)
+        if fingerprint is None:
+            digest = hashlib.sha1()
+            with path.open("rb") as file:
+                for chunk in iter(lambda: file.read(FINGERPRINT_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            fingerprint = digest.hexdigest()
+            self._fingerprints[file_key] = fingerprint
+        return fingerprint
+
+    def _entries(self) -> List[Tuple[Path, float, int]]:
+        entries = []
+        for results_file in self._directory.glob(f"*/{RESULTS_FILE}"):
+            entry = results_file.parent
+            if entry.name.endswith(".tmp"):
+                continue
+            size = sum(
+                file.stat().st_size for file in entry.iterdir() if file.is_file()
+            )
+            entries.append((entry, results_file.stat().st_mtime, size))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove the least recently used results until the cache fits the limit."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_size = sum(size for _, _, size in entries)
+        # The newest entry is kept even if it alone exceeds the limit
+        for entry, _, size in entries[:-1]:
+            if total_size <= self._max_size_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total_size -= size
+
+
+def _get_cacheable_destinations(
+    algorithm: QgsProcessingAlgorithm, parameters: Dict[str, Any]
+) -> Optional[Dict[str, str]]:
+    """
+    File names of the destination parameters in the cache entry, or None if
+    some destination is not a temporary layer output.
+    """
+    destinations = {}
+    for definition in algorithm.destinationParameterDefinitions():
+        name = definition.name()
+        value = parameters.get(name)
+        if value is None and definition.flags() & definition.FlagOptional:
+            continue
+        if value not in (None, *TEMPORARY_OUTPUTS):
+            return None
+        vector_destinations = (
+            QgsProcessingParameterFeatureSink,
+            QgsProcessingParameterVectorDestination,
+        )
+        if isinstance(definition, vector_destinations):
+            destinations[name] = f"{name}.gpkg"
+        elif isinstance(definition, QgsProcessingParameterRasterDestination):
+            destinations[name] = f"{name}.tif"
+        else:
+            return None
+    return destinations
+
+
+def _get_provider_version(algorithm: QgsProcessingAlgorithm) -> str:
+    provider = algorithm.provider()
+    if provider is None:
+        return ""
+    try:
+        version = provider.versionInfo()
+    except AttributeError:
+        # QgsProcessingProvider.versionInfo was added in QGIS 3.8
+        version = ""
+    return f"{provider.id()} {version}"
+
+
+def _serialize_results(
+    results: Dict[str, Any], destinations: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    serialized: Dict[str, Any] = {}
+    for name, value in results.items():
+        if name in destinations:
+            serialized[name] = {"file": destinations[name]}
+            continue
+        try:
+            json.dumps(value)
+        except TypeError:
+            return None
+        serialized[name] = {"value": value}
+    return serialized
+
+
+def _load_results(
+    entry: Path, parameters: Dict[str, Any], destinations: Dict[str, str]
+) -> Dict[str, Any]:
+    serialized = json.loads((entry / RESULTS_FILE).read_text(encoding="utf-8"))
+    return {
+        **{
+            name: value["value"]
+            for name, value in serialized.items()
+            if "file" not in value
+        },
+        **_load_outputs(_copy_outputs(entry, destinations), parameters, destinations),
+    }
+
+
+def _copy_outputs(entry: Path, destinations: Dict[str, str]) -> Path:
+    """
+    Copy the output files of the cache entry to the temporary folder of
+    processing, where the temporary outputs of processing.run are also stored.
+    """
+    directory = Path(QgsProcessingUtils.tempFolder(), uuid.uuid4().hex)
+    directory.mkdir(parents=True)
+    for file_name in destinations.values():
+        for suffix in ("", *SIDECAR_SUFFIXES):
+            source = entry / f"{file_name}{suffix}"
+            if source.is_file():
+                shutil.copy2(source, directory / source.name)
+    return directory
+
+
+def _load_outputs(
+    directory: Path, parameters: Dict[str, Any], destinations: Dict[str, str]
+) -> Dict[str, QgsMapLayer]:
+    """Layers of the destination files, memory layers for "memory:" outputs."""
+    outputs: Dict[str, QgsMapLayer] = {}
+    for name, file_name in destinations.items():
+        path = str(directory / file_name)
+        if Path(file_name).suffix == ".tif":
+            outputs[name] = QgsRasterLayer(path, name, "gdal")
+            continue
+        layer = QgsVectorLayer(path, name, "ogr")
+        if parameters.get(name) == "memory:":
+            outputs[name] = utils.copy_to_memory_layer(layer)
+            utils._set_layer_owner_to_project(layer)
+        else:
+            outputs[name] = layer
+    return outputs
+
+
+def _get_features_fingerprint(layer: QgsVectorLayer) -> str:
+    digest = hashlib.sha1()
+    digest.update(layer.crs().toWkt().encode("utf-8"))
+    digest.update(",".join(layer.fields().names()).encode("utf-8"))
+    for feature in layer.getFeatures():
+        digest.update(feature.geometry().asWkb())
+        digest.update(repr(feature.attributes()).encode("utf-8"))
+    return digest.hexdigest()
@@ -18,30 +18,81 @@
 
 import contextlib
 import os.path
+import re
 import shutil
 import sys
 import tempfile
 import time
+import uuid
 import warnings
 from collections import namedtuple
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from unittest import mock
 
 import pytest
-from qgis.core import Qgis, QgsApplication, QgsProject, QgsRectangle, QgsVectorLayer
+from osgeo import gdal
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsMapLayer,
+    QgsMapRendererParallelJob,
+    QgsMapRendererSequentialJob,
+    QgsMapSettings,
+    QgsProject,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsVectorLayer,
+)
 from qgis.gui import QgisInterface as QgisInterfaceOrig
 from qgis.gui import QgsGui, QgsLayerTreeMapCanvasBridge, QgsMapCanvas
 from qgis.PyQt import QtCore, QtWidgets, sip
 from qgis.PyQt.QtCore import QCoreApplication
 from qgis.PyQt.QtWidgets import QMainWindow, QMessageBox, QWidget
 
+from pytest_qgis import isolation
+from pytest_qgis.basemap import (
+    BasemapCache,
+    get_countries_layer,
+    get_world_map_geopackage,
+)
+from pytest_qgis.benchmark import BenchmarkResult, QgisBenchmark, save_results
+from pytest_qgis.crs_cache import CRS_CACHE
+from pytest_qgis.gpkg_sandbox import GpkgSandbox, WorkingCopies
+from pytest_qgis.layer_cache import LAYER_CACHE
+from pytest_qgis.layer_inventory import EXTENT_STATISTICS, close_layer_inventory
+from pytest_qgis.leak_detector import LeakDetector, LeakThresholds, format_delta
 from pytest_qgis.mock_qgis_classes import MockMessageBar
+from pytest_qgis.ordering import OrderingResult, get_setup_key, reorder_items
+from pytest_qgis.processing_cache import ProcessingCache
 from pytest_qgis.qgis_bot import QgisBot
 from pytest_qgis.qgis_interface import QgisInterface
+from pytest_qgis.render_settings import (
+    RenderSettings,
+    apply_render_settings,
+    format_render_settings,
+    get_render_settings,
+)
+from pytest_qgis.rendering import LayerRenderTiming, QgisRenderTimer
+from pytest_qgis.task_manager import QgisTaskManager
 from pytest_qgis.utils import (
+    DEFAULT_EPSG,
+    _set_layer_owner_to_project,
     ensure_qgis_layer_fixtures_are_cleaned,
     get_common_extent_from_all_layers,
+    get_layer_fixture_names,
     get_layers_with_different_crs,
     replace_layers_with_reprojected_clones,
     set_map_crs_based_on_layers,
@@ -51,15 +102,37 @@ if TYPE_CHECKING:
     from _pytest.config import Config
     from _pytest.config.argparsing import Parser
     from _pytest.fixtures import SubRequest
+    from _pytest.main import Session
     from _pytest.mark import Mark
+    from _pytest.terminal import TerminalReporter
+    from _pytest.tmpdir import TempPathFactory
+
+    from pytest_qgis.snapshot import QgisSnapshot
 
 QGIS_3_18 = 31800
 
 Settings = namedtuple(
-    "Settings", ["gui_enabled", "qgis_init_disabled", "canvas_width", "canvas_height"]
+    "Settings",
+    [
+        "gui_enabled",
+        "qgis_init_disabled",
+        "canvas_width",
+        "canvas_height",
+        "crs_warmup",
+        "render_settings",
+        "show_map_record",
+    ],
 )
 ShowMapSettings = namedtuple(
-    "ShowMapSettings", ["timeout", "add_basemap", "zoom_to_common_extent", "extent"]
+    "ShowMapSettings",
+    [
+        "timeout",
+        "add_basemap",
+        "zoom_to_common_extent",
+        "extent",
+        "record",
+        "estimate_extent",
+    ],
 )
 
 GUI_DISABLE_KEY = "qgis_disable_gui"
@@ -75,17 +148,119 @@ CANVAS_SIZE_DEFAULT = (600, 600)
 DISABLE_QGIS_INIT_KEY = "qgis_disable_init"
 DISABLE_QGIS_INIT_DESCRIPTION = "Prevent QGIS (QgsApplication) from initializing."
 
+BENCHMARK_JSON_KEY = "qgis_benchmark_json"
+BENCHMARK_JSON_DESCRIPTION = "Save the results of qgis_benchmark fixture as JSON."
+
+ISOLATE_KEY = "qgis_isolate"
+ISOLATE_DESCRIPTION = (
+    "Run the tests in a pool of QGIS worker processes, so that a crashing test "
+    "fails instead of ending the whole test session."
+)
+ISOLATE_WORKERS_KEY = "qgis_isolate_workers"
+ISOLATE_WORKERS_DESCRIPTION = "Number of worker processes with --qgis_isolate."
+
+LEAK_CHECK_KEY = "qgis_leak_check"
+LEAK_CHECK_DESCRIPTION = (
+    "Measure QGIS layers, QObjects, RSS and Python objects left behind by "
+    "each test and flag the tests exceeding the thresholds."
+)
+LEAK_REPORT_KEY = "qgis_leak_report"
+LEAK_REPORT_DESCRIPTION = "Save the per test resource deltas as JSON."
+LEAK_THRESHOLD_KEYS = {
+    "map_layers": "qgis_leak_max_layers",
+    "qobjects": "qgis_leak_max_qobjects",
+    "rss_kb": "qgis_leak_max_rss_kb",
+    "gc_objects": "qgis_leak_max_gc_objects",
+}
+LEAK_THRESHOLD_DEFAULTS = LeakThresholds(
+    map_layers=0, qobjects=0, rss_kb=10_240, gc_objects=10_000
+)
+LEAK_THRESHOLD_DESCRIPTION = (
+    "Maximum increase of {} during a test before it is flagged as leaking."
+)
+
+CRS_WARMUP_KEY = "qgis_crs_warmup"
+CRS_WARMUP_DESCRIPTION = (
+    "Resolve the CRSs used by the test suite at the start of the session. "
+    "The CRSs used in previous runs are remembered in the pytest cache."
+)
+CRS_WARMUP_AUTHIDS_KEY = "qgis_crs_warmup_authids"
+CRS_WARMUP_AUTHIDS_DESCRIPTION = (
+    "CRS authids (e.g. EPSG:3067) to resolve in the CRS warm-up in addition to "
+    "the ones remembered from previous runs."
+)
+CRS_WARMUP_CACHE_KEY = "pytest_qgis/crs_authids"
+CRS_WARMUP_MAX_REMEMBERED = 100
+
+PROCESSING_CACHE_MAX_MB_KEY = "qgis_processing_cache_max_mb"
+PROCESSING_CACHE_MAX_MB_DESCRIPTION = (
+    "Maximum size of the results cached by qgis_processing_cache in megabytes."
+)
+PROCESSING_CACHE_MAX_MB_DEFAULT = 512
+
+RENDER_SETTINGS_KEYS = {
+    "parallel_rendering": "qgis_parallel_rendering",
+    "render_cache": "qgis_render_cache",
+    "preview_jobs": "qgis_preview_jobs",
+    "max_threads": "qgis_max_threads",
+}
+RENDER_SETTINGS_DESCRIPTIONS = {
+    "parallel_rendering": "Enable parallel rendering of the layers of the canvas.",
+    "render_cache": "Enable the render cache of the canvas.",
+    "preview_jobs": "Enable the preview jobs that render the map outside the view.",
+    "max_threads": "Maximum number of threads used by QGIS, -1 for all cores.",
+}
+RENDER_SETTINGS_MARKER = "qgis_render_settings"
+RENDER_SETTINGS_MARKER_DESCRIPTION = (
+    f"{RENDER_SETTINGS_MARKER}(parallel_rendering=None, render_cache=None, "
+    f"preview_jobs=None, max_threads=None): Use the render settings for the "
+    f"canvas during the test. The settings are restored before the next test "
+    f"with other or no render settings."
+)
+
+LAYER_RENDER_SUMMARY_COUNT = 10
+
 SHOW_MAP_MARKER = "qgis_show_map"
 SHOW_MAP_VISIBILITY_TIMEOUT_DEFAULT = 30
 SHOW_MAP_MARKER_DESCRIPTION = (
-    f"{SHOW_MAP_MARKER}(timeout={SHOW_MAP_VISIBILITY_TIMEOUT_DEFAULT}, add_basemap=False, zoom_to_common_extent=True, extent=None): "  # noqa: E501
+    f"{SHOW_MAP_MARKER}(timeout={SHOW_MAP_VISIBILITY_TIMEOUT_DEFAULT}, add_basemap=False, zoom_to_common_extent=True, extent=None, record=False, estimate_extent=False): "  # noqa: E501
     f"Show QGIS map for a short amount of time. The first keyword, *timeout*, is the "
     f"timeout in seconds until the map closes. The second keyword *add_basemap*, "
     f"when set to True, adds Natural Earth countries layer as the basemap for the map. "
     f"The third keyword *zoom_to_common_extent*, when set to True, centers the map "
     f"around all layers in the project. Alternatively the fourth keyword *extent* "
-    f"can be provided as QgsRectangle."
+    f"can be provided as QgsRectangle. The keyword *record*, when set to True, "
+    f"renders the map to an image file instead of showing it. The keyword "
+    f"*estimate_extent*, when set to True, estimates the extents of the layers "
+    f"that would need a full scan of the data source to zoom to the common extent."
+)
+SHOW_MAP_RECORD_KEY = "qgis_show_map_record"
+SHOW_MAP_RECORD_DESCRIPTION = (
+    "Render the maps of qgis_show_map markers to image files instead of showing them."
+)
+SHOW_MAP_RECORD_DIR_KEY = "qgis_show_map_record_dir"
+SHOW_MAP_RECORD_DIR_DESCRIPTION = (
+    "Directory of the images rendered by qgis_show_map markers in record mode."
+)
+SHOW_MAP_RECORD_DIR_DEFAULT = "qgis_show_map"
+
+REORDER_KEY = "qgis_reorder"
+REORDER_DESCRIPTION = (
+    "Reorder the tests within their modules so that the tests with the same "
+    "qgis_render_settings marker run one after another, and run the modules "
+    "using qgis_processing after the other modules of their package."
+)
+
+SNAPSHOT_UPDATE_KEY = "qgis_snapshot_update"
+SNAPSHOT_UPDATE_DESCRIPTION = (
+    "Write the missing and differing snapshots of qgis_snapshot fixture "
+    "instead of failing the tests."
 )
+SNAPSHOT_DIR_KEY = "qgis_snapshot_dir"
+SNAPSHOT_DIR_DESCRIPTION = "Directory of the snapshots of qgis_snapshot fixture."
+SNAPSHOT_DIR_DEFAULT = "qgis_snapshots"
+
+VSIMEM_PREFIX = "/vsimem/pytest_qgis/"
 
 _APP: Optional[QgsApplication] = None
 _CANVAS: Optional[QgsMapCanvas] = None
@@ -93,6 +268,9 @@ _IFACE: Optional[QgisInterface] = None
 _PARENT: Optional[QtWidgets.QWidget] = None
 _AUTOUSE_QGIS: Optional[bool] = None
 _QGIS_CONFIG_PATH: Optional[Path] = None
+# Render settings of the qgis_render_settings marker in use and the settings
+# they replaced
+_MARKER_RENDER_SETTINGS: Optional[Tuple[RenderSettings, RenderSettings]] = None
 
 try:
     _QGIS_VERSION = Qgis.versionInt()
@@ -112,6 +290,36 @@ def pytest_addoption(parser: "Parser") -> None:
         action="store_true",
         help=DISABLE_QGIS_INIT_DESCRIPTION,
     )
+    group.addoption(f"--{ISOLATE_KEY}", action="store_true", help=ISOLATE_DESCRIPTION)
+    group.addoption(
+        f"--{ISOLATE_WORKERS_KEY}",
+        type=int,
+        default=1,
+        metavar="N",
+        help=ISOLATE_WORKERS_DESCRIPTION,
+    )
+    group.addoption(
+        f"--{isolation.WORKER_KEY}",
+        action="store_true",
+        help=isolation.WORKER_DESCRIPTION,
+    )
+    group.addoption(
+        f"--{LEAK_CHECK_KEY}", action="store_true", help=LEAK_CHECK_DESCRIPTION
+    )
+    group.addoption(
+        f"--{LEAK_REPORT_KEY}", metavar="PATH", help=LEAK_REPORT_DESCRIPTION
+    )
+    group.addoption(
+        f"--{BENCHMARK_JSON_KEY}",
+        metavar="PATH",
+        help=BENCHMARK_JSON_DESCRIPTION,
+    )
+    group.addoption(f"--{REORDER_KEY}", action="store_true", help=REORDER_DESCRIPTION)
+    group.addoption(
+        f"--{SNAPSHOT_UPDATE_KEY}",
+        action="store_true",
+        help=SNAPSHOT_UPDATE_DESCRIPTION,
+    )
 
     parser.addini(
         GUI_ENABLED_KEY, GUI_DESCRIPTION, type="bool", default=GUI_ENABLED_DEFAULT
@@ -129,27 +337,201 @@ def pytest_addoption(parser: "Parser") -> None:
         type="string",
         default=CANVAS_SIZE_DEFAULT[1],
     )
+    for threshold, key in LEAK_THRESHOLD_KEYS.items():
+        parser.addini(
+            key,
+            LEAK_THRESHOLD_DESCRIPTION.format(threshold.replace("_", " ")),
+            type="string",
+            default=str(getattr(LEAK_THRESHOLD_DEFAULTS, threshold)),
+        )
+    parser.addini(CRS_WARMUP_KEY, CRS_WARMUP_DESCRIPTION, type="bool", default=False)
+    parser.addini(
+        CRS_WARMUP_AUTHIDS_KEY, CRS_WARMUP_AUTHIDS_DESCRIPTION, type="linelist"
+    )
+    for setting, key in RENDER_SETTINGS_KEYS.items():
+        parser.addini(
+            key, RENDER_SETTINGS_DESCRIPTIONS[setting], type="string", default=""
+        )
+    parser.addini(
+        SHOW_MAP_RECORD_KEY, SHOW_MAP_RECORD_DESCRIPTION, type="bool", default=False
+    )
+    parser.addini(
+        SHOW_MAP_RECORD_DIR_KEY,
+        SHOW_MAP_RECORD_DIR_DESCRIPTION,
+        type="string",
+        default=SHOW_MAP_RECORD_DIR_DEFAULT,
+    )
+    parser.addini(
+        SNAPSHOT_DIR_KEY,
+        SNAPSHOT_DIR_DESCRIPTION,
+        type="string",
+        default=SNAPSHOT_DIR_DEFAULT,
+    )
+    parser.addini(
+        PROCESSING_CACHE_MAX_MB_KEY,
+        PROCESSING_CACHE_MAX_MB_DESCRIPTION,
+        type="string",
+        default=str(PROCESSING_CACHE_MAX_MB_DEFAULT),
+    )
 
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_configure(config: "Config") -> None:
     """Configure and initialize qgis session for all tests."""
     config.addinivalue_line("markers", SHOW_MAP_MARKER_DESCRIPTION)
+    config.addinivalue_line("markers", RENDER_SETTINGS_MARKER_DESCRIPTION)
 
     settings = _parse_settings(config)
     config._plugin_settings = settings
+    config._qgis_benchmark_results = []
+    config._qgis_gpkg_working_copies = None
+    config._qgis_processing_cache = None
+    config._qgis_basemap_cache = None
+    config._qgis_layer_render_timings = []
+    config._qgis_written_snapshots = []
+    config._qgis_ordering_result = None
 
     if not settings.gui_enabled:
         os.environ["QT_QPA_PLATFORM"] = "offscreen"
 
     _start_and_configure_qgis_app(config)
 
+    if config.getoption(isolation.WORKER_KEY):
+        config.pluginmanager.register(isolation.WorkerPlugin(config))
+    elif config.getoption(ISOLATE_KEY):
+        config.pluginmanager.register(
+            isolation.ControllerPlugin(config.getoption(ISOLATE_WORKERS_KEY))
+        )
+
+    config._qgis_leak_detector = None
+    if config.getoption(LEAK_CHECK_KEY) or config.getoption(LEAK_REPORT_KEY):
+        config._qgis_leak_detector = LeakDetector(
+            _PARENT, _CANVAS, _parse_leak_thresholds(config)
+        )
+
+
+@pytest.hookimpl()
+def pytest_report_header(config: "Config") -> Optional[str]:  # noqa: ARG001
+    if _CANVAS is None:
+        return None
+    return (
+        f"pytest-qgis: QGIS {Qgis.QGIS_VERSION}, "
+        f"{format_render_settings(get_render_settings(_CANVAS))}"
+    )
+
+
+@pytest.hookimpl()
+def pytest_sessionstart(session: "Session") -> None:
+    config = session.config
+    settings: Settings = config._plugin_settings
+    if settings.crs_warmup and not settings.qgis_init_disabled:
+        CRS_CACHE.warm_up(_get_crs_warmup_authids(config))
+
+
+@pytest.hookimpl()
+def pytest_sessionfinish(session: "Session") -> None:
+    config = session.config
+    cache = getattr(config, "cache", None)
+    if config._plugin_settings.crs_warmup and cache is not None:
+        remembered = cache.get(CRS_WARMUP_CACHE_KEY, [])
+        # Most recently used authids first
+        authids = list(
+            dict.fromkeys([*reversed(CRS_CACHE.requested_authids()), *remembered])
+        )
+        cache.set(CRS_WARMUP_CACHE_KEY, authids[:CRS_WARMUP_MAX_REMEMBERED])
+
+    leak_report = config.getoption(LEAK_REPORT_KEY)
+    if leak_report and config._qgis_leak_detector is not None:
+        config._qgis_leak_detector.save_report(Path(leak_report))
+
+    benchmark_json = config.getoption(BENCHMARK_JSON_KEY)
+    if benchmark_json and config._qgis_benchmark_results:
+        save_results(Path(benchmark_json), config._qgis_benchmark_results)
+
+
+@pytest.hookimpl()
+def pytest_terminal_summary(
+    terminalreporter: "TerminalReporter",
+    exitstatus: int,  # noqa: ARG001
+    config: "Config",
+) -> None:
+    if config._plugin_settings.crs_warmup:
+        _write_crs_cache_summary(terminalreporter)
+    if config._qgis_benchmark_results:
+        _write_benchmark_summary(terminalreporter, config._qgis_benchmark_results)
+    if config._qgis_leak_detector is not None:
+        _write_leak_summary(terminalreporter, config._qgis_leak_detector)
+    if LAYER_CACHE.opens:
+        _write_layer_cache_summary(terminalreporter)
+    if EXTENT_STATISTICS.exact or EXTENT_STATISTICS.estimated:
+        _write_extent_summary(terminalreporter)
+    if config._qgis_processing_cache is not None:
+        _write_processing_cache_summary(terminalreporter, config._qgis_processing_cache)
+    if config._qgis_layer_render_timings:
+        _write_layer_render_summary(terminalreporter, config._qgis_layer_render_timings)
+    if config._qgis_ordering_result is not None:
+        _write_ordering_summary(terminalreporter, config._qgis_ordering_result)
+    if config._qgis_written_snapshots:
+        _write_snapshot_summary(terminalreporter, config._qgis_written_snapshots)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Generator[None, None, None]:
+    leak_detector: Optional[LeakDetector] = item.config._qgis_leak_detector
+    # Measured after the setup, so that the setups of the module and session
+    # scoped fixtures are not charged to the first test using them
+    if leak_detector is not None:
+        leak_detector.start()
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(
+    item: pytest.Item,
+    nextitem: Optional[pytest.Item],  # noqa: ARG001
+) -> Generator[None, None, None]:
+    yield
+    leak_detector: Optional[LeakDetector] = item.config._qgis_leak_detector
+    # The test is not called if its setup fails
+    if leak_detector is not None and leak_detector.is_measuring():
+        leak_detector.stop(item.nodeid)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config: "Config", items: List[pytest.Item]) -> None:
+    for item in items:
+        fixtureinfo = getattr(item, "_fixtureinfo", None)
+        if fixtureinfo is not None:
+            item._qgis_layer_fixtures = get_layer_fixture_names(
+                fixtureinfo.names_closure, fixtureinfo.name2fixturedefs
+            )
+
+    if config.getoption(REORDER_KEY):
+        config._qgis_ordering_result = reorder_items(
+            items,
+            partial(get_setup_key, marker_names=(RENDER_SETTINGS_MARKER,)),
+        )
+
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_runtest_teardown(item: pytest.Item, nextitem: Optional[pytest.Item]) -> None:  # noqa: ARG001
     request = item.funcargs.get("request")
     if request:
-        ensure_qgis_layer_fixtures_are_cleaned(request)
+        layer_fixtures: Optional[List[str]] = getattr(
+            item, "_qgis_layer_fixtures", None
+        )
+        if layer_fixtures is not None:
+            # Fixtures requested dynamically with getfixturevalue
+            dynamic_fixtures = set(request.fixturenames).difference(
+                item._fixtureinfo.names_closure
+            )
+            layer_fixtures = [
+                *layer_fixtures,
+                *get_layer_fixture_names(
+                    dynamic_fixtures, item._fixtureinfo.name2fixturedefs
+                ),
+            ]
+        ensure_qgis_layer_fixtures_are_cleaned(request, layer_fixtures)
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -159,7 +541,13 @@ def qgis_app(request: "SubRequest") -> QgsApplication:
     if not request.config._plugin_settings.qgis_init_disabled:
         assert _APP
         QgsProject.instance().legendLayersAdded.disconnect(_APP.processEvents)
+        if request.config._plugin_settings.crs_warmup:
+            QgsProject.instance().layersAdded.disconnect(_record_layer_crss)
+        for layer in LAYER_CACHE.take_layers():
+            _set_layer_owner_to_project(layer)
+        close_layer_inventory()
         if not sip.isdeleted(_CANVAS) and _CANVAS is not None:
+            _use_marker_render_settings(_CANVAS, None)
             _CANVAS.deleteLater()
         _APP.exitQgis()
         if _QGIS_CONFIG_PATH and _QGIS_CONFIG_PATH.exists():
@@ -199,6 +587,24 @@ def qgis_processing(qgis_app: QgsApplication) -> None:
     _initialize_processing(qgis_app)
 
 
+@pytest.fixture()
+def qgis_processing_cache(
+    qgis_processing: None,  # noqa: ARG001
+    request: "SubRequest",
+) -> ProcessingCache:
+    """
+    Runs processing algorithms with processing.run and caches the results
+    in the pytest cache directory for the later calls and sessions.
+    """
+    config = request.config
+    if config._qgis_processing_cache is None:
+        config._qgis_processing_cache = ProcessingCache(
+            _get_cache_dir(config, "pytest_qgis_processing"),
+            int(config.getini(PROCESSING_CACHE_MAX_MB_KEY)) * 1024 * 1024,
+        )
+    return config._qgis_processing_cache
+
+
 @pytest.fixture()
 def qgis_new_project(qgis_iface: QgisInterface) -> None:
     """
@@ -218,7 +624,8 @@ def qgis_world_map_geopackage(tmp_path: Path) -> Path:
     * disputed_borders
     * states_provinces
     """
-    return _get_world_map_geopackage(tmp_path)
+    # Copy the geopackage to allow modifications
+    return Path(shutil.copy(get_world_map_geopackage(), tmp_path))
 
 
 @pytest.fixture()
@@ -226,7 +633,277 @@ def qgis_countries_layer(qgis_world_map_geopackage: Path) -> QgsVectorLayer:
     """
     Natural Earth countries as a QgsVectorLayer.
     """
-    return _get_countries_layer(qgis_world_map_geopackage)
+    return get_countries_layer(qgis_world_map_geopackage)
+
+
+@pytest.fixture()
+def qgis_layer_factory(
+    qgis_app: QgsApplication,  # noqa: ARG001
+) -> Callable[..., QgsMapLayer]:
+    """
+    Factory for layers that are opened once per session and shared
+    between the tests.
+
+    The cached layer is reset for each test: the edit buffer is rolled
+    back and the subset string, selection and renderer are restored.
+    Changes committed to the data source are not reverted. Use clone=True
+    to get an independent copy of the layer instead.
+    """
+    layers: List[QgsMapLayer] = []
+
+    def get_layer(
+        uri: str,
+        name: str = "",
+        provider: str = "ogr",
+        options: Optional[Dict[str, Any]] = None,
+        clone: bool = False,
+    ) -> QgsMapLayer:
+        layer = LAYER_CACHE.get(uri, name, provider, options)
+        if clone and layer.isValid():
+            layer = layer.clone()
+            layer.setName(name)
+        layers.append(layer)
+        return layer
+
+    yield get_layer
+
+    for layer in layers:
+        if sip.isdeleted(layer):
+            continue
+        if LAYER_CACHE.is_cached(layer):
+            LAYER_CACHE.release(layer)
+        else:
+            _set_layer_owner_to_project(layer)
+
+
+@pytest.fixture()
+def qgis_gpkg_sandbox(
+    qgis_app: QgsApplication,  # noqa: ARG001
+    tmp_path_factory: "TempPathFactory",
+    request: "SubRequest",
+) -> Callable[[Path], GpkgSandbox]:
+    """
+    Factory for sandboxes of GeoPackages. The working copy of a GeoPackage
+    is made once per session and the changes made by a test through the
+    layers of the sandbox are rolled back at the teardown.
+    """
+    config = request.config
+    if config._qgis_gpkg_working_copies is None:
+        config._qgis_gpkg_working_copies = WorkingCopies(
+            tmp_path_factory.mktemp("qgis_gpkg_sandbox")
+        )
+    working_copies: WorkingCopies = config._qgis_gpkg_working_copies
+    sandboxes: Dict[Path, GpkgSandbox] = {}
+
+    def get_sandbox(source: Path) -> GpkgSandbox:
+        if source not in sandboxes:
+            sandboxes[source] = GpkgSandbox(working_copies.get(source))
+        return sandboxes[source]
+
+    yield get_sandbox
+
+    for source, sandbox in sandboxes.items():
+        if not sandbox.rollback():
+            working_copies.discard(source)
+        for layer in sandbox.layers:
+            _set_layer_owner_to_project(layer)
+
+
+@pytest.fixture()
+def qgis_synthetic_layer(
+    qgis_app: QgsApplication,  # noqa: ARG001
+    tmp_path: Path,
+    request: "SubRequest",
+) -> Callable[..., QgsVectorLayer]:
+    """
+    Factory for vector layers with random features for load testing.
+
+    The features are generated with NumPy. With the default "ogr" provider
+    the features are written to a GeoPackage which is cached in the pytest
+    cache directory per seed and parameters. Use provider="memory" to get
+    a memory layer instead.
+    """
+    from pytest_qgis import synthetic_data
+
+    layers: List[QgsVectorLayer] = []
+    cache_dir = _get_cache_dir(request.config, "pytest_qgis_synthetic_layers")
+
+    def create_layer(  # noqa: PLR0913
+        feature_count: int,
+        geometry_type: str = "Point",
+        crs: str = DEFAULT_EPSG,
+        fields: Optional[Dict[str, str]] = None,
+        seed: int = 0,
+        extent: Optional[QgsRectangle] = None,
+        provider: str = "ogr",
+        name: str = "synthetic",
+        cache: bool = True,
+    ) -> QgsVectorLayer:
+        if provider == "memory":
+            layer = synthetic_data.create_synthetic_memory_layer(
+                feature_count, geometry_type, crs, fields, seed, extent, name
+            )
+        elif provider == "ogr":
+            key = synthetic_data.synthetic_layer_key(
+                feature_count,
+                geometry_type,
+                crs,
+                synthetic_data.DEFAULT_FIELDS if fields is None else fields,
+                seed,
+                extent,
+            )
+            path = Path(cache_dir if cache else tmp_path, f"{key}.gpkg")
+            if not path.exists():
+                synthetic_data.write_synthetic_geopackage(
+                    path, feature_count, geometry_type, crs, fields, seed, extent
+                )
+            layer = QgsVectorLayer(f"{path}|layername=synthetic", name, "ogr")
+            # Cached datasets are shared between the tests
+            layer.setReadOnly(cache)
+        else:
+            raise ValueError(f"Unsupported provider for synthetic layer: {provider}")
+
+        assert layer.isValid()
+        layers.append(layer)
+        return layer
+
+    yield create_layer
+
+    for layer in layers:
+        _set_layer_owner_to_project(layer)
+
+
+@pytest.fixture()
+def qgis_synthetic_raster(
+    qgis_app: QgsApplication,  # noqa: ARG001
+    tmp_path: Path,
+) -> Callable[..., QgsRasterLayer]:
+    """
+    Factory for raster layers with random values.
+
+    The rasters are written to GDAL's /vsimem/ in-memory filesystem by default
+    and the memory is freed at the teardown of the fixture. Use
+    in_memory=False to write the raster to a temporary directory instead.
+    """
+    from pytest_qgis import synthetic_data
+
+    layers: List[QgsRasterLayer] = []
+    vsimem_directories: List[str] = []
+
+    def create_raster(  # noqa: PLR0913
+        width: int,
+        height: int,
+        band_count: int = 1,
+        data_type: str = "Float32",
+        crs: str = DEFAULT_EPSG,
+        extent: Optional[QgsRectangle] = None,
+        tile_size: Optional[int] = synthetic_data.DEFAULT_TILE_SIZE,
+        compression: Optional[str] = None,
+        overviews: Sequence[int] = (),
+        nodata: Optional[float] = None,
+        seed: int = 0,
+        name: str = "synthetic",
+        in_memory: bool = True,
+    ) -> QgsRasterLayer:
+        file_name = f"{name}_{len(layers)}.tif"
+        if in_memory:
+            directory = f"{VSIMEM_PREFIX}{uuid.uuid4().hex}"
+            vsimem_directories.append(directory)
+            path = f"{directory}/{file_name}"
+        else:
+            path = str(tmp_path / file_name)
+        synthetic_data.write_synthetic_raster(
+            path,
+            width,
+            height,
+            band_count,
+            data_type,
+            crs,
+            extent,
+            tile_size,
+            compression,
+            overviews,
+            nodata,
+            seed,
+        )
+        layer = QgsRasterLayer(path, name, "gdal")
+        assert layer.isValid()
+        layers.append(layer)
+        return layer
+
+    yield create_raster
+
+    project = QgsProject.instance()
+    for layer in layers:
+        if not sip.isdeleted(layer) and project.mapLayer(layer.id()):
+            project.removeMapLayer(layer)
+        else:
+            _set_layer_owner_to_project(layer)
+    # Removes also the auxiliary files written by QGIS
+    for directory in vsimem_directories:
+        gdal.RmdirRecursive(directory)
+
+
+@pytest.fixture()
+def qgis_benchmark(qgis_canvas: QgsMapCanvas, request: "SubRequest") -> QgisBenchmark:
+    """
+    Times functions including the pending Qt work such as canvas rendering.
+    The results are shown in the terminal summary and can be saved as JSON
+    with the --qgis_benchmark_json option.
+    """
+    return QgisBenchmark(
+        request.node.nodeid, qgis_canvas, request.config._qgis_benchmark_results
+    )
+
+
+@pytest.fixture()
+def qgis_render_timer(
+    qgis_canvas: QgsMapCanvas, request: "SubRequest"
+) -> QgisRenderTimer:
+    """
+    Refreshes the canvas and waits for the rendering to finish, and measures
+    the rendering times of the layers. The times are added to the user
+    properties of the test and the slowest layers are shown in the terminal
+    summary.
+    """
+    return QgisRenderTimer(
+        request.node.nodeid,
+        qgis_canvas,
+        request.node.user_properties,
+        request.config._qgis_layer_render_timings,
+    )
+
+
+@pytest.fixture()
+def qgis_snapshot(
+    qgis_app: QgsApplication,  # noqa: ARG001
+    request: "SubRequest",
+) -> "QgisSnapshot":
+    """
+    Compares layers against snapshots saved in compact NumPy files keyed by
+    the node id of the test. Missing and differing snapshots are written
+    with the --qgis_snapshot_update option.
+    """
+    from pytest_qgis.snapshot import QgisSnapshot
+
+    config = request.config
+    return QgisSnapshot(
+        _get_rootdir_relative_path(config, config.getini(SNAPSHOT_DIR_KEY)),
+        request.node.nodeid,
+        config.getoption(SNAPSHOT_UPDATE_KEY),
+        config._qgis_written_snapshots,
+    )
+
+
+@pytest.fixture()
+def qgis_task_manager(qgis_app: QgsApplication) -> QgisTaskManager:  # noqa: ARG001
+    """
+    Controls the thread count of QgsApplication.taskManager(), waits for
+    the tasks using their signals and records the durations of the tasks.
+    """
+    task_manager = QgisTaskManager(QgsApplication.taskManager())
+    yield task_manager
+    task_manager.close()
 
 
 @pytest.fixture(scope="session")
@@ -247,36 +924,79 @@ def qgis_show_map(
 ) -> None:
     """
     Shows QGIS map if qgis_show_map marker is used.
+    Applies the render settings of qgis_render_settings marker to the canvas.
     """
     show_map_marker = request.node.get_closest_marker(SHOW_MAP_MARKER)
+    render_settings_marker = request.node.get_closest_marker(RENDER_SETTINGS_MARKER)
     common_settings: Settings = request.config._plugin_settings
 
+    _use_marker_render_settings(
+        qgis_iface.mapCanvas(),
+        _parse_render_settings_marker(render_settings_marker)
+        if render_settings_marker
+        else None,
+    )
+
+    show_map_settings = None
     if show_map_marker:
+        show_map_settings = _parse_show_map_marker(show_map_marker)
+        if common_settings.show_map_record:
+            show_map_settings = show_map_settings._replace(record=True)
         # Assign the bridge to have correct layer order and visibilities
         bridge = QgsLayerTreeMapCanvasBridge(  # noqa: F841, this needs to be assigned
             QgsProject.instance().layerTreeRoot(), qgis_iface.mapCanvas()
         )
-        _show_qgis_dlg(common_settings, qgis_parent)
+        if not show_map_settings.record:
+            _show_qgis_dlg(common_settings, qgis_parent)
 
     yield
 
-    if (
-        show_map_marker
-        and common_settings.gui_enabled
-        and not common_settings.qgis_init_disabled
-    ):
+    if show_map_settings is None or common_settings.qgis_init_disabled:
+        pass
+    elif show_map_settings.record:
+        _record_qgis_map(
+            qgis_app,
+            qgis_iface,
+            show_map_settings,
+            tmp_path,
+            _get_basemap_cache(request.config),
+            _get_show_map_record_path(request.config, request.node.nodeid),
+        )
+    elif common_settings.gui_enabled:
         _configure_qgis_map(
             qgis_app,
             qgis_iface,
             qgis_parent,
-            _parse_show_map_marker(show_map_marker),
+            show_map_settings,
             tmp_path,
+            _get_basemap_cache(request.config),
         )
 
 
+def _use_marker_render_settings(
+    canvas: QgsMapCanvas, settings: Optional[RenderSettings]
+) -> None:
+    """
+    Apply the render settings of the marker of the test. The settings stay
+    applied for the following tests with the same marker arguments and are
+    restored for the first test without them.
+    """
+    global _MARKER_RENDER_SETTINGS  # noqa: PLW0603
+    if _MARKER_RENDER_SETTINGS is not None:
+        applied_settings, previous_settings = _MARKER_RENDER_SETTINGS
+        if applied_settings == settings:
+            return
+        apply_render_settings(canvas, previous_settings)
+        _MARKER_RENDER_SETTINGS = None
+    if settings is not None:
+        _MARKER_RENDER_SETTINGS = (settings, apply_render_settings(canvas, settings))
+
+
 def _start_and_configure_qgis_app(config: "Config") -> None:
     global _APP, _CANVAS, _IFACE, _PARENT, _QGIS_CONFIG_PATH  # noqa: PLW0603
+    global _MARKER_RENDER_SETTINGS  # noqa: PLW0603
     settings: Settings = config._plugin_settings
+    _MARKER_RENDER_SETTINGS = None
 
     # Use temporary path for QGIS config
     _QGIS_CONFIG_PATH = Path(tempfile.mkdtemp(prefix="pytest-qgis"))
@@ -290,6 +1010,7 @@ def _start_and_configure_qgis_app(config: "Config") -> None:
     _CANVAS = QgsMapCanvas(_PARENT)
     _PARENT.resize(QtCore.QSize(settings.canvas_width, settings.canvas_height))
     _CANVAS.resize(QtCore.QSize(settings.canvas_width, settings.canvas_height))
+    apply_render_settings(_CANVAS, settings.render_settings)
 
     # QgisInterface is a stub implementation of the QGIS plugin interface
     _IFACE = QgisInterface(_CANVAS, MockMessageBar(), _PARENT)
@@ -313,6 +1034,16 @@ def _start_and_configure_qgis_app(config: "Config") -> None:
         # It is better to process events right after adding the
         # layer to avoid these kind of problems.
         QgsProject.instance().legendLayersAdded.connect(_APP.processEvents)
+        if settings.crs_warmup:
+            # Remembered for the warm-up of the next sessions
+            QgsProject.instance().layersAdded.connect(_record_layer_crss)
+
+
+def _record_layer_crss(layers: List[QgsMapLayer]) -> None:
+    for layer in layers:
+        authid = layer.crs().authid()
+        if authid:
+            CRS_CACHE.record_use(authid)
 
 
 def _initialize_processing(qgis_app: QgsApplication) -> None:
@@ -342,12 +1073,13 @@ def _show_qgis_dlg(common_settings: Settings, qgis_parent: QWidget) -> None:
         )
 
 
-def _configure_qgis_map(
+def _configure_qgis_map(  # noqa: PLR0913
     qgis_app: QgsApplication,
     qgis_iface: QgisInterface,
     qgis_parent: QWidget,
     settings: ShowMapSettings,
     tmp_path: Path,
+    basemap_cache: BasemapCache,
 ) -> None:
     if settings.timeout == 0:
         qgis_parent.close()
@@ -356,31 +1088,7 @@ def _configure_qgis_map(
     message_box = QMessageBox(qgis_parent)
 
     try:
-        # Change project CRS to most common CRS if it is not set
-        if not QgsProject.instance().crs().isValid():
-            set_map_crs_based_on_layers()
-
-        extent = settings.extent
-        if settings.zoom_to_common_extent and extent is None:
-            extent = get_common_extent_from_all_layers()
-        if extent is not None:
-            qgis_iface.mapCanvas().setExtent(extent)
-
-        # Replace layers with different CRS
-        layers_with_different_crs = get_layers_with_different_crs()
-        if layers_with_different_crs:
-            _initialize_processing(qgis_app)
-            replace_layers_with_reprojected_clones(layers_with_different_crs, tmp_path)
-
-        if settings.add_basemap:
-            # Add Natural Earth Countries
-            countries_layer = _get_countries_layer(_get_world_map_geopackage(tmp_path))
-            QgsProject.instance().addMapLayer(countries_layer)
-            if countries_layer.crs() != QgsProject.instance().crs():
-                _initialize_processing(qgis_app)
-                replace_layers_with_reprojected_clones([countries_layer], tmp_path)
-
-        QgsProject.instance().reloadAllLayers()
+        _prepare_qgis_map(qgis_app, qgis_iface, settings, tmp_path, basemap_cache)
         qgis_iface.mapCanvas().refreshAllLayers()
 
         message_box.setWindowTitle("pytest-qgis")
@@ -401,6 +1109,95 @@ def _configure_qgis_map(
         qgis_parent.close()
 
 
+def _record_qgis_map(  # noqa: PLR0913
+    qgis_app: QgsApplication,
+    qgis_iface: QgisInterface,
+    settings: ShowMapSettings,
+    tmp_path: Path,
+    basemap_cache: BasemapCache,
+    image_path: Path,
+) -> None:
+    """
+    Render the map offscreen to an image file without showing the window.
+    The rendering is waited to finish instead of waiting for a timeout.
+    """
+    extent = _prepare_qgis_map(qgis_app, qgis_iface, settings, tmp_path, basemap_cache)
+    canvas = qgis_iface.mapCanvas()
+
+    # Background color, DPI, flags and other settings are those of the canvas
+    map_settings = QgsMapSettings(canvas.mapSettings())
+    map_settings.setDestinationCrs(QgsProject.instance().crs())
+    # The hidden canvas is never resized, so the size is taken from the widget
+    map_settings.setOutputSize(canvas.size())
+    map_settings.setExtent(extent if extent is not None else canvas.extent())
+    map_settings.setLayers(QgsProject.instance().layerTreeRoot().checkedLayers())
+    job = (
+        QgsMapRendererParallelJob(map_settings)
+        if canvas.isParallelRenderingEnabled()
+        else QgsMapRendererSequentialJob(map_settings)
+    )
+    job.start()
+    job.waitForFinished()
+
+    image_path.parent.mkdir(parents=True, exist_ok=True)
+    if not job.renderedImage().save(str(image_path)):
+        warnings.warn(f"Could not save the map to {image_path}", stacklevel=1)
+
+
+def _prepare_qgis_map(
+    qgis_app: QgsApplication,
+    qgis_iface: QgisInterface,
+    settings: ShowMapSettings,
+    tmp_path: Path,
+    basemap_cache: BasemapCache,
+) -> Optional[QgsRectangle]:
+    """
+    Set the CRS and the extent of the map, reproject the layers to the CRS
+    and add the basemap.
+
+    :return: Extent of the map if it was set.
+    """
+    # Change project CRS to most common CRS if it is not set
+    if not QgsProject.instance().crs().isValid():
+        set_map_crs_based_on_layers()
+
+    extent = settings.extent
+    if settings.zoom_to_common_extent and extent is None:
+        extent = get_common_extent_from_all_layers(settings.estimate_extent)
+    if extent is not None:
+        qgis_iface.mapCanvas().setExtent(extent)
+
+    # Replace layers with different CRS
+    layers_with_different_crs = get_layers_with_different_crs()
+    if layers_with_different_crs:
+        _initialize_processing(qgis_app)
+        replace_layers_with_reprojected_clones(layers_with_different_crs, tmp_path)
+
+    if settings.add_basemap:
+        # Add Natural Earth Countries reprojected to the project CRS
+        QgsProject.instance().addMapLayer(
+            basemap_cache.get(QgsProject.instance().crs())
+        )
+
+    QgsProject.instance().reloadAllLayers()
+    return extent
+
+
+def _get_show_map_record_path(config: "Config", nodeid: str) -> Path:
+    directory = _get_rootdir_relative_path(
+        config, config.getini(SHOW_MAP_RECORD_DIR_KEY)
+    )
+    file_name = re.sub(r"[^\w.-]+", "_", nodeid)
+    return directory / f"{file_name}.png"
+
+
+def _get_rootdir_relative_path(config: "Config", path: str) -> Path:
+    directory = Path(path)
+    if not directory.is_absolute():
+        directory = Path(str(config.rootdir), directory)
+    return directory
+
+
 def _parse_settings(config: "Config") -> Settings:
     gui_disabled = config.getoption(GUI_DISABLE_KEY)
     if not gui_disabled:
@@ -411,12 +1208,195 @@ def _parse_settings(config: "Config") -> Settings:
     qgis_init_disabled = config.getoption(DISABLE_QGIS_INIT_KEY)
     canvas_width = int(config.getini(CANVAS_WIDTH_KEY))
     canvas_height = int(config.getini(CANVAS_HEIGHT_KEY))
+    crs_warmup = config.getini(CRS_WARMUP_KEY)
+    render_settings = _parse_render_settings(config)
+    show_map_record = config.getini(SHOW_MAP_RECORD_KEY)
+
+    return Settings(
+        gui_enabled,
+        qgis_init_disabled,
+        canvas_width,
+        canvas_height,
+        crs_warmup,
+        render_settings,
+        show_map_record,
+    )
 
-    return Settings(gui_enabled, qgis_init_disabled, canvas_width, canvas_height)
+
+def _parse_render_settings(config: "Config") -> RenderSettings:
+    values: Dict[str, Optional[Union[bool, int]]] = {}
+    for setting, key in RENDER_SETTINGS_KEYS.items():
+        value = config.getini(key).strip().lower()
+        if not value:
+            values[setting] = None
+        elif setting == "max_threads":
+            values[setting] = int(value)
+        elif value in ("true", "1", "yes", "on"):
+            values[setting] = True
+        elif value in ("false", "0", "no", "off"):
+            values[setting] = False
+        else:
+            raise ValueError(f"Invalid boolean value for {key}: {value}")
+    return RenderSettings(**values)
+
+
+def _parse_render_settings_marker(marker: "Mark") -> RenderSettings:
+    if marker.args:
+        raise TypeError(
+            f"{RENDER_SETTINGS_MARKER} marker accepts only keyword arguments"
+        )
+    for kwarg in marker.kwargs:
+        if kwarg not in RenderSettings._fields:
+            raise TypeError(
+                f"Invalid keyword argument for {RENDER_SETTINGS_MARKER} marker: {kwarg}"
+            )
+    return RenderSettings(
+        **{field: marker.kwargs.get(field) for field in RenderSettings._fields}
+    )
+
+
+def _write_crs_cache_summary(terminalreporter: "TerminalReporter") -> None:
+    terminalreporter.write_sep("-", "pytest-qgis CRS cache")
+    terminalreporter.write_line(
+        f"warm-up: {CRS_CACHE.warmup_count} CRSs in "
+        f"{CRS_CACHE.warmup_time:.3f}s, "
+        f"hits: {CRS_CACHE.hits}, misses: {CRS_CACHE.misses} "
+        f"({CRS_CACHE.miss_time:.3f}s), "
+        f"estimated time saved: {CRS_CACHE.estimated_saved_time():.3f}s"
+    )
+
+
+def _write_layer_cache_summary(terminalreporter: "TerminalReporter") -> None:
+    terminalreporter.write_sep("-", "pytest-qgis layer cache")
+    terminalreporter.write_line(
+        f"layers opened: {LAYER_CACHE.opens}, reused: {LAYER_CACHE.reuses}"
+    )
+
+
+def _write_extent_summary(terminalreporter: "TerminalReporter") -> None:
+    terminalreporter.write_sep("-", "pytest-qgis layer extents")
+    terminalreporter.write_line(
+        f"exact: {EXTENT_STATISTICS.exact}, "
+        f"estimated: {EXTENT_STATISTICS.estimated}, "
+        f"time: {EXTENT_STATISTICS.time:.3f}s"
+    )
+
+
+def _write_processing_cache_summary(
+    terminalreporter: "TerminalReporter", processing_cache: ProcessingCache
+) -> None:
+    terminalreporter.write_sep("-", "pytest-qgis processing cache")
+    terminalreporter.write_line(
+        f"hits: {processing_cache.hits}, misses: {processing_cache.misses}, "
+        f"not cacheable: {processing_cache.bypasses}, "
+        f"size: {processing_cache.size_bytes() / 1024 / 1024:.1f} MB"
+    )
+
+
+def _write_benchmark_summary(
+    terminalreporter: "TerminalReporter", results: List[BenchmarkResult]
+) -> None:
+    terminalreporter.write_sep(
+        "-", f"pytest-qgis benchmarks (QGIS {Qgis.QGIS_VERSION})"
+    )
+    terminalreporter.write_line(
+        f"{'name':<60} {'rounds':>6} {'median (ms)':>12} {'p95 (ms)':>10}"
+    )
+    for result in results:
+        terminalreporter.write_line(
+            f"{result.name:<60} {result.rounds:>6} "
+            f"{result.median * 1000:>12.2f} {result.p95 * 1000:>10.2f}"
+        )
+
+
+def _write_layer_render_summary(
+    terminalreporter: "TerminalReporter",
+    layer_timings: List[Tuple[str, LayerRenderTiming]],
+) -> None:
+    slowest = sorted(layer_timings, key=lambda item: item[1].seconds, reverse=True)
+    terminalreporter.write_sep("-", "pytest-qgis slowest layers to render")
+    for nodeid, timing in slowest[:LAYER_RENDER_SUMMARY_COUNT]:
+        terminalreporter.write_line(
+            f"{timing.seconds * 1000:>10.2f} ms  {timing.name}  ({nodeid})"
+        )
+
+
+def _write_ordering_summary(
+    terminalreporter: "TerminalReporter", result: OrderingResult
+) -> None:
+    terminalreporter.write_sep("-", "pytest-qgis test ordering")
+    terminalreporter.write_line(
+        f"setups of expensive QGIS fixtures and markers: "
+        f"{result.setups_after} instead of {result.setups_before}, "
+        f"saved: {result.setups_before - result.setups_after}"
+    )
+    if result.expensive_position_before is not None:
+        terminalreporter.write_line(
+            f"first test using qgis_processing: "
+            f"{result.expensive_position_after} instead of "
+            f"{result.expensive_position_before} of {result.item_count}"
+        )
+
+
+def _write_snapshot_summary(
+    terminalreporter: "TerminalReporter", written_snapshots: List[Path]
+) -> None:
+    terminalreporter.write_sep(
+        "-", f"pytest-qgis snapshots: {len(written_snapshots)} written"
+    )
+    for path in written_snapshots:
+        terminalreporter.write_line(str(path))
+
+
+def _write_leak_summary(
+    terminalreporter: "TerminalReporter", leak_detector: LeakDetector
+) -> None:
+    leaking_tests = leak_detector.leaking_tests()
+    terminalreporter.write_sep(
+        "-",
+        f"pytest-qgis leak check: {len(leaking_tests)} of "
+        f"{len(leak_detector.deltas)} tests exceeded the thresholds",
+    )
+    for nodeid, delta in leaking_tests.items():
+        terminalreporter.write_line(f"{nodeid}: {format_delta(delta)}")
+
+
+def _parse_leak_thresholds(config: "Config") -> LeakThresholds:
+    return LeakThresholds(
+        **{
+            threshold: int(config.getini(key))
+            for threshold, key in LEAK_THRESHOLD_KEYS.items()
+        }
+    )
+
+
+def _get_cache_dir(config: "Config", name: str) -> Path:
+    """
+    Directory that persists between the sessions in the pytest cache.
+    Falls back to a session temporary directory if the cache is disabled.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        assert _QGIS_CONFIG_PATH
+        cache_dir = Path(_QGIS_CONFIG_PATH, name)
+        cache_dir.mkdir(exist_ok=True)
+        return cache_dir
+    # Cache.mkdir was added in pytest 7
+    mkdir = getattr(cache, "mkdir", None) or cache.makedir
+    return Path(str(mkdir(name)))
+
+
+def _get_crs_warmup_authids(config: "Config") -> List[str]:
+    authids = list(config.getini(CRS_WARMUP_AUTHIDS_KEY))
+    cache = getattr(config, "cache", None)
+    if cache is not None:
+        authids.extend(cache.get(CRS_WARMUP_CACHE_KEY, []))
+    return list(dict.fromkeys(authids))
 
 
 def _parse_show_map_marker(marker: "Mark") -> ShowMapSettings:  # noqa: C901, PLR0912 TODO: Fix complexity
     timeout = add_basemap = zoom_to_common_extent = extent = notset = object()
+    record = estimate_extent = False
 
     for kwarg, value in marker.kwargs.items():
         if kwarg == "timeout":
@@ -427,6 +1407,10 @@ def _parse_show_map_marker(marker: "Mark") -> ShowMapSettings:  # noqa: C901, PL
             zoom_to_common_extent = value
         elif kwarg == "extent":
             extent = value
+        elif kwarg == "record":
+            record = value
+        elif kwarg == "estimate_extent":
+            estimate_extent = value
         else:
             raise TypeError(
                 f"Invalid keyword argument for qgis_show_map marker: {kwarg}"
@@ -465,25 +1449,16 @@ def _parse_show_map_marker(marker: "Mark") -> ShowMapSettings:  # noqa: C901, PL
         extent = None
     elif not isinstance(extent, QgsRectangle):
         raise TypeError("Extent has to be of type QgsRectangle")
-    return ShowMapSettings(timeout, add_basemap, zoom_to_common_extent, extent)
-
-
-def _get_world_map_geopackage(tmp_path: Path) -> Path:
-    """Copy geopackage to the temporary directory and return the copy."""
-    world_map_gpkg = Path(
-        QgsApplication.pkgDataPath(), "resources", "data", "world_map.gpkg"
+    return ShowMapSettings(
+        timeout, add_basemap, zoom_to_common_extent, extent, record, estimate_extent
     )
-    assert world_map_gpkg.exists(), world_map_gpkg
-
-    # Copy the geopackage to allow modifications
-    return Path(shutil.copy(world_map_gpkg, tmp_path))
 
 
-def _get_countries_layer(geopackage: Path) -> QgsVectorLayer:
-    countries_layer = QgsVectorLayer(
-        f"{geopackage}|layername=countries",
-        "Natural Earth Countries",
-        "ogr",
-    )
-    assert countries_layer.isValid(), geopackage
-    return countries_layer
+def _get_basemap_cache(config: "Config") -> BasemapCache:
+    if config._qgis_basemap_cache is None:
+        assert _APP
+        config._qgis_basemap_cache = BasemapCache(
+            _get_cache_dir(config, "pytest_qgis_basemap"),
+            lambda: _initialize_processing(_APP),
+        )
+    return config._qgis_basemap_cache
@@ -16,20 +16,28 @@
 #  You should have received a copy of the GNU General Public License
 #  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
 #
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from qgis.core import (
+    QgsApplication,
     QgsFeature,
     QgsFieldConstraints,
     QgsGeometry,
+    QgsMapLayer,
+    QgsProject,
+    QgsRasterLayer,
+    QgsTask,
     QgsVectorDataProvider,
     QgsVectorLayer,
     QgsVectorLayerUtils,
 )
 from qgis.gui import QgisInterface, QgsAttributeDialog, QgsAttributeEditorContext
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QThread
 from qgis.PyQt.QtWidgets import QLabel, QWidget
 
 from pytest_qgis import utils
+from pytest_qgis.layer_cache import RASTER_PROVIDERS
 
 
 class QgisBot:
@@ -145,6 +153,69 @@ class QgisBot:
         assert feature_id, "Creating new feature failed"
         return layer.getFeature(feature_id[0])
 
+    def load_layers_concurrently(
+        self,
+        sources: Sequence[Tuple[str, str, str]],
+        add_to_project: bool = True,
+        timeout_milliseconds: int = utils.DEFAULT_WAIT_TIMEOUT_MILLISECONDS,
+    ) -> List[QgsMapLayer]:
+        """
+        Construct layers on worker threads using QgsTaskManager.
+
+        The providers of the layers are initialized in parallel and the
+        layers are moved to the main thread once constructed. The layers
+        are added to the project in a single batch.
+
+        :param sources: Tuples of uri, name and provider key of the layers.
+            Raster layers are created for the raster providers such as "gdal"
+            and vector layers for the others.
+        :param add_to_project: Whether to add the layers to the project.
+        :param timeout_milliseconds: Timeout for loading all the layers.
+        :return: Loaded layers in the order of the sources.
+        """
+        main_thread = QThread.currentThread()
+
+        def load_layer(
+            task: QgsTask,  # noqa: ARG001
+            uri: str,
+            name: str,
+            provider: str,
+        ) -> QgsMapLayer:
+            if provider in RASTER_PROVIDERS:
+                layer: QgsMapLayer = QgsRasterLayer(uri, name, provider)
+            else:
+                layer = QgsVectorLayer(uri, name, provider)
+            # Has to be pushed from the thread the layer was created in
+            layer.moveToThread(main_thread)
+            return layer
+
+        tasks = [
+            QgsTask.fromFunction(f"Load layer {name}", load_layer, uri, name, provider)
+            for uri, name, provider in sources
+        ]
+        task_manager = QgsApplication.taskManager()
+        for task in tasks:
+            task_manager.addTask(task)
+        try:
+            utils.wait_for_tasks(tasks, timeout_milliseconds)
+
+            layers: List[QgsMapLayer] = []
+            for task in tasks:
+                if task.exception is not None:
+                    raise task.exception
+                layers.append(task.returned_values)
+
+            invalid_layers = [layer.name() for layer in layers if not layer.isValid()]
+            if invalid_layers:
+                raise ValueError(f"Could not load layers: {', '.join(invalid_layers)}")
+        except Exception:
+            _discard_loaded_layers(tasks)
+            raise
+
+        if add_to_project:
+            QgsProject.instance().addMapLayers(layers)
+        return layers
+
     @staticmethod
     def get_qgs_attribute_dialog_widgets_by_name(
         widget: Union[QgsAttributeDialog, QWidget]
@@ -171,3 +242,16 @@ class QgisBot:
                 }
 
         return widgets_by_name
+
+
+def _discard_loaded_layers(tasks: Sequence[QgsTask]) -> None:
+    """Cancel the unfinished tasks and delete the layers already loaded."""
+    for task in tasks:
+        if not sip.isdeleted(task) and task.status() not in (
+            QgsTask.Complete,
+            QgsTask.Terminated,
+        ):
+            task.cancel()
+        layer = getattr(task, "returned_values", None)
+        if isinstance(layer, QgsMapLayer) and not sip.isdeleted(layer):
+            sip.delete(layer)
@@ -0,0 +1,268 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Block-wise comparison of rasters.
+
+This requires NumPy, which is shipped with most QGIS installations.
+"""
+
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from osgeo import gdal, osr
+from qgis.core import QgsRasterLayer
+
+# Strips are read several rows at a time up to this many pixels
+WINDOW_TARGET_PIXELS = 1024 * 1024
+# Allowed shift of the grid corners as a fraction of the pixel size
+GEOTRANSFORM_TOLERANCE = 0.01
+
+Window = Tuple[int, int, int, int]
+
+
+class _BandDifference:
+    """Summary of the differing pixels of a band."""
+
+    def __init__(self, band_number: int) -> None:
+        self.band_number = band_number
+        self.count = 0
+        self.max_difference = 0.0
+        self.rows = (np.inf, -np.inf)
+        self.columns = (np.inf, -np.inf)
+        # (x offset, y offset, differing pixels)
+        self.windows: List[Tuple[int, int, int]] = []
+
+    def add(self, window: Window, differs: "np.ndarray", difference: float) -> None:
+        x_offset, y_offset, _, _ = window
+        rows, columns = np.nonzero(differs)
+        self.count += len(rows)
+        self.max_difference = max(self.max_difference, difference)
+        self.rows = (
+            min(self.rows[0], y_offset + rows.min()),
+            max(self.rows[1], y_offset + rows.max()),
+        )
+        self.columns = (
+            min(self.columns[0], x_offset + columns.min()),
+            max(self.columns[1], x_offset + columns.max()),
+        )
+        self.windows.append((x_offset, y_offset, len(rows)))
+
+    def format(self, max_diff: int) -> str:
+        windows = ", ".join(
+            f"({x_offset}, {y_offset}): {count}"
+            for x_offset, y_offset, count in self.windows[:max_diff]
+        )
+        if len(self.windows) > max_diff:
+            windows += f", ... and {len(self.windows) - max_diff} more"
+        return (
+            f"band {self.band_number}: {self.count} differing pixels, "
+            f"max difference {self.max_difference:g}, "
+            f"rows {int(self.rows[0])}-{int(self.rows[1])}, "
+            f"columns {int(self.columns[0])}-{int(self.columns[1])}, "
+            f"windows (x, y): {windows}"
+        )
+
+
+def assert_rasters_equal(  # noqa: PLR0913
+    actual: Union[QgsRasterLayer, Path, str],
+    expected: Union[QgsRasterLayer, Path, str],
+    tolerance: float = 0.0,
+    relative_tolerance: float = 0.0,
+    bands: Optional[Sequence[int]] = None,
+    fail_fast: bool = False,
+    max_diff: int = 10,
+) -> None:
+    """See pytest_qgis.utils.assert_rasters_equal."""
+    actual_dataset = _open(actual)
+    expected_dataset = _open(expected)
+    _assert_same_grid(actual_dataset, expected_dataset)
+
+    if bands is None:
+        bands = range(1, expected_dataset.RasterCount + 1)
+    differences = []
+    for band_number in bands:
+        difference = _compare_band(
+            actual_dataset.GetRasterBand(band_number),
+            expected_dataset.GetRasterBand(band_number),
+            band_number,
+            tolerance,
+            relative_tolerance,
+            fail_fast,
+        )
+        if difference is not None:
+            differences.append(difference)
+            if fail_fast:
+                break
+
+    if differences:
+        raise AssertionError(
+            "\n".join(
+                [
+                    "Rasters are not equal"
+                    + (" (stopped at the first differing window)" if fail_fast else ""),
+                    *(difference.format(max_diff) for difference in differences),
+                ]
+            )
+        )
+
+
+def iter_windows(band: gdal.Band) -> Iterator[Window]:
+    """
+    Windows (x offset, y offset, width, height) covering the band, aligned
+    to the native blocks of the band. Narrow blocks such as strips are
+    combined up to WINDOW_TARGET_PIXELS.
+    """
+    block_width, block_height = band.GetBlockSize()
+    width, height = band.XSize, band.YSize
+    if block_width >= width:
+        blocks_per_window = max(1, WINDOW_TARGET_PIXELS // (width * block_height))
+        block_height *= blocks_per_window
+    for y_offset in range(0, height, block_height):
+        window_height = min(block_height, height - y_offset)
+        for x_offset in range(0, width, block_width):
+            yield (
+                x_offset,
+                y_offset,
+                min(block_width, width - x_offset),
+                window_height,
+            )
+
+
+def _open(raster: Union[QgsRasterLayer, Path, str]) -> gdal.Dataset:
+    if isinstance(raster, QgsRasterLayer):
+        if raster.providerType() != "gdal":
+            raise TypeError(
+                f"Expected a raster layer of gdal provider, got {raster.providerType()}"
+            )
+        raster = raster.source()
+    dataset = gdal.Open(str(raster), gdal.GA_ReadOnly)
+    if dataset is None:
+        raise ValueError(f"Could not open raster {raster}")
+    return dataset
+
+
+def _assert_same_grid(actual: gdal.Dataset, expected: gdal.Dataset) -> None:
+    actual_shape = (actual.RasterXSize, actual.RasterYSize, actual.RasterCount)
+    expected_shape = (expected.RasterXSize, expected.RasterYSize, expected.RasterCount)
+    if actual_shape != expected_shape:
+        raise AssertionError(
+            f"Raster size (width, height, bands) differs: "
+            f"{actual_shape} != {expected_shape}"
+        )
+    expected_transform = expected.GetGeoTransform()
+    pixel_size = min(abs(expected_transform[1]), abs(expected_transform[5]))
+    if not np.allclose(
+        _get_corners(actual),
+        _get_corners(expected),
+        rtol=0,
+        atol=GEOTRANSFORM_TOLERANCE * pixel_size,
+    ):
+        raise AssertionError(
+            f"Geotransform differs: "
+            f"{actual.GetGeoTransform()} != {expected.GetGeoTransform()}"
+        )
+    actual_srs = actual.GetSpatialRef()
+    expected_srs = expected.GetSpatialRef()
+    if (actual_srs is None) != (expected_srs is None) or (
+        actual_srs is not None and not actual_srs.IsSame(expected_srs)
+    ):
+        raise AssertionError(
+            f"CRS differs: {_describe_srs(actual_srs)} != {_describe_srs(expected_srs)}"
+        )
+
+
+def _get_corners(dataset: gdal.Dataset) -> "np.ndarray":
+    """Coordinates of the corners of the grid."""
+    transform = dataset.GetGeoTransform()
+    columns = np.array([0, dataset.RasterXSize, 0, dataset.RasterXSize])
+    rows = np.array([0, 0, dataset.RasterYSize, dataset.RasterYSize])
+    return np.array(
+        [
+            transform[0] + columns * transform[1] + rows * transform[2],
+            transform[3] + columns * transform[4] + rows * transform[5],
+        ]
+    )
+
+
+def _describe_srs(srs: Optional[osr.SpatialReference]) -> str:
+    if srs is None:
+        return "no CRS"
+    authority = srs.GetAuthorityName(None)
+    code = srs.GetAuthorityCode(None)
+    return f"{authority}:{code}" if authority and code else srs.GetName()
+
+
+def _compare_band(  # noqa: PLR0913
+    actual: gdal.Band,
+    expected: gdal.Band,
+    band_number: int,
+    tolerance: float,
+    relative_tolerance: float,
+    fail_fast: bool,
+) -> Optional[_BandDifference]:
+    difference = None
+    for window in iter_windows(expected):
+        actual_values = actual.ReadAsArray(*window)
+        expected_values = expected.ReadAsArray(*window)
+        actual_nodata = _nodata_mask(actual_values, actual.GetNoDataValue())
+        expected_nodata = _nodata_mask(expected_values, expected.GetNoDataValue())
+
+        # Complex values are compared by the modulus of their difference
+        dtype = (
+            np.complex128
+            if np.iscomplexobj(actual_values) or np.iscomplexobj(expected_values)
+            else np.float64
+        )
+        actual_values = actual_values.astype(dtype)
+        expected_values = expected_values.astype(dtype)
+        close = np.isclose(
+            actual_values,
+            expected_values,
+            rtol=relative_tolerance,
+            atol=tolerance,
+            equal_nan=True,
+        )
+        differs = (actual_nodata != expected_nodata) | (
+            ~actual_nodata & ~expected_nodata & ~close
+        )
+        if not differs.any():
+            continue
+
+        # Nodata and NaN mismatches are counted but have no magnitude
+        absolute_differences = np.abs(actual_values - expected_values)[
+            differs & ~actual_nodata & ~expected_nodata
+        ]
+        absolute_differences = absolute_differences[~np.isnan(absolute_differences)]
+        max_difference = (
+            float(absolute_differences.max()) if absolute_differences.size else 0.0
+        )
+        if difference is None:
+            difference = _BandDifference(band_number)
+        difference.add(window, differs, max_difference)
+        if fail_fast:
+            break
+    return difference
+
+
+def _nodata_mask(values: "np.ndarray", nodata: Optional[float]) -> "np.ndarray":
+    if nodata is None:
+        return np.zeros(values.shape, dtype=bool)
+    if np.isnan(nodata):
+        return np.isnan(values)
+    return values == nodata
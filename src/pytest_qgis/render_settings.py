@@ -0,0 +1,72 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from collections import namedtuple
+from typing import Optional
+
+from qgis.core import QgsApplication
+from qgis.gui import QgsMapCanvas
+
+# None values leave the current setting as it is
+RenderSettings = namedtuple(
+    "RenderSettings",
+    ["parallel_rendering", "render_cache", "preview_jobs", "max_threads"],
+)
+
+
+def get_render_settings(canvas: QgsMapCanvas) -> RenderSettings:
+    """Get the effective render settings of the canvas and the application."""
+    return RenderSettings(
+        canvas.isParallelRenderingEnabled(),
+        canvas.isCachingEnabled(),
+        canvas.previewJobsEnabled(),
+        QgsApplication.maxThreads(),
+    )
+
+
+def apply_render_settings(
+    canvas: QgsMapCanvas, settings: RenderSettings
+) -> RenderSettings:
+    """
+    Apply the render settings to the canvas and the application.
+
+    :return: The effective settings before applying, for restoring them.
+    """
+    previous = get_render_settings(canvas)
+    if settings.parallel_rendering is not None:
+        canvas.setParallelRenderingEnabled(settings.parallel_rendering)
+    if settings.render_cache is not None:
+        canvas.setCachingEnabled(settings.render_cache)
+    if settings.preview_jobs is not None:
+        canvas.setPreviewJobsEnabled(settings.preview_jobs)
+    if settings.max_threads is not None:
+        # -1 uses all the cores
+        QgsApplication.setMaxThreads(settings.max_threads)
+    return previous
+
+
+def format_render_settings(settings: RenderSettings) -> str:
+    def on_off(value: Optional[bool]) -> str:
+        return "on" if value else "off"
+
+    max_threads = "all cores" if settings.max_threads < 1 else settings.max_threads
+    return (
+        f"parallel rendering: {on_off(settings.parallel_rendering)}, "
+        f"render cache: {on_off(settings.render_cache)}, "
+        f"preview jobs: {on_off(settings.preview_jobs)}, "
+        f"max threads: {max_threads}"
+    )
@@ -0,0 +1,154 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import time
+from collections import namedtuple
+from typing import Any, List, Optional, Sequence, Tuple
+
+from qgis.core import QgsMapLayer, QgsMapRendererSequentialJob, QgsMapSettings
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QEventLoop, QTimer
+
+from pytest_qgis import utils
+
+LayerRenderTiming = namedtuple("LayerRenderTiming", ["layer_id", "name", "seconds"])
+RENDER_TIME_PROPERTY = "qgis_render_time"
+LAYER_RENDER_TIMES_PROPERTY = "qgis_layer_render_times"
+
+
+class QgisRenderTimer:
+    """
+    Renders the canvas and measures the rendering times.
+
+    The times are added to the user properties of the test, so that they
+    are included in the reports such as JUnit XML, and the layer times are
+    collected for the slowest layers shown in the terminal summary.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        canvas: QgsMapCanvas,
+        user_properties: List[Tuple[str, Any]],
+        layer_timings: List[Tuple[str, LayerRenderTiming]],
+    ) -> None:
+        self._name = name
+        self._canvas = canvas
+        self._user_properties = user_properties
+        self._layer_timings = layer_timings
+
+    def refresh_and_wait(
+        self, timeout_milliseconds: int = utils.DEFAULT_WAIT_TIMEOUT_MILLISECONDS
+    ) -> float:
+        """
+        Refresh the canvas and wait until it has finished rendering.
+
+        :return: Rendering time in seconds.
+        :raises TimeoutError: if the rendering is not finished within the timeout.
+        """
+        seconds = refresh_and_wait(self._canvas, timeout_milliseconds)
+        self._user_properties.append((RENDER_TIME_PROPERTY, seconds))
+        return seconds
+
+    def layer_timings(
+        self, layers: Optional[Sequence[QgsMapLayer]] = None
+    ) -> List[LayerRenderTiming]:
+        """
+        Render the layers one at a time and measure their rendering times.
+
+        :param layers: Layers to render, defaults to the layers of the canvas.
+        :return: Rendering times of the layers, the slowest first.
+        """
+        timings = render_layer_timings(self._canvas, layers)
+        self._user_properties.append(
+            (
+                LAYER_RENDER_TIMES_PROPERTY,
+                {timing.name: timing.seconds for timing in timings},
+            )
+        )
+        self._layer_timings.extend((self._name, timing) for timing in timings)
+        return timings
+
+
+def refresh_and_wait(
+    canvas: QgsMapCanvas,
+    timeout_milliseconds: int = utils.DEFAULT_WAIT_TIMEOUT_MILLISECONDS,
+) -> float:
+    """
+    Refresh the canvas and wait until it has finished rendering.
+
+    :return: Time from the refresh until the rendering was finished in seconds.
+    :raises TimeoutError: if the rendering is not finished within the timeout.
+    """
+    if canvas.isFrozen():
+        raise ValueError("Frozen canvas is not rendered")
+    if not canvas.renderFlag():
+        raise ValueError("Canvas with rendering disabled is not rendered")
+    if not canvas.mapSettings().hasValidSettings():
+        raise ValueError("Canvas has no valid extent or size to render")
+
+    loop = QEventLoop()
+    refreshed = []
+
+    def on_refreshed() -> None:
+        refreshed.append(True)
+        loop.quit()
+
+    canvas.mapCanvasRefreshed.connect(on_refreshed)
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+    start = time.perf_counter()
+    try:
+        canvas.refresh()
+        timer.start(timeout_milliseconds)
+        loop.exec_()
+    finally:
+        timer.stop()
+        canvas.mapCanvasRefreshed.disconnect(on_refreshed)
+
+    if not refreshed:
+        raise TimeoutError(f"Canvas was not rendered within {timeout_milliseconds} ms")
+    return time.perf_counter() - start
+
+
+def render_layer_timings(
+    canvas: QgsMapCanvas, layers: Optional[Sequence[QgsMapLayer]] = None
+) -> List[LayerRenderTiming]:
+    """
+    Render the layers of the canvas one at a time with the settings of the
+    canvas and measure the rendering time of each layer.
+
+    The per layer times of the canvas render job are not available in
+    PyQGIS, so the layers are rendered in separate sequential jobs.
+
+    :param canvas: Canvas whose map settings are used.
+    :param layers: Layers to render, defaults to the layers of the canvas.
+    :return: Rendering times of the layers, the slowest first.
+    """
+    timings = []
+    for layer in canvas.layers() if layers is None else layers:
+        settings = QgsMapSettings(canvas.mapSettings())
+        settings.setLayers([layer])
+        job = QgsMapRendererSequentialJob(settings)
+        start = time.perf_counter()
+        job.start()
+        job.waitForFinished()
+        timings.append(
+            LayerRenderTiming(layer.id(), layer.name(), time.perf_counter() - start)
+        )
+    return sorted(timings, key=lambda timing: timing.seconds, reverse=True)
@@ -0,0 +1,289 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Snapshots of layer contents in compact columnar files.
+
+This requires NumPy, which is shipped with most QGIS installations.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer, QgsWkbTypes
+from qgis.PyQt.QtCore import QVariant
+
+from pytest_qgis import utils
+
+SNAPSHOT_SUFFIX = ".npz"
+DIGEST_KEY = "digest"
+WKT_PREVIEW_LENGTH = 80
+
+INTEGER_TYPES = (QVariant.Int, QVariant.UInt, QVariant.LongLong)
+FLOAT_TYPES = (QVariant.Double,)
+
+
+def snapshot_layer(
+    layer: QgsVectorLayer, batch_size: int = utils.MEMORY_LAYER_BATCH_SIZE
+) -> Dict[str, "np.ndarray"]:
+    """
+    Columnar arrays of the schema, the attributes and the geometries of the
+    layer in the iteration order of the features.
+
+    Integer and double fields are stored as numeric arrays and other fields
+    as strings, each with a mask of the NULL values. The geometries are
+    stored as a single WKB blob with the offsets of the features. The digest
+    of the arrays is stored under "digest".
+    """
+    fields = layer.fields()
+    field_count = len(fields)
+    values: List[List[object]] = [[] for _ in range(field_count)]
+    nulls: List[List[bool]] = [[] for _ in range(field_count)]
+    wkbs: List[bytes] = []
+    for batch in utils.iter_feature_batches(layer, batch_size=batch_size):
+        for feature in batch:
+            for index, value in enumerate(feature.attributes()):
+                is_null = value is None or (
+                    isinstance(value, QVariant) and value.isNull()
+                )
+                nulls[index].append(is_null)
+                values[index].append(None if is_null else value)
+            wkbs.append(_get_wkb(feature))
+
+    arrays = {
+        "schema": np.array(
+            [f"{field.name()}:{field.typeName()}" for field in fields], dtype=str
+        ),
+        "layer": np.array(
+            [QgsWkbTypes.displayString(layer.wkbType()), layer.crs().authid()],
+            dtype=str,
+        ),
+        "wkb": np.frombuffer(b"".join(wkbs), dtype=np.uint8),
+        "wkb_offsets": np.cumsum([0, *map(len, wkbs)], dtype=np.int64),
+    }
+    for index, field in enumerate(fields):
+        arrays[f"field_{index}"] = _to_column(field.type(), values[index])
+        arrays[f"null_{index}"] = np.array(nulls[index], dtype=bool)
+    arrays[DIGEST_KEY] = np.array(_get_digest(arrays), dtype=str)
+    return arrays
+
+
+class QgisSnapshot:
+    """
+    Compares layers against the snapshots saved by the previous runs.
+
+    The snapshots are keyed by the node id of the test. The digest of the
+    layer is compared first, and the snapshot arrays are read and compared
+    only if the digests differ. With update=True missing and differing
+    snapshots are written instead of failing the test.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        nodeid: str,
+        update: bool,
+        written: List[Path],
+    ) -> None:
+        self._directory = directory
+        self._file_name = re.sub(r"[^\w.-]+", "_", nodeid)
+        self._update = update
+        self._written = written
+        self._index = 0
+
+    def assert_match(
+        self,
+        layer: QgsVectorLayer,
+        name: Optional[str] = None,
+        max_diff: int = 10,
+        batch_size: int = utils.MEMORY_LAYER_BATCH_SIZE,
+    ) -> None:
+        """
+        Assert that the layer matches its snapshot.
+
+        :param layer: Layer to compare.
+        :param name: Name of the snapshot within the test, defaults to the
+            index of the call in the test.
+        :param max_diff: Maximum number of differing features shown.
+        :param batch_size: Number of features read at a time.
+        """
+        if name is None:
+            name = str(self._index)
+        self._index += 1
+        path = self._directory / f"{self._file_name}.{name}{SNAPSHOT_SUFFIX}"
+        arrays = snapshot_layer(layer, batch_size)
+
+        if not path.exists():
+            if not self._update:
+                raise AssertionError(
+                    f"Snapshot {path} does not exist. "
+                    f"Run with --qgis_snapshot_update to create it."
+                )
+            self._write(path, arrays)
+            return
+
+        with np.load(path, allow_pickle=False) as snapshot:
+            # Only the digest member of the archive is read if the digests match
+            if str(snapshot[DIGEST_KEY]) == str(arrays[DIGEST_KEY]):
+                return
+            if not self._update:
+                raise AssertionError(
+                    f"Layer does not match the snapshot {path}:\n"
+                    + _format_diff(arrays, snapshot, max_diff)
+                )
+        self._write(path, arrays)
+
+    def _write(self, path: Path, arrays: Dict[str, "np.ndarray"]) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first in case of concurrent sessions
+        temporary_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with temporary_path.open("wb") as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(temporary_path, path)
+        finally:
+            with contextlib.suppress(OSError):
+                temporary_path.unlink()
+        self._written.append(path)
+
+
+def _get_wkb(feature: QgsFeature) -> bytes:
+    if not feature.hasGeometry():
+        return b""
+    return bytes(feature.geometry().asWkb())
+
+
+def _to_column(field_type: int, values: List[object]) -> "np.ndarray":
+    if field_type in INTEGER_TYPES:
+        return np.array([0 if value is None else value for value in values], np.int64)
+    if field_type in FLOAT_TYPES:
+        return np.array(
+            [0.0 if value is None else value for value in values], np.float64
+        )
+    return np.array(["" if value is None else str(value) for value in values], str)
+
+
+def _get_digest(arrays: Dict[str, "np.ndarray"]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for key in sorted(arrays):
+        array = arrays[key]
+        digest.update(f"{key}|{array.dtype.str}|{array.shape}|".encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _format_diff(
+    actual: Dict[str, "np.ndarray"], expected: "np.lib.npyio.NpzFile", max_diff: int
+) -> str:
+    for key, title in (("layer", "Geometry type and CRS"), ("schema", "Fields")):
+        if not np.array_equal(actual[key], expected[key]):
+            return f"{title} differ: {actual[key].tolist()} != {expected[key].tolist()}"
+
+    actual_count = len(actual["wkb_offsets"]) - 1
+    expected_count = len(expected["wkb_offsets"]) - 1
+    lines = []
+    if actual_count != expected_count:
+        lines.append(f"Feature count differs: {actual_count} != {expected_count}")
+    count = min(actual_count, expected_count)
+
+    field_names = [field.split(":", 1)[0] for field in actual["schema"].tolist()]
+    columns = [
+        (
+            _Column(actual, index, count),
+            _Column(expected, index, count),
+        )
+        for index in range(len(field_names))
+    ]
+    actual_geometries = _Geometries(actual, count)
+    expected_geometries = _Geometries(expected, count)
+
+    column_differs = [
+        actual_column.differs_from(expected_column)
+        for actual_column, expected_column in columns
+    ]
+    differs = actual_geometries.lengths != expected_geometries.lengths
+    for differing_values in column_differs:
+        differs |= differing_values
+    # Geometries of the same length are compared only if the rest is equal
+    for row in np.flatnonzero(~differs).tolist():
+        differs[row] = actual_geometries[row] != expected_geometries[row]
+
+    rows = np.flatnonzero(differs).tolist()
+    lines.append(f"{len(rows)} differing features")
+    for row in rows[:max_diff]:
+        descriptions = [
+            f"{name}: {actual_column[row]!r} != {expected_column[row]!r}"
+            for name, (actual_column, expected_column), differing_values in zip(
+                field_names, columns, column_differs
+            )
+            if differing_values[row]
+        ]
+        if actual_geometries[row] != expected_geometries[row]:
+            descriptions.append(
+                f"geometry: {_format_wkb(actual_geometries[row])} != "
+                f"{_format_wkb(expected_geometries[row])}"
+            )
+        lines.append(f"  feature {row}: {', '.join(descriptions)}")
+    if len(rows) > max_diff:
+        lines.append(f"  ... and {len(rows) - max_diff} more")
+    return "\n".join(lines)
+
+
+class _Column:
+    """Values of a field with None for NULL values."""
+
+    def __init__(self, arrays: Dict[str, "np.ndarray"], index: int, count: int) -> None:
+        self.values = arrays[f"field_{index}"][:count]
+        self.nulls = arrays[f"null_{index}"][:count]
+
+    def __getitem__(self, row: int) -> object:
+        return None if self.nulls[row] else self.values[row].item()
+
+    def differs_from(self, other: "_Column") -> "np.ndarray":
+        differing_values = self.values != other.values
+        if self.values.dtype.kind == "f":
+            differing_values &= ~(np.isnan(self.values) & np.isnan(other.values))
+        return (self.nulls != other.nulls) | (~self.nulls & differing_values)
+
+
+class _Geometries:
+    """WKB of the features."""
+
+    def __init__(self, arrays: Dict[str, "np.ndarray"], count: int) -> None:
+        self._wkb = arrays["wkb"].tobytes()
+        self._offsets = arrays["wkb_offsets"]
+        self.lengths = np.diff(self._offsets)[:count]
+
+    def __getitem__(self, row: int) -> bytes:
+        return self._wkb[self._offsets[row] : self._offsets[row + 1]]
+
+
+def _format_wkb(wkb: bytes) -> str:
+    if not wkb:
+        return "no geometry"
+    geometry = QgsGeometry()
+    geometry.fromWkb(wkb)
+    wkt = geometry.asWkt()
+    if len(wkt) > WKT_PREVIEW_LENGTH:
+        wkt = f"{wkt[:WKT_PREVIEW_LENGTH]}..."
+    return wkt
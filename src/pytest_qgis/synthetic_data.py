@@ -0,0 +1,393 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Generators for synthetic test data.
+
+These require NumPy, which is shipped with most QGIS installations.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from osgeo import gdal, gdal_array, ogr, osr
+from qgis.core import (
+    QgsFeature,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from pytest_qgis.crs_cache import get_crs
+from pytest_qgis.utils import DEFAULT_EPSG, transform_rectangle
+
+BATCH_SIZE = 100_000
+DEFAULT_FIELDS = {"value": "real"}
+GEOMETRY_TYPES = ("Point", "LineString", "Polygon")
+FIELD_TYPES = {
+    "int": (ogr.OFTInteger64, QVariant.LongLong),
+    "real": (ogr.OFTReal, QVariant.Double),
+    "string": (ogr.OFTString, QVariant.String),
+}
+# Size of generated lines and polygons relative to the extent width
+GEOMETRY_SIZE_RATIO = 0.001
+DEFAULT_TILE_SIZE = 256
+RASTER_MAX_VALUE = 10_000
+
+_WKB_DTYPES = {
+    "Point": np.dtype(
+        [("byte_order", "u1"), ("type", "<u4"), ("x", "<f8"), ("y", "<f8")]
+    ),
+    "LineString": np.dtype(
+        [("byte_order", "u1"), ("type", "<u4"), ("n_points", "<u4")]
+        + [(f"{axis}{i}", "<f8") for i in range(2) for axis in "xy"]
+    ),
+    "Polygon": np.dtype(
+        [
+            ("byte_order", "u1"),
+            ("type", "<u4"),
+            ("n_rings", "<u4"),
+            ("n_points", "<u4"),
+        ]
+        + [(f"{axis}{i}", "<f8") for i in range(5) for axis in "xy"]
+    ),
+}
+_OGR_GEOMETRY_TYPES = {
+    "Point": ogr.wkbPoint,
+    "LineString": ogr.wkbLineString,
+    "Polygon": ogr.wkbPolygon,
+}
+
+
+def synthetic_layer_key(  # noqa: PLR0913
+    feature_count: int,
+    geometry_type: str,
+    crs: str,
+    fields: Dict[str, str],
+    seed: int,
+    extent: Optional[QgsRectangle],
+) -> str:
+    """Key identifying the synthetic dataset generated with the parameters."""
+    parameters = {
+        "feature_count": feature_count,
+        "geometry_type": geometry_type,
+        "crs": crs,
+        "fields": fields,
+        "seed": seed,
+        "extent": extent.toString(8) if extent is not None else None,
+    }
+    return hashlib.sha1(
+        json.dumps(parameters, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def write_synthetic_geopackage(  # noqa: PLR0913
+    path: Path,
+    feature_count: int,
+    geometry_type: str = "Point",
+    crs: str = DEFAULT_EPSG,
+    fields: Optional[Dict[str, str]] = None,
+    seed: int = 0,
+    extent: Optional[QgsRectangle] = None,
+    layer_name: str = "synthetic",
+) -> Path:
+    """
+    Write random features into a GeoPackage with GDAL.
+
+    The features are written in large transactions and the file is moved
+    into place only after it is complete.
+
+    :param path: Path of the GeoPackage to write.
+    :param feature_count: Number of features.
+    :param geometry_type: One of GEOMETRY_TYPES.
+    :param crs: Authid of the coordinate reference system.
+    :param fields: Field types by field name. Types are the keys of FIELD_TYPES.
+    :param seed: Seed of the random number generator.
+    :param extent: Extent of the features in the given crs. Defaults to the
+        bounds of the crs.
+    :param layer_name: Name of the layer in the GeoPackage.
+    :return: Path to the written GeoPackage.
+    """
+    fields = DEFAULT_FIELDS if fields is None else fields
+    _validate_parameters(geometry_type, fields)
+
+    srs = osr.SpatialReference()
+    srs.SetFromUserInput(crs)
+    if hasattr(osr, "OAMS_TRADITIONAL_GIS_ORDER"):
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+    temporary_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    data_source = ogr.GetDriverByName("GPKG").CreateDataSource(str(temporary_path))
+    try:
+        layer = data_source.CreateLayer(
+            layer_name, srs, _OGR_GEOMETRY_TYPES[geometry_type]
+        )
+        for field_name, field_type in fields.items():
+            layer.CreateField(ogr.FieldDefn(field_name, FIELD_TYPES[field_type][0]))
+        definition = layer.GetLayerDefn()
+
+        for wkbs, attributes in _generate_batches(
+            feature_count, geometry_type, crs, fields, seed, extent
+        ):
+            layer.StartTransaction()
+            for i, wkb in enumerate(wkbs):
+                feature = ogr.Feature(definition)
+                for field_index, values in enumerate(attributes):
+                    feature.SetField(field_index, values[i])
+                feature.SetGeometryDirectly(ogr.CreateGeometryFromWkb(wkb))
+                layer.CreateFeature(feature)
+            layer.CommitTransaction()
+    finally:
+        data_source = None  # closes the data source
+
+    os.replace(temporary_path, path)
+    return path
+
+
+def create_synthetic_memory_layer(  # noqa: PLR0913
+    feature_count: int,
+    geometry_type: str = "Point",
+    crs: str = DEFAULT_EPSG,
+    fields: Optional[Dict[str, str]] = None,
+    seed: int = 0,
+    extent: Optional[QgsRectangle] = None,
+    name: str = "synthetic",
+) -> QgsVectorLayer:
+    """
+    Create a memory layer with random features.
+
+    The features are added in batches of BATCH_SIZE with addFeatures.
+    Parameters are the same as with write_synthetic_geopackage.
+    """
+    fields = DEFAULT_FIELDS if fields is None else fields
+    _validate_parameters(geometry_type, fields)
+
+    layer = QgsVectorLayer(f"{geometry_type}?crs={crs}", name, "memory")
+    provider = layer.dataProvider()
+    provider.addAttributes(
+        [
+            QgsField(field_name, FIELD_TYPES[field_type][1])
+            for field_name, field_type in fields.items()
+        ]
+    )
+    layer.updateFields()
+    qgs_fields: QgsFields = layer.fields()
+
+    for wkbs, attributes in _generate_batches(
+        feature_count, geometry_type, crs, fields, seed, extent
+    ):
+        features = []
+        for i, wkb in enumerate(wkbs):
+            feature = QgsFeature(qgs_fields)
+            feature.setAttributes([values[i] for values in attributes])
+            geometry = QgsGeometry()
+            geometry.fromWkb(wkb)
+            feature.setGeometry(geometry)
+            features.append(feature)
+        provider.addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+def write_synthetic_raster(  # noqa: PLR0913
+    path: str,
+    width: int,
+    height: int,
+    band_count: int = 1,
+    data_type: str = "Float32",
+    crs: str = DEFAULT_EPSG,
+    extent: Optional[QgsRectangle] = None,
+    tile_size: Optional[int] = DEFAULT_TILE_SIZE,
+    compression: Optional[str] = None,
+    overviews: Sequence[int] = (),
+    nodata: Optional[float] = None,
+    seed: int = 0,
+) -> str:
+    """
+    Write a GeoTIFF with random values with GDAL.
+
+    The values are written in strips of tile_size rows, so the whole
+    raster is never held in memory.
+
+    :param path: Path of the raster. Can be in the /vsimem/ filesystem.
+    :param width: Width in pixels.
+    :param height: Height in pixels.
+    :param band_count: Number of bands.
+    :param data_type: GDAL data type name, e.g. Byte, Int16 or Float32.
+    :param crs: Authid of the coordinate reference system.
+    :param extent: Extent of the raster in the given crs. Defaults to the
+        bounds of the crs.
+    :param tile_size: Width and height of the tiles. None writes a striped tiff.
+    :param compression: GeoTIFF compression, e.g. DEFLATE or LZW.
+    :param overviews: Overview levels to build, e.g. (2, 4, 8).
+    :param nodata: No data value of the bands.
+    :param seed: Seed of the random number generator.
+    :return: The path of the raster.
+    """
+    gdal_data_type = gdal.GetDataTypeByName(data_type)
+    if gdal_data_type == gdal.GDT_Unknown:
+        raise ValueError(f"Invalid raster data type {data_type}")
+    numpy_data_type = gdal_array.GDALTypeCodeToNumericTypeCode(gdal_data_type)
+    if extent is None:
+        extent = _default_extent(crs)
+
+    options = ["BIGTIFF=IF_SAFER"]
+    if tile_size:
+        options += ["TILED=YES", f"BLOCKXSIZE={tile_size}", f"BLOCKYSIZE={tile_size}"]
+    if compression:
+        options.append(f"COMPRESS={compression}")
+
+    dataset = gdal.GetDriverByName("GTiff").Create(
+        path, width, height, band_count, gdal_data_type, options=options
+    )
+    try:
+        dataset.SetProjection(get_crs(crs).toWkt())
+        dataset.SetGeoTransform(
+            (
+                extent.xMinimum(),
+                extent.width() / width,
+                0,
+                extent.yMaximum(),
+                0,
+                -extent.height() / height,
+            )
+        )
+        rng = np.random.default_rng(seed)
+        strip_height = tile_size or DEFAULT_TILE_SIZE
+        for band_number in range(1, band_count + 1):
+            band = dataset.GetRasterBand(band_number)
+            if nodata is not None:
+                band.SetNoDataValue(nodata)
+            for y_offset in range(0, height, strip_height):
+                rows = min(strip_height, height - y_offset)
+                values = _random_pixel_values(rng, (rows, width), numpy_data_type)
+                band.WriteArray(values, 0, y_offset)
+        if overviews:
+            dataset.BuildOverviews("NEAREST", list(overviews))
+    finally:
+        dataset = None  # closes the data set
+
+    return path
+
+
+def _validate_parameters(geometry_type: str, fields: Dict[str, str]) -> None:
+    if geometry_type not in GEOMETRY_TYPES:
+        raise ValueError(
+            f"Invalid geometry type {geometry_type}. "
+            f"Use one of {', '.join(GEOMETRY_TYPES)}"
+        )
+    for field_name, field_type in fields.items():
+        if field_type not in FIELD_TYPES:
+            raise ValueError(
+                f"Invalid type {field_type} for field {field_name}. "
+                f"Use one of {', '.join(FIELD_TYPES)}"
+            )
+
+
+def _generate_batches(  # noqa: PLR0913
+    feature_count: int,
+    geometry_type: str,
+    crs: str,
+    fields: Dict[str, str],
+    seed: int,
+    extent: Optional[QgsRectangle],
+) -> Iterator[Tuple[List[bytes], List[list]]]:
+    """Generate WKB geometries and attribute columns in batches."""
+    if extent is None:
+        extent = _default_extent(crs)
+    rng = np.random.default_rng(seed)
+
+    for start in range(0, feature_count, BATCH_SIZE):
+        size = min(BATCH_SIZE, feature_count - start)
+        wkb_array = _random_wkb_array(rng, size, geometry_type, extent)
+        item_size = wkb_array.dtype.itemsize
+        buffer = wkb_array.tobytes()
+        wkbs = [buffer[i : i + item_size] for i in range(0, len(buffer), item_size)]
+        attributes = [
+            _random_values(rng, size, field_type).tolist()
+            for field_type in fields.values()
+        ]
+        yield wkbs, attributes
+
+
+def _random_wkb_array(
+    rng: "np.random.Generator", size: int, geometry_type: str, extent: QgsRectangle
+) -> np.ndarray:
+    """Build little endian WKB records of random geometries."""
+    wkb_array = np.zeros(size, dtype=_WKB_DTYPES[geometry_type])
+    wkb_array["byte_order"] = 1
+    wkb_array["type"] = _OGR_GEOMETRY_TYPES[geometry_type]
+
+    x = rng.uniform(extent.xMinimum(), extent.xMaximum(), size)
+    y = rng.uniform(extent.yMinimum(), extent.yMaximum(), size)
+    if geometry_type == "Point":
+        wkb_array["x"] = x
+        wkb_array["y"] = y
+        return wkb_array
+
+    geometry_size = extent.width() * GEOMETRY_SIZE_RATIO
+    if geometry_type == "LineString":
+        angle = rng.uniform(0, 2 * np.pi, size)
+        wkb_array["n_points"] = 2
+        wkb_array["x0"], wkb_array["y0"] = x, y
+        wkb_array["x1"] = x + np.cos(angle) * geometry_size
+        wkb_array["y1"] = y + np.sin(angle) * geometry_size
+        return wkb_array
+
+    # Closed square rings
+    wkb_array["n_rings"] = 1
+    wkb_array["n_points"] = 5
+    corners = ((0, 0), (1, 0), (1, 1), (0, 1), (0, 0))
+    for i, (dx, dy) in enumerate(corners):
+        wkb_array[f"x{i}"] = x + dx * geometry_size
+        wkb_array[f"y{i}"] = y + dy * geometry_size
+    return wkb_array
+
+
+def _random_pixel_values(
+    rng: "np.random.Generator", shape: Tuple[int, int], data_type: type
+) -> np.ndarray:
+    if np.issubdtype(data_type, np.integer):
+        maximum = min(np.iinfo(data_type).max, RASTER_MAX_VALUE)
+        return rng.integers(0, maximum, shape, endpoint=True).astype(data_type)
+    if np.issubdtype(data_type, np.complexfloating):
+        return (rng.random(shape) + 1j * rng.random(shape)).astype(data_type)
+    return (rng.random(shape) * RASTER_MAX_VALUE).astype(data_type)
+
+
+def _default_extent(crs: str) -> QgsRectangle:
+    """Bounds of the crs in the crs units."""
+    return transform_rectangle(
+        get_crs(crs).bounds(), get_crs(DEFAULT_EPSG), get_crs(crs)
+    )
+
+
+def _random_values(
+    rng: "np.random.Generator", size: int, field_type: str
+) -> np.ndarray:
+    if field_type == "int":
+        return rng.integers(0, 1_000_000, size)
+    if field_type == "real":
+        return rng.uniform(0, 1000, size)
+    return np.char.add("value_", rng.integers(0, 1_000_000, size).astype(str))
@@ -0,0 +1,157 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from qgis.core import QgsTask, QgsTaskManager
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QEventLoop, Qt, QTimer
+
+from pytest_qgis import utils
+
+TaskTiming = namedtuple(
+    "TaskTiming",
+    ["task_id", "description", "queue_time", "run_time", "total_time", "status"],
+)
+
+
+class QgisTaskManager:
+    """
+    Controls QgsTaskManager in tests and records the durations of the tasks.
+
+    The durations are measured from the signals of the tasks: the queue time
+    from adding the task until it starts running, the run time until it is
+    completed or terminated and the total time from adding until finishing.
+    The times are taken in the thread emitting the signal, so they do not
+    depend on when the main thread processes its events.
+    """
+
+    def __init__(self, task_manager: QgsTaskManager) -> None:
+        self.task_manager = task_manager
+        self._original_max_active_threads = task_manager.maxActiveThreadCount()
+        # Task id -> description, added, started and finished times and status
+        self._records: Dict[int, Dict] = {}
+        self._status_slots: List[Tuple[QgsTask, Callable[[int], None]]] = []
+        self._closed = False
+        task_manager.taskAdded.connect(self._task_added)
+
+    def set_max_active_threads(self, count: int) -> None:
+        """Cap the number of tasks run concurrently, restored at the teardown."""
+        self.task_manager.setMaxActiveThreadCount(count)
+
+    def wait_for_all(
+        self, timeout_milliseconds: int = utils.DEFAULT_WAIT_TIMEOUT_MILLISECONDS
+    ) -> None:
+        """
+        Wait until the task manager has no active tasks.
+
+        :raises TimeoutError: if the tasks are not finished within the timeout.
+        """
+        if not self.task_manager.countActiveTasks():
+            return
+        loop = QEventLoop()
+        self.task_manager.allTasksFinished.connect(loop.quit)
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(loop.quit)
+        timer.start(timeout_milliseconds)
+        try:
+            loop.exec_()
+        finally:
+            timer.stop()
+            self.task_manager.allTasksFinished.disconnect(loop.quit)
+
+        if self.task_manager.countActiveTasks():
+            raise TimeoutError(
+                f"{self.task_manager.countActiveTasks()} tasks were not finished "
+                f"within {timeout_milliseconds} ms"
+            )
+
+    def wait_for(
+        self,
+        tasks: Sequence[QgsTask],
+        timeout_milliseconds: int = utils.DEFAULT_WAIT_TIMEOUT_MILLISECONDS,
+    ) -> None:
+        """
+        Wait until the given tasks are completed or terminated.
+
+        :raises TimeoutError: if the tasks are not finished within the timeout.
+        """
+        utils.wait_for_tasks(tasks, timeout_milliseconds)
+
+    def timings(self) -> List[TaskTiming]:
+        """Durations of the finished tasks in seconds in the order of adding."""
+        timings = []
+        for task_id, record in self._records.items():
+            if record["finished"] is None:
+                continue
+            # The task may start before the status signal is connected
+            started = record["started"] or record["added"]
+            timings.append(
+                TaskTiming(
+                    task_id,
+                    record["description"],
+                    started - record["added"],
+                    record["finished"] - started,
+                    record["finished"] - record["added"],
+                    record["status"],
+                )
+            )
+        return timings
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.task_manager.taskAdded.disconnect(self._task_added)
+        for task, slot in self._status_slots:
+            if not sip.isdeleted(task):
+                task.statusChanged.disconnect(slot)
+        self._status_slots.clear()
+        self.task_manager.setMaxActiveThreadCount(self._original_max_active_threads)
+
+    def _task_added(self, task_id: int) -> None:
+        task = self.task_manager.task(task_id)
+        if task is None:
+            return
+        self._records[task_id] = {
+            "description": task.description(),
+            "added": time.perf_counter(),
+            "started": None,
+            "finished": None,
+            "status": task.status(),
+        }
+
+        def slot(status: int, task_id: int = task_id) -> None:
+            self._status_changed(task_id, status)
+
+        # The statuses are emitted from the worker thread, where a queued
+        # slot would be called only when the main thread processes events
+        task.statusChanged.connect(slot, Qt.DirectConnection)
+        self._status_slots.append((task, slot))
+
+    def _status_changed(self, task_id: int, status: int) -> None:
+        record: Optional[Dict] = self._records.get(task_id)
+        if record is None:
+            return
+        record["status"] = status
+        if status == QgsTask.Running and record["started"] is None:
+            record["started"] = time.perf_counter()
+        elif status in (QgsTask.Complete, QgsTask.Terminated):
+            record["finished"] = time.perf_counter()
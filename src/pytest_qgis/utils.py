@@ -16,65 +16,81 @@
 #  You should have received a copy of the GNU General Public License
 #  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
 #
+import inspect
 import time
-from collections import Counter
-from functools import wraps
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable, Generator, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 from unittest.mock import MagicMock
 
 from osgeo import gdal
+from qgis import core as qgis_core
 from qgis.core import (
+    QgsAbstractFeatureSource,
     QgsCoordinateReferenceSystem,
     QgsCoordinateTransform,
+    QgsFeature,
+    QgsFeatureRequest,
     QgsLayerTree,
     QgsLayerTreeGroup,
     QgsLayerTreeLayer,
     QgsMapLayer,
+    QgsMapLayerStyle,
+    QgsMemoryProviderUtils,
     QgsProject,
     QgsRasterLayer,
     QgsRectangle,
+    QgsTask,
     QgsVectorLayer,
 )
 from qgis.PyQt import sip
-from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtCore import QCoreApplication, QEvent, QEventLoop, QTimer
+
+from pytest_qgis.crs_cache import get_crs
+from pytest_qgis.layer_cache import LAYER_CACHE
+from pytest_qgis.layer_inventory import get_layer_inventory
 
 if TYPE_CHECKING:
-    from _pytest.fixtures import FixtureRequest
+    from _pytest.fixtures import FixtureDef, FixtureRequest
 
 DEFAULT_RASTER_FORMAT = "tif"
 
 DEFAULT_EPSG = "EPSG:4326"
 LAYER_KEYWORDS = ("layer", "lyr", "raster", "rast", "tif")
+LAYER_FIXTURE_ATTRIBUTE = "_qgis_layer_fixture"
+DEFAULT_WAIT_TIMEOUT_MILLISECONDS = 30_000
+MEMORY_LAYER_BATCH_SIZE = 10_000
 
 
-def get_common_extent_from_all_layers() -> Optional[QgsRectangle]:
-    """Get common extent from all QGIS layers in the project."""
-    map_crs = QgsProject.instance().crs()
-    layers = list(QgsProject.instance().mapLayers(validOnly=True).values())
+def get_common_extent_from_all_layers(
+    estimated: bool = False,
+) -> Optional[QgsRectangle]:
+    """
+    Get common extent from all QGIS layers in the project.
 
-    if layers:
-        extent = transform_rectangle(layers[0].extent(), layers[0].crs(), map_crs)
-        for layer in layers[1:]:
-            extent.combineExtentWith(
-                transform_rectangle(layer.extent(), layer.crs(), map_crs)
-            )
-        return extent
-    return None
+    :param estimated: Whether to use the metadata extents or the bounding box
+        of a sample of the features for the layers whose exact extent would
+        need a full scan of the data source.
+    """
+    return get_layer_inventory().common_extent(estimated)
 
 
 def set_map_crs_based_on_layers() -> None:
     """Set map crs based on layers of the project."""
-    crs_counter = Counter(
-        layer.crs().authid()
-        for layer in QgsProject.instance().mapLayers().values()
-        if layer.isSpatial()
-    )
-    if crs_counter:
-        crs_id, _ = crs_counter.most_common(1)[0]
-        crs = QgsCoordinateReferenceSystem(crs_id)
-    else:
-        crs = QgsCoordinateReferenceSystem(DEFAULT_EPSG)
+    crs_id = get_layer_inventory().most_common_authid()
+    crs = get_crs(crs_id if crs_id is not None else DEFAULT_EPSG)
     QgsProject.instance().setCrs(crs)
 
 
@@ -98,12 +114,7 @@ def transform_rectangle(
 
 
 def get_layers_with_different_crs() -> list[QgsMapLayer]:
-    map_crs = QgsProject.instance().crs()
-    return [
-        layer
-        for layer in QgsProject.instance().mapLayers().values()
-        if layer.crs() != map_crs
-    ]
+    return get_layer_inventory().layers_with_different_crs()
 
 
 def replace_layers_with_reprojected_clones(
@@ -200,8 +211,9 @@ def clean_qgis_layer(fn: Callable[..., QgsMapLayer]) -> Callable[..., QgsMapLaye
     >>>     return layer
 
     This decorator is the alternative way of cleaning the layers since layer fixtures
-    are automatically cleaned if they contain one of the keywords listed in
-    LAYER_KEYWORDS by pytest_runtest_teardown hook.
+    are automatically cleaned by pytest_runtest_teardown hook if they contain one of
+    the keywords listed in LAYER_KEYWORDS, are decorated with qgis_layer_fixture or
+    are annotated to return a QgsMapLayer.
     """
 
     @wraps(fn)
@@ -213,7 +225,272 @@ def clean_qgis_layer(fn: Callable[..., QgsMapLayer]) -> Callable[..., QgsMapLaye
     return wrapper
 
 
-def ensure_qgis_layer_fixtures_are_cleaned(request: "FixtureRequest") -> None:
+def memory_qgis_layer(
+    fn: Callable[..., QgsVectorLayer],
+) -> Callable[..., QgsVectorLayer]:
+    """
+    Decorator to load a vector layer created by a fixture into a memory layer.
+
+    The fields, features, CRS, style and metadata are copied and the original
+    layer is cleaned right away. The memory layer is fast to iterate and does
+    not need to be cleaned. Note that the feature ids are not preserved.
+
+    >>> @pytest.fixture()
+    >>> @memory_qgis_layer
+    >>> def geojson() -> QgsVectorLayer:
+    >>>     return QgsVectorLayer("layer.json", "layer", "ogr")
+    """
+
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> QgsVectorLayer:
+        layer = fn(*args, **kwargs)
+        memory_layer = copy_to_memory_layer(layer)
+        _set_layer_owner_to_project(layer)
+        return memory_layer
+
+    return wrapper
+
+
+def copy_to_memory_layer(
+    layer: QgsVectorLayer,
+    name: Optional[str] = None,
+    batch_size: int = MEMORY_LAYER_BATCH_SIZE,
+) -> QgsVectorLayer:
+    """
+    Copy a vector layer to a memory layer with its fields, features, CRS,
+    style and metadata. The features are streamed from the layer and added
+    in batches.
+    """
+    if not isinstance(layer, QgsVectorLayer) or not layer.isValid():
+        raise TypeError(f"Expected a valid vector layer, got {layer!r}")
+
+    memory_layer = QgsMemoryProviderUtils.createMemoryLayer(
+        layer.name() if name is None else name,
+        layer.fields(),
+        layer.wkbType(),
+        layer.crs(),
+    )
+    provider = memory_layer.dataProvider()
+    for batch in iter_feature_batches(layer, batch_size=batch_size):
+        provider.addFeatures(batch)
+    memory_layer.updateExtents()
+
+    style = QgsMapLayerStyle()
+    style.readFromLayer(layer)
+    style.writeToLayer(memory_layer)
+    memory_layer.setMetadata(layer.metadata())
+    return memory_layer
+
+
+def iter_feature_batches(
+    layer: Union[QgsVectorLayer, QgsAbstractFeatureSource],
+    request: Optional[QgsFeatureRequest] = None,
+    batch_size: int = MEMORY_LAYER_BATCH_SIZE,
+) -> Iterator[List[QgsFeature]]:
+    """
+    Stream the features of the layer or feature source in lists of at most
+    batch_size features.
+    """
+    batch: List[QgsFeature] = []
+    features = layer.getFeatures(
+        request if request is not None else QgsFeatureRequest()
+    )
+    for feature in features:
+        batch.append(feature)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def assert_layers_equal(  # noqa: PLR0913
+    actual: QgsVectorLayer,
+    expected: QgsVectorLayer,
+    geometry_tolerance: float = 0.0,
+    ignore_fields: Sequence[str] = (),
+    max_diff: int = 10,
+    batch_size: int = MEMORY_LAYER_BATCH_SIZE,
+) -> None:
+    """
+    Assert that the layers have the same features regardless of their order.
+
+    The features are streamed in batches and hashed into the sums of a fixed
+    number of buckets, so the memory use does not grow with the layers. Only
+    the features in the differing buckets are read again for the diff report.
+    Requires NumPy.
+
+    :param actual: Layer to check.
+    :param expected: Layer with the expected features.
+    :param geometry_tolerance: Geometries are snapped to a grid of this size
+        and the remaining differences are allowed up to this Hausdorff distance.
+    :param ignore_fields: Names of the fields left out of the comparison.
+    :param max_diff: Maximum number of differing features shown per layer.
+    :param batch_size: Number of features hashed at a time.
+    :raises AssertionError: if the CRS, the fields or the features differ.
+    """
+    from pytest_qgis import layer_comparison
+
+    layer_comparison.assert_layers_equal(
+        actual, expected, geometry_tolerance, ignore_fields, max_diff, batch_size
+    )
+
+
+def layer_to_numpy(  # noqa: PLR0913
+    layer: QgsVectorLayer,
+    fields: Optional[Sequence[str]] = None,
+    geometry: Optional[str] = None,
+    request: Optional[QgsFeatureRequest] = None,
+    threaded: bool = False,
+    batch_size: int = MEMORY_LAYER_BATCH_SIZE,
+) -> Any:
+    """
+    Read the features of the layer to a NumPy structured array.
+
+    The array has the feature id in the column "_fid", a column per field and
+    the geometry columns. The generated columns are prefixed with an
+    underscore so that they do not clash with the fields. Integer, double
+    and boolean fields get numeric columns and other fields object columns.
+    The array is a masked array where NULL values and missing geometries are
+    masked. Only the given fields are fetched, and the geometries only if
+    they are asked for. Requires NumPy.
+
+    :param layer: Layer to read.
+    :param fields: Names of the fields to read, defaults to all fields.
+    :param geometry: None to skip the geometries, "wkb" for the WKB in the
+        column "_wkb", "centroid" for the columns "_x" and "_y" or "bounds" for
+        the columns "_xmin", "_ymin", "_xmax" and "_ymax".
+    :param request: Request to filter the features, e.g. by an expression.
+    :param threaded: Whether to fetch the features in a thread while the
+        previous batches are converted to arrays.
+    :param batch_size: Number of features converted at a time.
+    :return: Masked structured array of the features.
+    :raises ValueError: if a field is not found or clashes with a generated
+        column.
+    """
+    from pytest_qgis import feature_arrays
+
+    return feature_arrays.layer_to_numpy(
+        layer, fields, geometry, request, threaded, batch_size
+    )
+
+
+def assert_rasters_equal(  # noqa: PLR0913
+    actual: Union[QgsRasterLayer, Path, str],
+    expected: Union[QgsRasterLayer, Path, str],
+    tolerance: float = 0.0,
+    relative_tolerance: float = 0.0,
+    bands: Optional[Sequence[int]] = None,
+    fail_fast: bool = False,
+    max_diff: int = 10,
+) -> None:
+    """
+    Assert that the rasters have the same size, georeferencing and pixel values.
+
+    The rasters are read with GDAL in windows aligned to the native blocks of
+    the expected raster, so the memory use does not grow with the rasters.
+    Pixels that are nodata in both rasters are equal. The corners of the grids
+    may differ by a hundredth of a pixel and complex values are compared by
+    the modulus of their difference. Requires NumPy.
+
+    :param actual: Raster layer of gdal provider or path to the raster to check.
+    :param expected: Raster layer or path to the expected raster.
+    :param tolerance: Allowed absolute difference of the pixel values.
+    :param relative_tolerance: Allowed difference relative to the expected values.
+    :param bands: Numbers of the bands to compare, defaults to all bands.
+    :param fail_fast: Whether to stop at the first differing window.
+    :param max_diff: Maximum number of differing windows listed per band.
+    :raises AssertionError: if the grids, the CRSs or the pixel values differ.
+    """
+    from pytest_qgis import raster_comparison
+
+    raster_comparison.assert_rasters_equal(
+        actual,
+        expected,
+        tolerance,
+        relative_tolerance,
+        bands,
+        fail_fast,
+        max_diff,
+    )
+
+
+def qgis_layer_fixture(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator to register a fixture as a layer fixture that is cleaned
+    automatically regardless of its name.
+
+    >>> @pytest.fixture()
+    >>> @qgis_layer_fixture
+    >>> def polygons():
+    >>>     return QgsVectorLayer("polygons.json", "polygons", "ogr")
+    """
+    setattr(fn, LAYER_FIXTURE_ATTRIBUTE, True)
+    return fn
+
+
+def get_layer_fixture_names(
+    fixture_names: Iterable[str],
+    name2fixturedefs: Dict[str, Sequence["FixtureDef"]],
+) -> List[str]:
+    """
+    Get the names of the fixtures that may return layers. Called once per
+    test item at collection so that the teardown visits only these.
+    """
+    layer_fixture_names = []
+    for fixture_name in fixture_names:
+        fixturedefs = name2fixturedefs.get(fixture_name)
+        # The last definition overrides the others
+        function = fixturedefs[-1].func if fixturedefs else None
+        if is_layer_fixture(fixture_name, function):
+            layer_fixture_names.append(fixture_name)
+    return layer_fixture_names
+
+
+@lru_cache(maxsize=None)
+def is_layer_fixture(fixture_name: str, function: Optional[Callable] = None) -> bool:
+    """
+    Whether the fixture name contains one of the LAYER_KEYWORDS or the
+    fixture function is decorated with qgis_layer_fixture or annotated
+    to return a QgsMapLayer.
+    """
+    if _has_layer_keyword(fixture_name):
+        return True
+    if function is None:
+        return False
+    if getattr(function, LAYER_FIXTURE_ATTRIBUTE, False):
+        return True
+    try:
+        return_annotation = inspect.signature(function).return_annotation
+    except (TypeError, ValueError):
+        return False
+    return _is_layer_annotation(return_annotation)
+
+
+def _has_layer_keyword(fixture_name: str) -> bool:
+    fixture_name = fixture_name.lower()
+    return any(
+        possible_layer_name in fixture_name for possible_layer_name in LAYER_KEYWORDS
+    )
+
+
+def _is_layer_annotation(annotation: Any) -> bool:
+    """Also Optional[QgsMapLayer] and Generator[QgsMapLayer, ...] are layers."""
+    if isinstance(annotation, str):
+        # Postponed annotations are resolved by the class name
+        annotation = getattr(qgis_core, annotation.rsplit(".", 1)[-1], None)
+    forward_arg = getattr(annotation, "__forward_arg__", None)
+    if forward_arg is not None:
+        return _is_layer_annotation(forward_arg)
+    arguments = getattr(annotation, "__args__", None)
+    if arguments:
+        return any(_is_layer_annotation(argument) for argument in arguments)
+    return isinstance(annotation, type) and issubclass(annotation, QgsMapLayer)
+
+
+def ensure_qgis_layer_fixtures_are_cleaned(
+    request: "FixtureRequest", fixture_names: Optional[Iterable[str]] = None
+) -> None:
     """
     Sometimes fixture non-memory layers that are used but not added
     to the project might cause segmentation fault errors.
@@ -223,17 +500,23 @@ def ensure_qgis_layer_fixtures_are_cleaned(request: "FixtureRequest") -> None:
 
     It does not matter what scoped the fixtures are since the
     layers are not actually deleted at any point.
+
+    :param request: Request of the test.
+    :param fixture_names: Names of the layer fixtures classified at collection.
+        If not given, the fixtures of the request are classified by their name.
     """
-    for fixture_name in request.fixturenames:
-        if any(
-            possible_layer_name in fixture_name.lower()
-            for possible_layer_name in LAYER_KEYWORDS
-        ):
-            try:
-                layer = request.getfixturevalue(fixture_name)
-            except AssertionError:
-                continue
-            _set_layer_owner_to_project(layer)
+    if fixture_names is None:
+        fixture_names = [
+            fixture_name
+            for fixture_name in request.fixturenames
+            if _has_layer_keyword(fixture_name)
+        ]
+    for fixture_name in fixture_names:
+        try:
+            layer = request.getfixturevalue(fixture_name)
+        except AssertionError:
+            continue
+        _set_layer_owner_to_project(layer)
 
 
 def _set_layer_owner_to_project(layer: Any) -> None:
@@ -242,6 +525,8 @@ def _set_layer_owner_to_project(layer: Any) -> None:
         and not isinstance(layer, MagicMock)
         and not sip.isdeleted(layer)
         and layer.id() not in QgsProject.instance().mapLayers(True)
+        # Cached layers are reused by the next tests
+        and not LAYER_CACHE.is_cached(layer)
     ):
         QgsProject.instance().addMapLayer(layer)
         QgsProject.instance().removeMapLayer(layer)
@@ -253,3 +538,75 @@ def wait(wait_time_milliseconds: int = 0) -> None:
 
     while (time.time() - start) * 1000 < wait_time_milliseconds:
         QCoreApplication.processEvents()
+
+
+def process_events() -> None:
+    """Processes pending events including posted events and deferred deletions."""
+    QCoreApplication.sendPostedEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    QCoreApplication.processEvents()
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout_milliseconds: int = DEFAULT_WAIT_TIMEOUT_MILLISECONDS,
+) -> None:
+    """
+    Processes events until the condition is true.
+
+    :raises TimeoutError: if the condition is not true within the timeout.
+    """
+    start = time.time()
+
+    while not condition():
+        if (time.time() - start) * 1000 > timeout_milliseconds:
+            raise TimeoutError(
+                f"Condition was not met within {timeout_milliseconds} ms"
+            )
+        QCoreApplication.processEvents(QEventLoop.AllEvents, 10)
+
+
+def wait_for_tasks(
+    tasks: Sequence[QgsTask],
+    timeout_milliseconds: int = DEFAULT_WAIT_TIMEOUT_MILLISECONDS,
+) -> None:
+    """
+    Runs an event loop until the tasks are completed or terminated.
+    Unlike wait_until, the loop is quit by the signals of the tasks
+    instead of polling.
+
+    :raises TimeoutError: if the tasks are not finished within the timeout.
+    """
+    # The task manager deletes the tasks once they are finished
+    pending = {
+        index
+        for index, task in enumerate(tasks)
+        if not sip.isdeleted(task)
+        and task.status() not in (QgsTask.Complete, QgsTask.Terminated)
+    }
+    if not pending:
+        return
+
+    loop = QEventLoop()
+
+    def finished(index: int) -> None:
+        pending.discard(index)
+        if not pending:
+            loop.quit()
+
+    for index in pending:
+        task = tasks[index]
+        task.taskCompleted.connect(lambda index=index: finished(index))
+        task.taskTerminated.connect(lambda index=index: finished(index))
+
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+    timer.start(timeout_milliseconds)
+    loop.exec_()
+    timer.stop()
+
+    if pending:
+        raise TimeoutError(
+            f"{len(pending)} tasks were not finished within {timeout_milliseconds} ms"
+        )
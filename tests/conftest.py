@@ -19,6 +19,7 @@ import shutil
 from pathlib import Path
 
 import pytest
+from pytest_qgis.utils import qgis_layer_fixture
 from qgis.core import QgsRasterLayer, QgsVectorLayer
 
 pytest_plugins = "pytester"
@@ -66,6 +67,17 @@ def layer_polygon_3067(gpkg: Path):
     return get_gpkg_layer("polygon_3067", gpkg)
 
 
+@pytest.fixture()
+@qgis_layer_fixture
+def polygons(gpkg: Path):
+    return get_gpkg_layer("polygon", gpkg)
+
+
+@pytest.fixture()
+def points(gpkg: Path) -> QgsVectorLayer:
+    return get_gpkg_layer("points", gpkg)
+
+
 @pytest.fixture()
 def raster_3067():
     return get_raster_layer(
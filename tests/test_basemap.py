@@ -0,0 +1,68 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+
+from pytest_qgis.basemap import BASEMAP_NAME, BasemapCache
+from qgis.core import QgsCoordinateReferenceSystem
+
+
+def test_basemap_cache_should_reproject_once_per_crs(qgis_processing, tmp_path):
+    initializations = []
+    basemap_cache = BasemapCache(tmp_path, lambda: initializations.append(1))
+    crs = QgsCoordinateReferenceSystem("EPSG:3067")
+
+    first = basemap_cache.get(crs)
+    second = basemap_cache.get(crs)
+
+    assert (basemap_cache.builds, basemap_cache.reuses) == (1, 1)
+    assert len(initializations) == 1
+    assert first is not second
+    assert first.source() == second.source()
+    assert first.crs().authid() == "EPSG:3067"
+    assert first.name() == BASEMAP_NAME
+    assert first.renderer().dump() == second.renderer().dump()
+
+
+def test_basemap_cache_should_reuse_files_from_previous_sessions(
+    qgis_processing, tmp_path
+):
+    crs = QgsCoordinateReferenceSystem("EPSG:3857")
+    BasemapCache(tmp_path, lambda: None).get(crs)
+
+    basemap_cache = BasemapCache(tmp_path, lambda: None)
+    layer = basemap_cache.get(crs)
+
+    assert (basemap_cache.builds, basemap_cache.reuses) == (0, 1)
+    assert layer.featureCount() > 0
+    assert [path.suffix for path in tmp_path.iterdir()] == [".gpkg"]
+
+
+def test_basemap_cache_should_copy_countries_in_same_crs(tmp_path):
+    initializations = []
+    basemap_cache = BasemapCache(tmp_path, lambda: initializations.append(1))
+    crs = QgsCoordinateReferenceSystem("EPSG:4326")
+
+    layer = basemap_cache.get(crs)
+    basemap_cache.get(crs)
+
+    assert (basemap_cache.builds, basemap_cache.reuses) == (1, 1)
+    assert not initializations
+    assert Path(layer.source().split("|")[0]).parent == tmp_path
+    assert layer.featureCount() > 0
+    assert layer.name() == BASEMAP_NAME
+    assert layer.crs().authid() == "EPSG:4326"
@@ -0,0 +1,74 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import json
+from typing import TYPE_CHECKING
+
+from pytest_qgis.benchmark import create_result
+from qgis.core import Qgis, QgsProject, QgsVectorLayer
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+
+def test_qgis_benchmark(qgis_benchmark, qgis_new_project, request):
+    calls = []
+
+    def add_layer() -> QgsVectorLayer:
+        calls.append(1)
+        layer = QgsVectorLayer("Point?crs=EPSG:4326", "benchmark", "memory")
+        QgsProject.instance().addMapLayer(layer)
+        return layer
+
+    layer = qgis_benchmark(add_layer, rounds=3, warmup_rounds=2)
+
+    assert isinstance(layer, QgsVectorLayer)
+    assert len(calls) == 5  # noqa: PLR2004
+    result = request.config._qgis_benchmark_results[-1]
+    assert result.name == request.node.nodeid
+    assert (result.rounds, result.warmup_rounds) == (3, 2)
+    assert result.min <= result.median <= result.p95 <= result.max
+
+
+def test_create_result():
+    result = create_result("name", [0.5, 0.1, 0.3, 0.2, 0.4], 0)
+
+    assert result.median == 0.3  # noqa: PLR2004
+    assert result.p95 == 0.5  # noqa: PLR2004
+    assert (result.min, result.max) == (0.1, 0.5)
+    assert result.timings == [0.5, 0.1, 0.3, 0.2, 0.4]
+
+
+def test_benchmark_json(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        def test_benchmark(qgis_benchmark):
+            qgis_benchmark(sum, [1, 2], rounds=2, name="sum")
+    """
+    )
+    result = testdir.runpytest(
+        "--qgis_disable_init", "--qgis_benchmark_json=results/benchmark.json"
+    )
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(["*pytest-qgis benchmarks*", "*::sum*"])
+
+    data = json.loads(
+        (testdir.tmpdir / "results" / "benchmark.json").read_text("utf-8")
+    )
+    assert data["qgis_version"] == Qgis.QGIS_VERSION
+    assert [benchmark["rounds"] for benchmark in data["benchmarks"]] == [2]
+    assert data["benchmarks"][0]["name"].endswith("test_benchmark::sum")
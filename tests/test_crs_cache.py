@@ -0,0 +1,91 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from typing import TYPE_CHECKING
+
+import pytest
+from pytest_qgis.crs_cache import CrsCache
+
+from tests.utils import EPSG_3067, EPSG_4326
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+
+@pytest.fixture()
+def crs_cache() -> CrsCache:
+    return CrsCache()
+
+
+def test_crs_cache_counts_hits_and_misses(crs_cache):
+    assert crs_cache.get(EPSG_3067).authid() == EPSG_3067
+    assert crs_cache.get(EPSG_3067).authid() == EPSG_3067
+    assert crs_cache.get(EPSG_4326).authid() == EPSG_4326
+
+    assert (crs_cache.hits, crs_cache.misses) == (1, 2)
+    assert crs_cache.requested_authids() == [EPSG_3067, EPSG_4326]
+
+
+def test_crs_cache_warm_up_is_not_counted_as_lookup(crs_cache):
+    crs_cache.warm_up([EPSG_3067, EPSG_3067])
+
+    assert crs_cache.warmup_count == 1
+    assert crs_cache.requested_authids() == []
+
+    crs_cache.get(EPSG_3067)
+    assert (crs_cache.hits, crs_cache.misses) == (1, 0)
+
+
+def test_crs_cache_does_not_cache_invalid_crs(crs_cache):
+    assert not crs_cache.get("EPSG:invalid").isValid()
+    assert not crs_cache.get("EPSG:invalid").isValid()
+    assert (crs_cache.hits, crs_cache.misses) == (0, 2)
+
+
+def test_ini_crs_warmup(testdir: "Testdir"):
+    testdir.makeini(
+        f"""
+        [pytest]
+        qgis_crs_warmup=true
+        qgis_crs_warmup_authids=
+            {EPSG_3067}
+    """
+    )
+    testdir.makepyfile(
+        f"""
+        from pytest_qgis.crs_cache import get_crs
+        from qgis.core import QgsProject, QgsVectorLayer
+
+        def test_crs(qgis_new_project):
+            assert get_crs("{EPSG_3067}").isValid()
+            layer = QgsVectorLayer("Point?crs={EPSG_4326}", "layer", "memory")
+            QgsProject.instance().addMapLayer(layer)
+    """
+    )
+    # QGIS is initialized in a subprocess, as it can be initialized only once
+    result = testdir.runpytest_subprocess()
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(
+        ["*pytest-qgis CRS cache*", "warm-up: 1 CRSs in *, hits: 1, misses: 0 *"]
+    )
+
+    # The CRS of the layer is remembered for the next session
+    result = testdir.runpytest_subprocess()
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(
+        ["*pytest-qgis CRS cache*", "warm-up: 2 CRSs in *, hits: 1, misses: 0 *"]
+    )
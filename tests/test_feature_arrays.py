@@ -0,0 +1,88 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from typing import Iterator, List
+
+import pytest
+from pytest_qgis import utils
+from pytest_qgis.utils import layer_to_numpy
+from qgis.core import QgsFeature, QgsVectorLayer
+
+from tests.utils import create_points_layer
+
+pytest.importorskip("numpy")
+
+
+def test_layer_to_numpy_should_read_fields_and_centroids():
+    layer = create_points_layer([("a", 1, 2), ("b", 3, 4)])
+    layer.dataProvider().addFeatures([QgsFeature(layer.fields())])
+
+    array = layer_to_numpy(layer, geometry="centroid", batch_size=2)
+
+    assert array.dtype.names == ("_fid", "name", "_x", "_y")
+    assert array["name"].tolist() == ["a", "b", None]
+    assert array["_x"].tolist() == [1.0, 3.0, None]
+    assert array["_y"].mask.tolist() == [False, False, True]
+
+
+def test_layer_to_numpy_should_read_in_thread():
+    layer = create_points_layer([(str(i), i, i) for i in range(10)])
+
+    array = layer_to_numpy(layer, geometry="wkb", threaded=True, batch_size=3)
+
+    assert array["_fid"].tolist() == list(range(1, 11))
+    assert array["_wkb"][0] == bytes(next(layer.getFeatures()).geometry().asWkb())
+
+
+def test_layer_to_numpy_should_raise_error_of_thread(monkeypatch):
+    layer = create_points_layer([(str(i), i, i) for i in range(10)])
+
+    def failing_batches(source, request, batch_size) -> Iterator[List[QgsFeature]]:
+        yield list(source.getFeatures(request))
+        raise RuntimeError("fetching failed")
+
+    monkeypatch.setattr(utils, "iter_feature_batches", failing_batches)
+
+    with pytest.raises(RuntimeError, match="fetching failed"):
+        layer_to_numpy(layer, threaded=True)
+
+
+def test_layer_to_numpy_should_skip_geometry(layer_polygon):
+    array = layer_to_numpy(layer_polygon, fields=[])
+
+    assert array.dtype.names == ("_fid",)
+    assert len(array) == layer_polygon.featureCount()
+    bounds = layer_to_numpy(layer_polygon, fields=[], geometry="bounds")
+    assert bounds["_xmin"].min() == layer_polygon.extent().xMinimum()
+    with pytest.raises(ValueError, match="Unsupported geometry"):
+        layer_to_numpy(layer_polygon, geometry="points")
+
+
+def test_layer_to_numpy_should_read_all_fields_of_geopackage(layer_polygon):
+    array = layer_to_numpy(layer_polygon, geometry="centroid")
+
+    assert array.dtype.names == ("_fid", *layer_polygon.fields().names(), "_x", "_y")
+    assert array["_fid"].tolist() == [
+        feature.id() for feature in layer_polygon.getFeatures()
+    ]
+
+
+def test_layer_to_numpy_should_raise_on_clashing_field():
+    layer = QgsVectorLayer("Point?field=_x:double", "clashing", "memory")
+
+    with pytest.raises(ValueError, match=r"clash with the generated columns: \['_x'\]"):
+        layer_to_numpy(layer, geometry="centroid")
@@ -0,0 +1,78 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+
+from pytest_qgis.gpkg_sandbox import GpkgSandbox, WorkingCopies
+from pytest_qgis.utils import _set_layer_owner_to_project
+from qgis.core import QgsFeature, QgsVectorLayer
+
+DB = Path(Path(__file__).parent, "data", "db.gpkg")
+
+
+def _add_feature(layer: QgsVectorLayer) -> None:
+    layer.startEditing()
+    layer.addFeature(QgsFeature(layer.fields()))
+    assert layer.commitChanges()
+
+
+def _feature_count(path: Path) -> int:
+    layer = QgsVectorLayer(f"{path!s}|layername=points", "points", "ogr")
+    count = layer.featureCount()
+    _set_layer_owner_to_project(layer)
+    return count
+
+
+def test_gpkg_sandbox_should_roll_back_committed_changes(qgis_new_project, tmp_path):
+    working_copies = WorkingCopies(tmp_path)
+    path = working_copies.get(DB)
+    original_count = _feature_count(path)
+
+    sandbox = GpkgSandbox(path)
+    layer = sandbox.layer("points")
+    _add_feature(layer)
+    assert layer.featureCount() == original_count + 1
+
+    assert sandbox.rollback()
+    for sandbox_layer in sandbox.layers:
+        _set_layer_owner_to_project(sandbox_layer)
+    assert _feature_count(path) == original_count
+    assert working_copies.get(DB) == path
+
+
+def test_gpkg_sandbox_should_detect_changes_outside_transaction(
+    qgis_new_project, tmp_path
+):
+    working_copies = WorkingCopies(tmp_path)
+    path = working_copies.get(DB)
+    sandbox = GpkgSandbox(path)
+
+    layer = QgsVectorLayer(f"{path!s}|layername=points", "points", "ogr")
+    _add_feature(layer)
+    _set_layer_owner_to_project(layer)
+
+    assert not sandbox.rollback()
+    working_copies.discard(DB)
+    assert working_copies.get(DB) != path
+
+
+def test_qgis_gpkg_sandbox(qgis_gpkg_sandbox):
+    sandbox = qgis_gpkg_sandbox(DB)
+
+    assert sandbox.path != DB
+    assert sandbox.layer("points", "sandbox points").name() == "sandbox points"
+    assert qgis_gpkg_sandbox(DB) is sandbox
@@ -69,3 +69,34 @@ def test_ini_gui(gui_enabled: bool, testdir: "Testdir"):
     result.assert_outcomes(
         passed=1 if not gui_enabled else 0, failed=1 if gui_enabled else 0
     )
+
+
+def test_ini_render_settings(testdir: "Testdir"):
+    testdir.makeini(
+        """
+        [pytest]
+        qgis_parallel_rendering=true
+        qgis_render_cache=false
+        qgis_preview_jobs=false
+        qgis_max_threads=4
+    """
+    )
+    testdir.makepyfile(
+        """
+        from qgis.core import QgsApplication
+
+        def test_render_settings(qgis_canvas):
+            assert qgis_canvas.isParallelRenderingEnabled()
+            assert not qgis_canvas.isCachingEnabled()
+            assert not qgis_canvas.previewJobsEnabled()
+            assert QgsApplication.maxThreads() == 4
+    """
+    )
+    result = testdir.runpytest("--qgis_disable_init")
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "pytest-qgis: QGIS *, parallel rendering: on, render cache: off, "
+            "preview jobs: off, max threads: 4"
+        ]
+    )
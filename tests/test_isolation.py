@@ -0,0 +1,89 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+
+def test_isolate_option_should_report_crashed_test(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        import ctypes
+
+        def test_before_crash():
+            pass
+
+        def test_crash():
+            ctypes.string_at(0)
+
+        def test_after_crash():
+            pass
+    """
+    )
+    result = testdir.runpytest("--qgis_disable_init", "--qgis_isolate")
+
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*QGIS test worker crashed while running this test.*",
+            "*Worker was killed by SIGSEGV*",
+        ]
+    )
+
+
+def test_isolate_option_should_split_modules_to_workers(testdir: "Testdir"):
+    testdir.makepyfile(
+        test_first="""
+        import os
+
+        def test_first():
+            with open("first.pid", "w") as f:
+                f.write(str(os.getpid()))
+    """,
+        test_second="""
+        import os
+
+        def test_second():
+            with open("second.pid", "w") as f:
+                f.write(str(os.getpid()))
+    """,
+    )
+    result = testdir.runpytest(
+        "--qgis_disable_init", "--qgis_isolate", "--qgis_isolate_workers=2"
+    )
+
+    result.assert_outcomes(passed=2)
+    first_pid = testdir.tmpdir.join("first.pid").read()
+    second_pid = testdir.tmpdir.join("second.pid").read()
+    assert first_pid != second_pid
+
+
+def test_isolate_option_should_not_pass_cache_options_to_workers(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        def test_passing():
+            pass
+    """
+    )
+    result = testdir.runpytest(
+        "--qgis_disable_init", "--qgis_isolate", "--lf", "--junitxml", "report.xml"
+    )
+
+    result.assert_outcomes(passed=1)
+    assert testdir.tmpdir.join("report.xml").exists()
@@ -0,0 +1,123 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+
+import pytest
+from pytest_qgis.layer_cache import LayerCache
+from pytest_qgis.utils import _set_layer_owner_to_project
+from qgis.core import (
+    QgsFeature,
+    QgsProject,
+    QgsSingleSymbolRenderer,
+    QgsSymbol,
+    QgsWkbTypes,
+)
+from qgis.PyQt import sip
+
+DB = Path(Path(__file__).parent, "data", "db.gpkg")
+POLYGON_URI = f"{DB!s}|layername=polygon"
+RASTER_PATH = Path(Path(__file__).parent, "data", "small_raster.tif")
+
+
+@pytest.fixture()
+def layer_cache(qgis_new_project) -> LayerCache:
+    layer_cache = LayerCache()
+    yield layer_cache
+    for layer in layer_cache.take_layers():
+        _set_layer_owner_to_project(layer)
+
+
+def test_layer_cache_should_reuse_opened_layer(layer_cache):
+    layer = layer_cache.get(POLYGON_URI, "polygon")
+    assert layer.isValid()
+    assert layer_cache.get(POLYGON_URI, "polygon") is layer
+
+    assert (layer_cache.opens, layer_cache.reuses) == (1, 1)
+    assert layer_cache.get(POLYGON_URI, "polygon", options={"loadDefaultStyle": False})
+    assert layer_cache.opens == 2  # noqa: PLR2004
+
+
+def test_layer_cache_should_reset_layer(layer_cache):
+    layer = layer_cache.get(POLYGON_URI, "polygon")
+    feature_count = layer.featureCount()
+    renderer_type = layer.renderer().type()
+
+    layer.startEditing()
+    layer.addFeature(QgsFeature(layer.fields()))
+    layer.setSubsetString("fid = 1")
+    layer.selectAll()
+    layer.setRenderer(
+        QgsSingleSymbolRenderer(QgsSymbol.defaultSymbol(QgsWkbTypes.PointGeometry))
+    )
+
+    layer = layer_cache.get(POLYGON_URI, "polygon")
+
+    assert not layer.isEditable()
+    assert layer.subsetString() == ""
+    assert layer.featureCount() == feature_count
+    assert layer.selectedFeatureCount() == 0
+    assert layer.renderer().type() == renderer_type
+
+
+def test_layer_cache_should_accept_unhashable_options(layer_cache):
+    context = QgsProject.instance().transformContext()
+
+    layer = layer_cache.get(
+        POLYGON_URI, "polygon", options={"transformContext": context}
+    )
+
+    assert layer.isValid()
+
+
+def test_layer_cache_should_restore_name(layer_cache):
+    layer = layer_cache.get(POLYGON_URI, "polygon")
+    layer.setName("renamed")
+
+    assert layer_cache.get(POLYGON_URI, "polygon").name() == "polygon"
+
+
+def test_layer_cache_should_release_layer_from_project(layer_cache):
+    layer = layer_cache.get(str(RASTER_PATH), "raster", "gdal")
+    QgsProject.instance().addMapLayer(layer)
+
+    layer_cache.release(layer)
+    _set_layer_owner_to_project(layer)
+
+    assert not QgsProject.instance().mapLayers()
+    assert not sip.isdeleted(layer)
+    assert layer_cache.get(str(RASTER_PATH), "raster", "gdal") is layer
+
+
+def test_layer_cache_should_reopen_deleted_layer(layer_cache):
+    layer = layer_cache.get(POLYGON_URI, "polygon")
+    QgsProject.instance().addMapLayer(layer)
+    QgsProject.instance().removeMapLayer(layer)
+
+    new_layer = layer_cache.get(POLYGON_URI, "polygon")
+
+    assert new_layer.isValid()
+    assert layer_cache.opens == 2  # noqa: PLR2004
+
+
+def test_qgis_layer_factory_clone(qgis_layer_factory):
+    layer = qgis_layer_factory(POLYGON_URI, "polygon")
+    clone = qgis_layer_factory(POLYGON_URI, "clone", clone=True)
+
+    assert clone is not layer
+    assert clone.name() == "clone"
+    assert clone.source() == layer.source()
@@ -65,6 +65,32 @@ def test_raster_layer_fixture_should_be_cleaned(raster_3067):
     _test(raster_3067)
 
 
+def test_decorated_layer_fixture_should_be_cleaned(polygons):
+    _test(polygons)
+
+
+def test_decorated_layer_fixture_should_be_cleaned_2(polygons):
+    _test(polygons)
+
+
+def test_annotated_layer_fixture_should_be_cleaned(points):
+    _test(points)
+
+
+def test_annotated_layer_fixture_should_be_cleaned_2(points):
+    _test(points)
+
+
+def test_layer_fixtures_should_be_classified_at_collection(
+    request, polygons, points, layer_polygon
+):
+    assert set(request.node._qgis_layer_fixtures) == {
+        "polygons",
+        "points",
+        "layer_polygon",
+    }
+
+
 def _test(layer: QgsMapLayer) -> None:
     # Check that the layer is not in the project
     assert not QgsProject.instance().mapLayer(layer.id())
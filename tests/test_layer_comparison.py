@@ -0,0 +1,93 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from pytest_qgis.utils import assert_layers_equal, copy_to_memory_layer
+from qgis.core import NULL, QgsFeature, QgsField, QgsVectorLayer
+from qgis.PyQt.QtCore import QVariant
+
+from tests.utils import create_points_layer
+
+pytest.importorskip("numpy")
+
+
+def test_assert_layers_equal_should_ignore_feature_order():
+    points = [("a", 1, 1), ("b", 2, 2), ("b", 2, 2), ("c", 3, 3)]
+    actual = create_points_layer(points)
+    expected = create_points_layer(reversed(points))
+
+    assert_layers_equal(actual, expected, batch_size=3)
+
+
+def test_assert_layers_equal_should_report_differing_features():
+    actual = create_points_layer([("a", 1, 1), ("b", 2, 2)])
+    expected = create_points_layer([("a", 1, 1), ("c", 2, 2)])
+
+    with pytest.raises(AssertionError) as error:
+        assert_layers_equal(actual, expected)
+
+    message = str(error.value)
+    assert "1 features only in actual, 1 features only in expected" in message
+    assert "{'name': 'b'}" in message
+    assert "{'name': 'c'}" in message
+
+
+def test_assert_layers_equal_should_limit_the_diff():
+    actual = create_points_layer([(str(i), i, i) for i in range(5)])
+    expected = create_points_layer([])
+
+    with pytest.raises(AssertionError, match=r"\.\.\. and 3 more"):
+        assert_layers_equal(actual, expected, max_diff=2)
+
+
+def test_assert_layers_equal_should_allow_geometry_tolerance():
+    actual = create_points_layer([("a", 1.0004, 1)])
+    expected = create_points_layer([("a", 1.0006, 1)])
+
+    assert_layers_equal(actual, expected, geometry_tolerance=0.001)
+    with pytest.raises(AssertionError):
+        assert_layers_equal(actual, expected)
+
+
+def test_assert_layers_equal_should_match_tolerance_across_grid_cells():
+    actual = create_points_layer([(str(i), i + 0.0009, i) for i in range(100)])
+    expected = create_points_layer([(str(i), i + 0.0016, i) for i in range(100)])
+
+    assert_layers_equal(actual, expected, geometry_tolerance=0.001)
+    with pytest.raises(AssertionError, match="100 features only in actual"):
+        assert_layers_equal(actual, expected, geometry_tolerance=0.0005)
+
+
+def test_assert_layers_equal_should_compare_attribute_values():
+    actual = QgsVectorLayer("None?field=value:integer&field=name:string", "", "memory")
+    expected = QgsVectorLayer("None?field=value:double&field=name:string", "", "memory")
+    for layer, attributes in ((actual, [1, NULL]), (expected, [1.0, None])):
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes(attributes)
+        layer.dataProvider().addFeatures([feature])
+
+    assert_layers_equal(actual, expected)
+
+
+def test_assert_layers_equal_should_skip_ignored_fields(layer_polygon):
+    actual = copy_to_memory_layer(layer_polygon)
+    actual.dataProvider().addAttributes([QgsField("extra", QVariant.Int)])
+    actual.updateFields()
+
+    assert_layers_equal(actual, layer_polygon, ignore_fields=["extra"])
+    with pytest.raises(AssertionError, match="Fields differ"):
+        assert_layers_equal(actual, layer_polygon)
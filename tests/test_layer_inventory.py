@@ -0,0 +1,202 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import json
+
+import pytest
+from pytest_qgis.layer_inventory import (
+    EXTENT_STATISTICS,
+    LayerInventory,
+    estimate_layer_extent,
+)
+from qgis.core import (
+    QgsBox3d,
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsGeometry,
+    QgsLayerMetadata,
+    QgsPointXY,
+    QgsProject,
+    QgsVectorLayer,
+    edit,
+)
+
+from tests.utils import EPSG_3067, EPSG_4326
+
+
+@pytest.fixture()
+def inventory(qgis_new_project):
+    inventory = LayerInventory(QgsProject.instance())
+    yield inventory
+    inventory.close()
+
+
+def test_layer_inventory_should_follow_added_and_removed_layers(
+    inventory, layer_polygon, layer_points, layer_polygon_3067
+):
+    project = QgsProject.instance()
+    project.setCrs(QgsCoordinateReferenceSystem(EPSG_4326))
+    project.addMapLayers([layer_polygon, layer_points, layer_polygon_3067])
+
+    assert inventory.most_common_authid() == EPSG_4326
+    assert inventory.layers_with_different_crs() == [layer_polygon_3067]
+
+    project.removeMapLayers([layer_polygon.id(), layer_points.id()])
+
+    assert inventory.most_common_authid() == EPSG_3067
+
+
+def test_layer_inventory_should_follow_layer_crs_changes(inventory, layer_polygon):
+    project = QgsProject.instance()
+    project.setCrs(QgsCoordinateReferenceSystem(EPSG_4326))
+    project.addMapLayer(layer_polygon)
+
+    layer_polygon.setCrs(QgsCoordinateReferenceSystem(EPSG_3067))
+
+    assert inventory.most_common_authid() == EPSG_3067
+    assert inventory.layers_with_different_crs() == [layer_polygon]
+
+
+def test_layer_inventory_should_transform_extents_to_project_crs(
+    inventory, layer_polygon
+):
+    project = QgsProject.instance()
+    project.setCrs(QgsCoordinateReferenceSystem(EPSG_4326))
+    project.addMapLayer(layer_polygon)
+    extent_4326 = inventory.common_extent()
+
+    project.setCrs(QgsCoordinateReferenceSystem(EPSG_3067))
+
+    assert extent_4326 == layer_polygon.extent()
+    assert inventory.common_extent().width() > extent_4326.width() * 1000
+
+
+def test_layer_inventory_should_update_extent_when_data_changes(inventory):
+    layer = QgsVectorLayer("Point?crs=EPSG:4326", "points", "memory")
+    QgsProject.instance().addMapLayer(layer)
+    with edit(layer):
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(20, 60)))
+        layer.addFeature(feature)
+    first_extent = inventory.common_extent()
+
+    with edit(layer):
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(30, 70)))
+        layer.addFeature(feature)
+
+    assert first_extent.toString(0) == "20,60 : 20,60"
+    assert inventory.common_extent().toString(0) == "20,60 : 30,70"
+
+
+def test_layer_inventory_should_include_existing_layers(
+    qgis_new_project, layer_polygon
+):
+    QgsProject.instance().addMapLayer(layer_polygon)
+    inventory = LayerInventory(QgsProject.instance())
+    try:
+        assert inventory.most_common_authid() == EPSG_4326
+    finally:
+        inventory.close()
+
+
+@pytest.fixture()
+def geojson_layer(tmp_path):
+    path = tmp_path / "points.geojson"
+    path.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {},
+                        "geometry": {"type": "Point", "coordinates": [x, x + 60]},
+                    }
+                    for x in (21, 25, 29)
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    return QgsVectorLayer(str(path), "points", "ogr")
+
+
+def test_estimate_layer_extent_should_skip_layers_with_cheap_extents(layer_polygon):
+    assert estimate_layer_extent(layer_polygon) is None
+
+
+def test_estimate_layer_extent_should_sample_features(geojson_layer):
+    extent, crs = estimate_layer_extent(geojson_layer)
+
+    assert extent.toString(0) == "21,81 : 29,89"
+    assert crs == geojson_layer.crs()
+
+
+def test_estimate_layer_extent_should_sample_features_across_layer(tmp_path):
+    path = tmp_path / "points.geojson"
+    path.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {},
+                        "geometry": {"type": "Point", "coordinates": [x / 100, 0]},
+                    }
+                    for x in range(3000)
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    layer = QgsVectorLayer(str(path), "points", "ogr")
+
+    extent, _ = estimate_layer_extent(layer)
+
+    assert extent.xMinimum() == 0
+    assert extent.xMaximum() > layer.extent().xMaximum() * 0.99
+
+
+def test_estimate_layer_extent_should_use_metadata_extent(geojson_layer):
+    metadata = geojson_layer.metadata()
+    spatial_extent = QgsLayerMetadata.SpatialExtent()
+    spatial_extent.extentCrs = QgsCoordinateReferenceSystem(EPSG_4326)
+    spatial_extent.bounds = QgsBox3d(20, 60, 0, 30, 70, 0)
+    layer_extent = metadata.extent()
+    layer_extent.setSpatialExtents([spatial_extent])
+    metadata.setExtent(layer_extent)
+    geojson_layer.setMetadata(metadata)
+
+    extent, _ = estimate_layer_extent(geojson_layer)
+
+    assert extent.toString(0) == "20,60 : 30,70"
+
+
+def test_layer_inventory_should_estimate_common_extent(
+    inventory, geojson_layer, layer_polygon
+):
+    project = QgsProject.instance()
+    project.setCrs(QgsCoordinateReferenceSystem(EPSG_4326))
+    project.addMapLayers([geojson_layer, layer_polygon])
+    estimated_before = EXTENT_STATISTICS.estimated
+
+    extent = inventory.common_extent(estimated=True)
+
+    assert extent == inventory.common_extent()
+    assert EXTENT_STATISTICS.estimated == estimated_before + 1
@@ -0,0 +1,116 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from pytest_qgis.leak_detector import LeakDetector, LeakThresholds
+from qgis.core import QgsProject, QgsVectorLayer
+from qgis.PyQt.QtCore import QObject
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+
+@pytest.fixture()
+def leak_detector(qgis_parent, qgis_canvas) -> LeakDetector:
+    return LeakDetector(
+        qgis_parent,
+        qgis_canvas,
+        LeakThresholds(map_layers=0, qobjects=0, rss_kb=1_000_000, gc_objects=10**9),
+    )
+
+
+def test_leak_detector_should_detect_leaks(
+    qgis_new_project, qgis_parent, leak_detector
+):
+    leak_detector.start()
+    layer = QgsVectorLayer("Point?crs=EPSG:4326", "leaking", "memory")
+    QgsProject.instance().addMapLayer(layer)
+    child = QObject(qgis_parent)
+    delta = leak_detector.stop("test")
+
+    assert delta.map_layers >= 1
+    assert delta.project_layers == 1
+    assert delta.parent_children == 1
+    assert leak_detector.is_leaking(delta)
+    assert "test" in leak_detector.leaking_tests()
+
+    child.deleteLater()
+
+
+def test_leak_detector_should_not_flag_clean_test(qgis_new_project, leak_detector):
+    leak_detector.start()
+    delta = leak_detector.stop("test")
+
+    assert (delta.map_layers, delta.project_layers, delta.parent_children) == (0, 0, 0)
+    assert not leak_detector.is_leaking(delta)
+
+
+def test_leak_check_option(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        from qgis.core import QgsVectorLayer
+
+        LAYERS = []
+
+        def test_leaking():
+            LAYERS.append(QgsVectorLayer("Point", "leaking", "memory"))
+
+        def test_clean():
+            pass
+    """
+    )
+    result = testdir.runpytest(
+        "--qgis_disable_init", "--qgis_leak_check", "--qgis_leak_report=leaks.json"
+    )
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(
+        [
+            "*pytest-qgis leak check: 1 of 2 tests exceeded the thresholds*",
+            "*test_leaking: map layers +1*",
+        ]
+    )
+
+    report = json.loads((testdir.tmpdir / "leaks.json").read_text("utf-8"))
+    assert report["columns"][:2] == ["nodeid", "map_layers"]
+    assert [row[1] for row in report["tests"]] == [1, 0]
+
+
+def test_leak_check_should_skip_shared_fixture_setup(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        import pytest
+        from qgis.core import QgsVectorLayer
+
+        @pytest.fixture(scope="module")
+        def shared():
+            return QgsVectorLayer("Point", "shared", "memory")
+
+        def test_first(shared):
+            pass
+
+        def test_second(shared):
+            pass
+    """
+    )
+    result = testdir.runpytest("--qgis_disable_init", "--qgis_leak_check")
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(
+        ["*pytest-qgis leak check: 0 of 2 tests exceeded the thresholds*"]
+    )
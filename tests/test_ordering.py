@@ -0,0 +1,120 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from typing import TYPE_CHECKING
+
+from pytest_qgis.ordering import Setup, count_setups
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+
+def test_count_setups():
+    module_layer = Setup("layer", "test_module.py", True)
+    other_module_layer = Setup("layer", "test_other.py", True)
+    render_settings = Setup("qgis_render_settings", "max_threads=1", False)
+    keys = [
+        frozenset({module_layer}),
+        frozenset(),
+        frozenset({module_layer, render_settings}),
+        frozenset(),
+        frozenset({render_settings}),
+        frozenset({other_module_layer, render_settings}),
+    ]
+
+    # The layer is kept for the module and the render settings are restored
+    assert count_setups(keys) == 4  # noqa: PLR2004
+    assert count_setups([keys[0], keys[2], keys[4], keys[1], keys[3]]) == 2  # noqa: PLR2004
+
+
+def test_reorder(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.fixture(scope="module")
+        def shared_layer():
+            return None
+
+        def test_first(shared_layer):
+            pass
+
+        @pytest.mark.qgis_render_settings(max_threads=1)
+        def test_second():
+            pass
+
+        def test_third():
+            pass
+
+        @pytest.mark.qgis_render_settings(max_threads=1)
+        def test_fourth(shared_layer):
+            pass
+
+        class TestClass:
+            def test_fifth(self):
+                pass
+
+            def test_sixth(self, shared_layer):
+                pass
+    """
+    )
+    result = testdir.runpytest(
+        "--qgis_disable_init", "--qgis_reorder", "--collect-only", "-q"
+    )
+
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_first",
+            "*::test_third",
+            "*::TestClass::test_fifth",
+            "*::TestClass::test_sixth",
+            "*::test_second",
+            "*::test_fourth",
+            "*pytest-qgis test ordering*",
+            "*: 2 instead of 3, saved: 1",
+        ]
+    )
+
+
+def test_reorder_should_run_processing_modules_last(testdir: "Testdir"):
+    testdir.makepyfile(
+        test_a="""
+        def test_processing(qgis_processing):
+            pass
+    """,
+        test_b="""
+        def test_first():
+            pass
+
+        def test_second():
+            pass
+    """,
+    )
+    result = testdir.runpytest(
+        "--qgis_disable_init", "--qgis_reorder", "--collect-only", "-q"
+    )
+
+    result.stdout.fnmatch_lines(
+        [
+            "test_b.py::test_first",
+            "test_b.py::test_second",
+            "test_a.py::test_processing",
+            "*pytest-qgis test ordering*",
+            "*: 1 instead of 1, saved: 0",
+            "first test using qgis_processing: 3 instead of 1 of 3",
+        ]
+    )
@@ -0,0 +1,131 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+
+import pytest
+from pytest_qgis.processing_cache import ProcessingCache
+from qgis.core import QgsProject, QgsVectorLayer
+
+from tests.conftest import get_copied_gpkg
+
+BUFFER = "native:buffer"
+
+
+@pytest.fixture()
+def processing_cache(qgis_processing, tmp_path) -> ProcessingCache:
+    return ProcessingCache(tmp_path / "cache", max_size_bytes=10**9)
+
+
+def _buffer_parameters(
+    layer, distance: float = 1, output: str = "TEMPORARY_OUTPUT"
+) -> dict:
+    return {"INPUT": layer, "DISTANCE": distance, "OUTPUT": output}
+
+
+def test_processing_cache_should_cache_results(
+    processing_cache, layer_points, tmp_path
+):
+    results = processing_cache.run(BUFFER, _buffer_parameters(layer_points))
+    cached_results = processing_cache.run(BUFFER, _buffer_parameters(layer_points))
+
+    assert (processing_cache.hits, processing_cache.misses) == (1, 1)
+    assert isinstance(results["OUTPUT"], QgsVectorLayer)
+    assert cached_results["OUTPUT"].featureCount() == layer_points.featureCount()
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+
+
+def test_processing_cache_should_not_share_cached_files(
+    processing_cache, layer_points, tmp_path
+):
+    results = processing_cache.run(BUFFER, _buffer_parameters(layer_points))
+    cached_results = processing_cache.run(BUFFER, _buffer_parameters(layer_points))
+
+    path = Path(results["OUTPUT"].source().split("|")[0])
+    cached_path = Path(cached_results["OUTPUT"].source().split("|")[0])
+    assert path != cached_path
+    assert path.exists()
+    assert cached_path.exists()
+    assert tmp_path / "cache" not in cached_path.parents
+
+
+def test_processing_cache_should_match_copies_of_same_file(processing_cache, tmp_path):
+    (tmp_path / "first").mkdir()
+    (tmp_path / "second").mkdir()
+    first = get_copied_gpkg(tmp_path / "first")
+    second = get_copied_gpkg(tmp_path / "second")
+
+    processing_cache.run(BUFFER, _buffer_parameters(f"{first!s}|layername=points"))
+    processing_cache.run(BUFFER, _buffer_parameters(f"{second!s}|layername=points"))
+    processing_cache.run(BUFFER, _buffer_parameters(f"{second!s}|layername=points", 2))
+
+    assert (processing_cache.hits, processing_cache.misses) == (1, 2)
+
+
+def test_processing_cache_should_fingerprint_journal_files(processing_cache, tmp_path):
+    gpkg = get_copied_gpkg(tmp_path)
+    parameters = _buffer_parameters(f"{gpkg!s}|layername=points")
+    processing_cache.run(BUFFER, parameters)
+    (tmp_path / f"{gpkg.name}-wal").write_bytes(b"changes")
+    processing_cache.run(BUFFER, parameters)
+
+    assert (processing_cache.hits, processing_cache.misses) == (0, 2)
+
+
+def test_processing_cache_should_fingerprint_layer_ids(
+    processing_cache, layer_points, tmp_path
+):
+    QgsProject.instance().addMapLayer(layer_points)
+    processing_cache.run(BUFFER, _buffer_parameters(layer_points.id()))
+    layer_points.dataProvider().truncate()
+    processing_cache.run(BUFFER, _buffer_parameters(layer_points.id()))
+
+    assert (processing_cache.hits, processing_cache.misses) == (0, 2)
+
+
+def test_processing_cache_should_return_memory_layers(processing_cache, layer_points):
+    parameters = _buffer_parameters(layer_points, output="memory:")
+    processing_cache.run(BUFFER, parameters)
+    layer = processing_cache.run(BUFFER, parameters)["OUTPUT"]
+
+    assert layer.providerType() == "memory"
+    assert layer.featureCount() == layer_points.featureCount()
+
+
+def test_processing_cache_should_not_cache_file_outputs(
+    processing_cache, layer_points, tmp_path
+):
+    output = str(tmp_path / "buffer.gpkg")
+    results = processing_cache.run(
+        BUFFER, _buffer_parameters(layer_points, output=output)
+    )
+
+    assert processing_cache.bypasses == 1
+    assert results["OUTPUT"] == output
+
+
+def test_processing_cache_should_evict_least_recently_used(
+    qgis_processing, layer_points, tmp_path
+):
+    processing_cache = ProcessingCache(tmp_path / "cache", max_size_bytes=0)
+    processing_cache.run(BUFFER, _buffer_parameters(layer_points, 1))
+    processing_cache.run(BUFFER, _buffer_parameters(layer_points, 2))
+    processing_cache.run(BUFFER, _buffer_parameters(layer_points, 2))
+    processing_cache.run(BUFFER, _buffer_parameters(layer_points, 1))
+
+    assert (processing_cache.hits, processing_cache.misses) == (1, 3)
+    assert len(list((tmp_path / "cache").iterdir())) == 1
@@ -17,6 +17,11 @@
 #  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
 
 import pytest
+from pytest_qgis.pytest_qgis import (
+    ShowMapSettings,
+    _get_basemap_cache,
+    _record_qgis_map,
+)
 from qgis.core import (
     Qgis,
     QgsCoordinateReferenceSystem,
@@ -24,6 +29,7 @@ from qgis.core import (
     QgsProject,
     QgsVectorLayer,
 )
+from qgis.PyQt.QtGui import QImage
 from qgis.PyQt.QtWidgets import QToolBar
 from qgis.utils import iface
 
@@ -139,3 +145,24 @@ def test_crs_is_not_constructed_before_application():
     wkt_4326 = 'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]'  # noqa: E501
     crs = QgsCoordinateReferenceSystem.fromWkt(wkt_4326)
     assert crs.isValid()
+
+
+@pytest.mark.usefixtures("qgis_new_project")
+def test_record_qgis_map_should_save_image(
+    qgis_app, qgis_iface, layer_polygon, tmp_path, request
+):
+    QgsProject.instance().addMapLayer(layer_polygon)
+    image_path = tmp_path / "maps" / "map.png"
+
+    _record_qgis_map(
+        qgis_app,
+        qgis_iface,
+        ShowMapSettings(0, False, True, None, True),
+        tmp_path,
+        _get_basemap_cache(request.config),
+        image_path,
+    )
+
+    image = QImage(str(image_path))
+    canvas = qgis_iface.mapCanvas()
+    assert (image.width(), image.height()) == (canvas.width(), canvas.height())
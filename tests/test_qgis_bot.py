@@ -16,11 +16,15 @@
 #  You should have received a copy of the GNU General Public License
 #  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
 #
+import gc
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
-from qgis.core import QgsFieldConstraints, QgsGeometry
+from qgis.core import QgsFieldConstraints, QgsGeometry, QgsMapLayer, QgsProject
 from qgis.gui import QgsAttributeDialog
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QThread
 
 if TYPE_CHECKING:
     from pytest_qgis.qgis_bot import QgisBot
@@ -151,3 +155,36 @@ def test_get_qgs_attribute_dialog_widgets_by_name(
         "fid": "QgsFilterLineEdit",
         "text_field": "QgsFilterLineEdit",
     }
+
+
+def test_load_layers_concurrently(qgis_new_project, gpkg: Path, qgis_bot: "QgisBot"):
+    raster = Path(Path(__file__).parent, "data", "small_raster.tif")
+    layers = qgis_bot.load_layers_concurrently(
+        [
+            (f"{gpkg!s}|layername=points", "points", "ogr"),
+            (f"{gpkg!s}|layername=polygon", "polygon", "ogr"),
+            (str(raster), "raster", "gdal"),
+        ]
+    )
+
+    assert [layer.name() for layer in layers] == ["points", "polygon", "raster"]
+    assert all(layer.thread() == QThread.currentThread() for layer in layers)
+    assert set(QgsProject.instance().mapLayers().values()) == set(layers)
+
+
+def test_load_layers_concurrently_should_raise_for_invalid_layer(
+    qgis_new_project, qgis_bot: "QgisBot"
+):
+    with pytest.raises(ValueError, match="Could not load layers: missing"):
+        qgis_bot.load_layers_concurrently(
+            [("Point", "loaded", "memory"), ("missing.gpkg", "missing", "ogr")]
+        )
+
+    gc.collect()
+    assert not [
+        obj
+        for obj in gc.get_objects()
+        if issubclass(type(obj), QgsMapLayer)
+        and not sip.isdeleted(obj)
+        and obj.name() == "loaded"
+    ]
@@ -0,0 +1,145 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+
+import pytest
+from osgeo import gdal, osr
+from pytest_qgis.utils import assert_rasters_equal
+
+np = pytest.importorskip("numpy")
+
+
+def _create_raster(  # noqa: PLR0913
+    path,
+    values,
+    nodata=None,
+    block_size=4,
+    geotransform=(0, 1, 0, 0, 0, -1),
+    data_type=gdal.GDT_Float32,
+) -> Path:
+    height, width = values.shape
+    dataset = gdal.GetDriverByName("GTiff").Create(
+        str(path),
+        width,
+        height,
+        1,
+        data_type,
+        options=["TILED=YES", f"BLOCKXSIZE={block_size}", f"BLOCKYSIZE={block_size}"]
+        if block_size < width
+        else [],
+    )
+    dataset.SetGeoTransform(geotransform)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3067)
+    dataset.SetProjection(srs.ExportToWkt())
+    band = dataset.GetRasterBand(1)
+    if nodata is not None:
+        band.SetNoDataValue(nodata)
+    band.WriteArray(values)
+    dataset = None
+    return path
+
+
+def test_assert_rasters_equal_should_allow_tolerance(tmp_path):
+    values = np.arange(64, dtype=np.float32).reshape(8, 8)
+    actual = _create_raster(tmp_path / "actual.tif", values + 0.01)
+    expected = _create_raster(tmp_path / "expected.tif", values)
+
+    assert_rasters_equal(actual, expected, tolerance=0.1)
+    with pytest.raises(AssertionError, match="64 differing pixels"):
+        assert_rasters_equal(actual, expected)
+
+
+def test_assert_rasters_equal_should_report_differing_windows(tmp_path):
+    values = np.zeros((8, 8), dtype=np.float32)
+    expected = _create_raster(tmp_path / "expected.tif", values)
+    values[1, 2] = 5
+    values[6, 7] = 1
+    actual = _create_raster(tmp_path / "actual.tif", values)
+
+    with pytest.raises(AssertionError) as error:
+        assert_rasters_equal(actual, str(expected))
+
+    message = str(error.value)
+    assert "band 1: 2 differing pixels, max difference 5" in message
+    assert "rows 1-6, columns 2-7" in message
+    assert "(0, 0): 1, (4, 4): 1" in message
+
+
+def test_assert_rasters_equal_should_stop_at_first_window(tmp_path):
+    expected = _create_raster(tmp_path / "expected.tif", np.zeros((8, 8)))
+    actual = _create_raster(tmp_path / "actual.tif", np.ones((8, 8)))
+
+    with pytest.raises(AssertionError, match="16 differing pixels"):
+        assert_rasters_equal(actual, expected, fail_fast=True)
+
+
+def test_assert_rasters_equal_should_compare_nodata(tmp_path):
+    values = np.ones((8, 8), dtype=np.float32)
+    values[0, 0] = -9999
+    expected = _create_raster(tmp_path / "expected.tif", values, nodata=-9999)
+    other_nodata = values.copy()
+    other_nodata[0, 0] = 0
+    actual = _create_raster(tmp_path / "actual.tif", other_nodata, nodata=0)
+
+    assert_rasters_equal(actual, expected)
+    values[0, 0] = 1
+    actual = _create_raster(tmp_path / "valid.tif", values, nodata=-9999)
+    with pytest.raises(AssertionError, match="1 differing pixels"):
+        assert_rasters_equal(actual, expected)
+
+
+def test_assert_rasters_equal_should_check_size(tmp_path, raster_3067):
+    expected = _create_raster(tmp_path / "expected.tif", np.zeros((8, 8)))
+
+    with pytest.raises(AssertionError, match="Raster size"):
+        assert_rasters_equal(raster_3067, expected)
+    assert_rasters_equal(raster_3067, raster_3067.source())
+
+
+def test_assert_rasters_equal_should_check_geotransform(tmp_path):
+    values = np.zeros((8, 8), dtype=np.float32)
+    expected = _create_raster(
+        tmp_path / "expected.tif", values, geotransform=(500000, 1, 0, 7000000, 0, -1)
+    )
+    shifted = _create_raster(
+        tmp_path / "shifted.tif", values, geotransform=(500000.5, 1, 0, 7000000, 0, -1)
+    )
+    rounded = _create_raster(
+        tmp_path / "rounded.tif",
+        values,
+        geotransform=(500000.001, 1, 0, 7000000, 0, -1),
+    )
+
+    assert_rasters_equal(rounded, expected)
+    with pytest.raises(AssertionError, match="Geotransform differs"):
+        assert_rasters_equal(shifted, expected)
+
+
+def test_assert_rasters_equal_should_compare_complex_values(tmp_path):
+    values = np.ones((8, 8), dtype=np.complex64)
+    expected = _create_raster(
+        tmp_path / "expected.tif", values, data_type=gdal.GDT_CFloat32
+    )
+    values[2, 3] = 1 + 2j
+    actual = _create_raster(
+        tmp_path / "actual.tif", values, data_type=gdal.GDT_CFloat32
+    )
+
+    with pytest.raises(AssertionError, match="1 differing pixels, max difference 2"):
+        assert_rasters_equal(actual, expected)
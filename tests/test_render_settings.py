@@ -0,0 +1,91 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from typing import TYPE_CHECKING
+
+import pytest
+from pytest_qgis.render_settings import (
+    RenderSettings,
+    apply_render_settings,
+    get_render_settings,
+)
+from qgis.core import QgsApplication
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+
+@pytest.mark.qgis_render_settings(
+    parallel_rendering=True, render_cache=True, preview_jobs=False, max_threads=2
+)
+def test_render_settings_marker(qgis_canvas):
+    assert qgis_canvas.isParallelRenderingEnabled()
+    assert qgis_canvas.isCachingEnabled()
+    assert not qgis_canvas.previewJobsEnabled()
+    assert QgsApplication.maxThreads() == 2  # noqa: PLR2004
+
+
+def test_apply_render_settings_should_return_previous_settings(qgis_canvas):
+    original = get_render_settings(qgis_canvas)
+
+    previous = apply_render_settings(
+        qgis_canvas,
+        RenderSettings(
+            not original.parallel_rendering, None, None, original.max_threads
+        ),
+    )
+    assert previous == original
+    assert get_render_settings(qgis_canvas) == original._replace(
+        parallel_rendering=not original.parallel_rendering
+    )
+
+    apply_render_settings(qgis_canvas, previous)
+    assert get_render_settings(qgis_canvas) == original
+
+
+def test_render_settings_marker_should_restore_settings_after_group(
+    testdir: "Testdir",
+):
+    testdir.makepyfile(
+        """
+        import pytest
+        from qgis.core import QgsApplication
+
+        MAX_THREADS = []
+
+        def test_original():
+            MAX_THREADS.append(QgsApplication.maxThreads())
+
+        @pytest.mark.qgis_render_settings(max_threads=3)
+        def test_first():
+            assert QgsApplication.maxThreads() == 3
+
+        @pytest.mark.qgis_render_settings(max_threads=3)
+        def test_second():
+            assert QgsApplication.maxThreads() == 3
+
+        @pytest.mark.qgis_render_settings(max_threads=5)
+        def test_other():
+            assert QgsApplication.maxThreads() == 5
+
+        def test_restored():
+            assert QgsApplication.maxThreads() == MAX_THREADS[0]
+    """
+    )
+    result = testdir.runpytest("--qgis_disable_init")
+
+    result.assert_outcomes(passed=5)
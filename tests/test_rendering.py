@@ -0,0 +1,86 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from pytest_qgis.rendering import (
+    LAYER_RENDER_TIMES_PROPERTY,
+    RENDER_TIME_PROPERTY,
+    render_layer_timings,
+)
+from qgis.core import QgsProject
+
+
+@pytest.fixture()
+def canvas_with_layers(qgis_canvas, qgis_new_project, layer_points, layer_polygon):
+    QgsProject.instance().addMapLayers([layer_points, layer_polygon])
+    qgis_canvas.setLayers([layer_points, layer_polygon])
+    qgis_canvas.zoomToFullExtent()
+    return qgis_canvas
+
+
+def test_qgis_render_timer_should_wait_for_rendering(
+    qgis_render_timer, canvas_with_layers, request
+):
+    seconds = qgis_render_timer.refresh_and_wait()
+
+    assert seconds > 0
+    assert not canvas_with_layers.isDrawing()
+    assert (RENDER_TIME_PROPERTY, seconds) in request.node.user_properties
+
+
+def test_qgis_render_timer_should_time_layers(
+    qgis_render_timer, canvas_with_layers, layer_points, layer_polygon, request
+):
+    timings = qgis_render_timer.layer_timings()
+
+    assert {timing.layer_id for timing in timings} == {
+        layer_points.id(),
+        layer_polygon.id(),
+    }
+    assert timings[0].seconds >= timings[1].seconds
+    assert dict(request.node.user_properties)[LAYER_RENDER_TIMES_PROPERTY] == {
+        timing.name: timing.seconds for timing in timings
+    }
+    assert request.config._qgis_layer_render_timings[-1][0] == request.node.nodeid
+
+
+def test_render_layer_timings_should_render_given_layers(
+    canvas_with_layers, layer_points
+):
+    timings = render_layer_timings(canvas_with_layers, [layer_points])
+
+    assert [timing.name for timing in timings] == [layer_points.name()]
+
+
+def test_refresh_and_wait_should_fail_for_frozen_canvas(qgis_render_timer, qgis_canvas):
+    qgis_canvas.freeze(True)
+    try:
+        with pytest.raises(ValueError, match="Frozen canvas"):
+            qgis_render_timer.refresh_and_wait()
+    finally:
+        qgis_canvas.freeze(False)
+
+
+def test_refresh_and_wait_should_fail_for_disabled_rendering(
+    qgis_render_timer, qgis_canvas
+):
+    qgis_canvas.setRenderFlag(False)
+    try:
+        with pytest.raises(ValueError, match="rendering disabled"):
+            qgis_render_timer.refresh_and_wait()
+    finally:
+        qgis_canvas.setRenderFlag(True)
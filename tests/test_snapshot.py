@@ -0,0 +1,112 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from pytest_qgis.snapshot import QgisSnapshot, snapshot_layer
+from qgis.core import QgsFeature, QgsGeometry, QgsPointXY, QgsVectorLayer
+
+NODEID = "tests/test_example.py::test_example[param]"
+
+
+def _create_layer(points) -> QgsVectorLayer:
+    layer = QgsVectorLayer(
+        "Point?crs=EPSG:3067&field=name:string&field=value:double", "points", "memory"
+    )
+    features = []
+    for name, value, x in points:
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([name, value])
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, 0)))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+@pytest.fixture()
+def points():
+    return [("a", 1.0, 1), ("b", None, 2), ("c", 3.0, 3)]
+
+
+def test_snapshot_should_fail_if_missing(tmp_path, points):
+    snapshot = QgisSnapshot(tmp_path, NODEID, False, [])
+
+    with pytest.raises(AssertionError, match="--qgis_snapshot_update"):
+        snapshot.assert_match(_create_layer(points))
+    assert not list(tmp_path.iterdir())
+
+
+def test_snapshot_should_match_written_snapshot(tmp_path, points):
+    written = []
+    QgisSnapshot(tmp_path, NODEID, True, written).assert_match(_create_layer(points))
+
+    assert written == [tmp_path / "tests_test_example.py_test_example_param_.0.npz"]
+    QgisSnapshot(tmp_path, NODEID, False, []).assert_match(
+        _create_layer(points), batch_size=2
+    )
+
+
+def test_snapshot_should_report_differing_features(tmp_path, points):
+    QgisSnapshot(tmp_path, NODEID, True, []).assert_match(_create_layer(points))
+    points[1] = ("b", 2.0, 2)
+    points[2] = ("c", 3.0, 4)
+
+    with pytest.raises(AssertionError) as error:
+        QgisSnapshot(tmp_path, NODEID, False, []).assert_match(
+            _create_layer(points), max_diff=1
+        )
+
+    message = str(error.value)
+    assert "2 differing features" in message
+    assert "feature 1: value: 2.0 != None" in message
+    assert "... and 1 more" in message
+
+
+def test_snapshot_should_report_schema_and_count(tmp_path, points):
+    snapshot = QgisSnapshot(tmp_path, NODEID, True, [])
+    snapshot.assert_match(_create_layer(points), name="layer")
+    snapshot.assert_match(
+        QgsVectorLayer("Point?crs=EPSG:3067&field=name:string", "points", "memory"),
+        name="schema",
+    )
+
+    snapshot = QgisSnapshot(tmp_path, NODEID, False, [])
+    with pytest.raises(AssertionError, match="Feature count differs: 2 != 3"):
+        snapshot.assert_match(_create_layer(points[:2]), name="layer")
+    with pytest.raises(AssertionError, match="Fields differ"):
+        snapshot.assert_match(_create_layer(points), name="schema")
+
+
+def test_snapshot_should_update_differing_snapshot(tmp_path, points):
+    QgisSnapshot(tmp_path, NODEID, True, []).assert_match(_create_layer(points))
+    written = []
+    QgisSnapshot(tmp_path, NODEID, True, written).assert_match(
+        _create_layer(points[:1])
+    )
+
+    assert len(written) == 1
+    QgisSnapshot(tmp_path, NODEID, False, []).assert_match(_create_layer(points[:1]))
+
+
+def test_snapshot_layer_should_store_columns(points):
+    arrays = snapshot_layer(_create_layer(points))
+
+    assert arrays["schema"].tolist() == ["name:string", "value:double"]
+    assert arrays["field_0"].tolist() == ["a", "b", "c"]
+    assert arrays["null_1"].tolist() == [False, True, False]
+    assert arrays["wkb_offsets"][0] == 0
+    assert arrays["wkb_offsets"][-1] == len(arrays["wkb"])
@@ -0,0 +1,79 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from qgis.core import QgsWkbTypes
+
+from tests.utils import EPSG_3067
+
+pytest.importorskip("numpy")
+
+FEATURE_COUNT = 1000
+FIELDS = {"id": "int", "value": "real", "name": "string"}
+
+
+@pytest.mark.parametrize(
+    ("geometry_type", "expected_geometry_type"),
+    [
+        ("Point", QgsWkbTypes.PointGeometry),
+        ("LineString", QgsWkbTypes.LineGeometry),
+        ("Polygon", QgsWkbTypes.PolygonGeometry),
+    ],
+)
+@pytest.mark.parametrize("provider", ["ogr", "memory"])
+def test_synthetic_layer(
+    qgis_synthetic_layer, geometry_type, expected_geometry_type, provider
+):
+    layer = qgis_synthetic_layer(
+        FEATURE_COUNT, geometry_type, EPSG_3067, FIELDS, provider=provider
+    )
+
+    assert layer.providerType() == provider
+    assert layer.featureCount() == FEATURE_COUNT
+    assert layer.geometryType() == expected_geometry_type
+    assert layer.crs().authid() == EPSG_3067
+    assert layer.fields().names() == list(FIELDS)
+    assert not layer.extent().isEmpty()
+
+
+def test_synthetic_layer_should_be_deterministic(qgis_synthetic_layer):
+    layer1 = qgis_synthetic_layer(10, fields=FIELDS, seed=1, provider="memory")
+    layer2 = qgis_synthetic_layer(10, fields=FIELDS, seed=1, provider="memory")
+    layer3 = qgis_synthetic_layer(10, fields=FIELDS, seed=2, provider="memory")
+
+    features1 = [(f.attributes(), f.geometry().asWkt()) for f in layer1.getFeatures()]
+    features2 = [(f.attributes(), f.geometry().asWkt()) for f in layer2.getFeatures()]
+    features3 = [(f.attributes(), f.geometry().asWkt()) for f in layer3.getFeatures()]
+
+    assert features1 == features2
+    assert features1 != features3
+
+
+def test_synthetic_layer_should_be_cached(qgis_synthetic_layer):
+    layer1 = qgis_synthetic_layer(10, seed=3)
+    layer2 = qgis_synthetic_layer(10, seed=3)
+    layer3 = qgis_synthetic_layer(10, seed=3, cache=False)
+
+    assert layer1.source() == layer2.source()
+    assert layer1.source() != layer3.source()
+    assert layer1.readOnly()
+    assert not layer3.readOnly()
+
+
+def test_synthetic_layer_invalid_geometry_type(qgis_synthetic_layer):
+    with pytest.raises(ValueError, match="Invalid geometry type"):
+        qgis_synthetic_layer(10, "Curve")
@@ -0,0 +1,87 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+from typing import TYPE_CHECKING
+
+import pytest
+from osgeo import gdal
+from pytest_qgis.pytest_qgis import VSIMEM_PREFIX
+from qgis.core import Qgis, QgsProject
+
+from tests.utils import EPSG_3067
+
+if TYPE_CHECKING:
+    from _pytest.pytester import Testdir
+
+pytest.importorskip("numpy")
+
+
+def test_synthetic_raster(qgis_synthetic_raster):
+    layer = qgis_synthetic_raster(
+        300,
+        200,
+        band_count=3,
+        data_type="Int16",
+        crs=EPSG_3067,
+        compression="DEFLATE",
+        overviews=(2, 4),
+        nodata=-1,
+    )
+
+    assert layer.source().startswith(VSIMEM_PREFIX)
+    assert (layer.width(), layer.height()) == (300, 200)
+    assert layer.bandCount() == 3  # noqa: PLR2004
+    assert layer.dataProvider().dataType(1) == Qgis.Int16
+    assert layer.crs().authid() == EPSG_3067
+
+    dataset = gdal.Open(layer.source())
+    band = dataset.GetRasterBand(1)
+    assert band.GetBlockSize() == [256, 256]
+    assert band.GetOverviewCount() == 2  # noqa: PLR2004
+    assert band.GetNoDataValue() == -1
+
+
+def test_synthetic_raster_memory_should_be_freed(testdir: "Testdir"):
+    testdir.makepyfile(
+        """
+        from osgeo import gdal
+
+        PATHS = []
+
+        def test_create(qgis_synthetic_raster):
+            PATHS.append(qgis_synthetic_raster(10, 10).source())
+            assert gdal.VSIStatL(PATHS[0]) is not None
+
+        def test_freed():
+            assert gdal.VSIStatL(PATHS[0]) is None
+    """
+    )
+    result = testdir.runpytest("--qgis_disable_init")
+    result.assert_outcomes(passed=2)
+
+
+def test_synthetic_raster_added_to_project(qgis_new_project, qgis_synthetic_raster):
+    layer = qgis_synthetic_raster(10, 10, in_memory=False)
+    QgsProject.instance().addMapLayer(layer)
+
+    assert not layer.source().startswith(VSIMEM_PREFIX)
+    assert layer.isValid()
+
+
+def test_synthetic_raster_invalid_data_type(qgis_synthetic_raster):
+    with pytest.raises(ValueError, match="Invalid raster data type"):
+        qgis_synthetic_raster(10, 10, data_type="Float128")
@@ -0,0 +1,88 @@
+#  Copyright (C) 2021-2023 pytest-qgis Contributors.
+#
+#
+#  This file is part of pytest-qgis.
+#
+#  pytest-qgis is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  pytest-qgis is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with pytest-qgis.  If not, see <https://www.gnu.org/licenses/>.
+import time
+
+import pytest
+from qgis.core import QgsApplication, QgsTask
+from qgis.PyQt import sip
+
+SLEEP_SECONDS = 0.05
+
+
+def _sleep(task: QgsTask) -> bool:
+    time.sleep(SLEEP_SECONDS)
+    return True
+
+
+def _add_tasks(count: int) -> list:
+    tasks = [QgsTask.fromFunction(f"sleep {i}", _sleep) for i in range(count)]
+    for task in tasks:
+        QgsApplication.taskManager().addTask(task)
+    return tasks
+
+
+def test_qgis_task_manager_should_wait_for_all_tasks(qgis_task_manager):
+    qgis_task_manager.set_max_active_threads(1)
+    _add_tasks(3)
+
+    qgis_task_manager.wait_for_all()
+
+    timings = qgis_task_manager.timings()
+    assert [timing.description for timing in timings] == [
+        "sleep 0",
+        "sleep 1",
+        "sleep 2",
+    ]
+    assert all(timing.status == QgsTask.Complete for timing in timings)
+    assert all(timing.run_time >= SLEEP_SECONDS for timing in timings)
+    # With a single thread the last task waits for the others
+    assert timings[-1].queue_time >= SLEEP_SECONDS
+
+
+def test_qgis_task_manager_should_wait_for_specific_tasks(qgis_task_manager):
+    tasks = _add_tasks(2)
+
+    qgis_task_manager.wait_for(tasks[:1])
+
+    assert tasks[0].returned_values is True
+    qgis_task_manager.wait_for_all()
+
+
+def test_qgis_task_manager_should_treat_deleted_tasks_as_finished(
+    qgis_task_manager,
+):
+    task = QgsTask.fromFunction("deleted", _sleep)
+    sip.delete(task)
+
+    qgis_task_manager.wait_for([task], timeout_milliseconds=1)
+
+
+def test_qgis_task_manager_should_raise_on_timeout(qgis_task_manager):
+    _add_tasks(1)
+
+    with pytest.raises(TimeoutError):
+        qgis_task_manager.wait_for_all(timeout_milliseconds=1)
+    qgis_task_manager.wait_for_all()
+
+
+def test_qgis_task_manager_should_restore_thread_count(qgis_task_manager):
+    original_count = QgsApplication.taskManager().maxActiveThreadCount()
+    qgis_task_manager.set_max_active_threads(1)
+    qgis_task_manager.close()
+
+    assert QgsApplication.taskManager().maxActiveThreadCount() == original_count
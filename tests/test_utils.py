@@ -19,12 +19,18 @@
 import pytest
 from pytest_qgis.utils import (
     clean_qgis_layer,
+    copy_to_memory_layer,
     get_common_extent_from_all_layers,
     get_layers_with_different_crs,
+    memory_qgis_layer,
     replace_layers_with_reprojected_clones,
     set_map_crs_based_on_layers,
 )
-from qgis.core import QgsCoordinateReferenceSystem, QgsProject, QgsVectorLayer
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsProject,
+    QgsVectorLayer,
+)
 from qgis.PyQt import sip
 
 from tests.utils import EPSG_3067, EPSG_4326, QGIS_VERSION
@@ -113,3 +119,32 @@ def test_clean_qgis_layer(layer_polygon):
     list(layer_function())
 
     assert sip.isdeleted(layer)
+
+
+def test_memory_qgis_layer(layer_polygon):
+    layer = QgsVectorLayer(layer_polygon.source(), "another layer")
+
+    @memory_qgis_layer
+    def layer_function() -> QgsVectorLayer:
+        return layer
+
+    memory_layer = layer_function()
+
+    assert sip.isdeleted(layer)
+    assert memory_layer.providerType() == "memory"
+    assert memory_layer.name() == "another layer"
+    assert memory_layer.featureCount() == layer_polygon.featureCount()
+
+
+def test_copy_to_memory_layer(layer_polygon):
+    memory_layer = copy_to_memory_layer(layer_polygon, "copy", batch_size=1)
+
+    assert memory_layer.name() == "copy"
+    assert memory_layer.crs() == layer_polygon.crs()
+    assert memory_layer.wkbType() == layer_polygon.wkbType()
+    assert memory_layer.fields().names() == layer_polygon.fields().names()
+    assert [feature.attributes() for feature in memory_layer.getFeatures()] == [
+        feature.attributes() for feature in layer_polygon.getFeatures()
+    ]
+    assert memory_layer.extent() == layer_polygon.extent()
+    assert memory_layer.renderer().type() == layer_polygon.renderer().type()
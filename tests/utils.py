@@ -18,7 +18,7 @@
 #
 import os
 
-from qgis.core import Qgis
+from qgis.core import Qgis, QgsFeature, QgsGeometry, QgsPointXY, QgsVectorLayer
 
 try:
     QGIS_VERSION = Qgis.versionInt()
@@ -29,3 +29,15 @@ IN_CI = os.environ.get("QGIS_IN_CI")
 
 EPSG_4326 = "EPSG:4326"
 EPSG_3067 = "EPSG:3067"
+
+
+def create_points_layer(points, name: str = "points") -> QgsVectorLayer:
+    layer = QgsVectorLayer("Point?crs=EPSG:4326&field=name:string", name, "memory")
+    features = []
+    for feature_name, x, y in points:
+        feature = QgsFeature(layer.fields())
+        feature["name"] = feature_name
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
@@ -142,3 +142,9 @@ def test_map_extent_should_not_change_to_layers_extent_when_processing_events(
     qgis_app.processEvents()
 
     assert qgis_canvas.extent().height() == extent_smaller_than_layer.height()
+
+
+@pytest.mark.qgis_show_map(add_basemap=True, record=True)
+def test_show_map_record(layer_polygon, qgis_parent):
+    QgsProject.instance().addMapLayers([layer_polygon])
+    assert not qgis_parent.isVisible()